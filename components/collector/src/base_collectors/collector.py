@@ -6,18 +6,19 @@ import os
 import time
 import traceback
 from datetime import datetime, timedelta
-from typing import Any, Coroutine, Final, NoReturn, cast
+from functools import partial
+from typing import Any, Final, NoReturn, Optional, cast
 
 import aiohttp
 
-from collector_utilities.functions import timer
 from collector_utilities.type import JSON, URL
 
 from .metric_collector import MetricCollector
+from .metric_scheduler import MetricScheduler
 
 
-async def get(session: aiohttp.ClientSession, api: URL, log: bool = True) -> JSON:
-    """Get data from the API url."""
+async def get(session: aiohttp.ClientSession, api: URL, log: bool = True) -> Optional[JSON]:
+    """Get data from the API url. Return None if getting the data fails."""
     try:
         response = await session.get(api)
         json = cast(JSON, await response.json())
@@ -27,7 +28,7 @@ async def get(session: aiohttp.ClientSession, api: URL, log: bool = True) -> JSO
         if log:
             logging.error("Getting data from %s failed: %s", api, reason)
             logging.error(traceback.format_exc())
-        return {}
+        return None
 
 
 async def post(session: aiohttp.ClientSession, api: URL, data) -> None:
@@ -46,12 +47,22 @@ async def post(session: aiohttp.ClientSession, api: URL, data) -> None:
 
 
 class Collector:
-    """Collect measurements for all metrics."""
+    """Collect measurements for all metrics.
+
+    The collector keeps a priority queue of metrics, ordered by the date and time the metric is due to be measured.
+    Edited metrics are put at the front of the queue. At most MEASUREMENT_LIMIT metrics are measured concurrently. As
+    soon as the measurement of a metric is done, the next metric that is due is started.
+
+    Measurements are posted to the server in batches of MEASUREMENT_BATCH_SIZE measurements. Smaller batches are posted
+    when no other metrics are being measured and each time the collector wakes up.
+    """
 
     API_VERSION = "v3"
     MAX_SLEEP_DURATION = int(os.environ.get("COLLECTOR_SLEEP_DURATION", 20))
     MEASUREMENT_LIMIT = int(os.environ.get("COLLECTOR_MEASUREMENT_LIMIT", 30))
     MEASUREMENT_FREQUENCY = int(os.environ.get("COLLECTOR_MEASUREMENT_FREQUENCY", 15 * 60))
+    KEEPALIVE_TIMEOUT = int(os.environ.get("COLLECTOR_KEEPALIVE_TIMEOUT", 60))
+    MEASUREMENT_BATCH_SIZE = int(os.environ.get("COLLECTOR_MEASUREMENT_BATCH_SIZE", 10))
 
     def __init__(self) -> None:
         self.server_url: Final[URL] = URL(
@@ -59,7 +70,10 @@ class Collector:
         )
         self.data_model: JSON = {}
         self.__previous_metrics: dict[str, Any] = {}
+        self.__metrics: dict[str, Any] = {}
         self.next_fetch: dict[str, datetime] = {}
+        self.__scheduler = MetricScheduler()
+        self.__measurements: list[dict] = []  # Measurements waiting to be posted to the server
 
     @staticmethod
     def record_health(filename: str = "/home/collector/health_check.txt") -> None:
@@ -75,25 +89,20 @@ class Collector:
         timeout = aiohttp.ClientTimeout(total=120)
         async with aiohttp.ClientSession(raise_for_status=True, timeout=timeout, trust_env=True) as session:
             self.data_model = await self.fetch_data_model(session)
-        while True:
-            self.record_health()
-            # The TCPConnector has limit 0, meaning unlimited, because aiohttp only closes connections when the response
-            # is closed. But due to the architecture of the collector (first collect all the responses, then parse them)
-            # the responses are kept around relatively long, and hence the connections too. To prevent time-outs while
-            # aiohttp waits for connections to become available we don't limit the connection pool size.
-            async with aiohttp.ClientSession(
-                connector=aiohttp.TCPConnector(limit=0, ssl=False),
-                raise_for_status=True,
-                timeout=timeout,
-                trust_env=True,
-            ) as session:
-                with timer() as collection_timer:
-                    await self.collect_metrics(session)
-            sleep_duration = max(0, self.MAX_SLEEP_DURATION - collection_timer.duration)
-            logging.info(
-                "Collecting took %.1f seconds. Sleeping %.1f seconds...", collection_timer.duration, sleep_duration
-            )
-            await asyncio.sleep(sleep_duration)
+        # The session is kept open so idle connections can be reused across collection rounds. The TCPConnector has
+        # limit 0, meaning unlimited, because the number of concurrent requests is limited per source host by the source
+        # collectors, using the maximum number of connections per host specified in the data model for each source type.
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=0, ssl=False, keepalive_timeout=self.KEEPALIVE_TIMEOUT),
+            raise_for_status=True,
+            timeout=timeout,
+            trust_env=True,
+        ) as session:
+            while True:
+                self.record_health()
+                await self.collect_metrics(session)
+                logging.info("Sleeping %.1f seconds...", self.MAX_SLEEP_DURATION)
+                await asyncio.sleep(self.MAX_SLEEP_DURATION)
 
     async def fetch_data_model(self, session: aiohttp.ClientSession) -> JSON:
         """Fetch the data model."""
@@ -111,35 +120,90 @@ class Collector:
             await asyncio.sleep(self.MAX_SLEEP_DURATION)
 
     async def collect_metrics(self, session: aiohttp.ClientSession) -> None:
-        """Collect measurements for metrics, prioritizing edited metrics."""
+        """Update the metric queue and start collecting the metrics that are due, prioritizing edited metrics.
+
+        Collecting a metric happens in a separate task. When a task is done, the next metric that is due is started, so
+        this method doesn't wait for the metrics to be collected.
+        """
+        await self.post_measurements(session)
         metrics = await get(session, URL(f"{self.server_url}/internal-api/{self.API_VERSION}/metrics"))
-        next_fetch = datetime.now() + timedelta(seconds=self.MEASUREMENT_FREQUENCY)
-        tasks: list[Coroutine] = []
-        for metric_uuid, metric in self.__sorted_by_edit_status(metrics):
-            if len(tasks) >= self.MEASUREMENT_LIMIT:
-                break
-            if self.__can_and_should_collect(metric_uuid, metric):
-                tasks.append(self.collect_metric(session, metric_uuid, metric, next_fetch))
-        await asyncio.gather(*tasks)
+        if metrics is not None:  # Keep the current schedule if getting the metrics fails
+            self.__update_queue(metrics)
+        self.__start_collection_tasks(session)
+        self.__log_queue_statistics()
 
     async def collect_metric(self, session: aiohttp.ClientSession, metric_uuid, metric, next_fetch: datetime) -> None:
-        """Collect measurements for the metric and post it to the server."""
+        """Collect measurements for the metric and post them to the server when the batch is full.
+
+        If no other metrics are being measured, post the measurements right away.
+        """
         self.__previous_metrics[metric_uuid] = metric
         self.next_fetch[metric_uuid] = next_fetch
         metric_collector_class = MetricCollector.get_subclass(metric["type"])
         metric_collector = metric_collector_class(session, metric, self.data_model)
         if measurement := await metric_collector.collect():
             measurement.metric_uuid = metric_uuid
-            api_url = URL(f"{self.server_url}/internal-api/{self.API_VERSION}/measurements")
-            await post(session, api_url, measurement.as_dict())
-
-    def __sorted_by_edit_status(self, metrics: dict[str, Any]) -> list[tuple[str, Any]]:
-        """First return the edited metrics, then the rest."""
-        return sorted(metrics.items(), key=lambda item: bool(self.__previous_metrics.get(item[0]) == item[1]))
-
-    def __can_and_should_collect(self, metric_uuid: str, metric) -> bool:
-        """Return whether the metric can and needs to be measured."""
-        return self.__should_collect(metric_uuid, metric) if self.__can_collect(metric) else False
+            self.__measurements.append(measurement.as_dict())
+        others_running = self.__scheduler.is_collecting_other_metrics(metric_uuid)
+        if len(self.__measurements) >= self.MEASUREMENT_BATCH_SIZE or not others_running:
+            await self.post_measurements(session)
+
+    async def post_measurements(self, session: aiohttp.ClientSession) -> None:
+        """Post the measurements waiting to be posted to the server, if any, in one batch."""
+        if measurements := self.__measurements:
+            self.__measurements = []
+            api_url = URL(f"{self.server_url}/internal-api/{self.API_VERSION}/measurements/batch")
+            await post(session, api_url, dict(measurements=measurements))
+
+    def __update_queue(self, metrics: dict[str, Any]) -> None:
+        """Update the queue with the current metrics. Edited metrics are scheduled to be measured immediately."""
+        self.__metrics = metrics
+        self.__scheduler.unschedule_all_except(metrics)  # Don't collect deleted metrics
+        for metric_uuid, metric in metrics.items():
+            if not self.__scheduler.is_collecting(metric_uuid):  # Metrics being collected are rescheduled when done
+                edited = self.__previous_metrics.get(metric_uuid) != metric
+                due = datetime.min if edited else self.next_fetch.get(metric_uuid, datetime.min)
+                self.__scheduler.schedule(metric_uuid, due)
+
+    def __next_due_metric(self, now: datetime) -> Optional[str]:
+        """Remove the first metric that is due and can be collected from the queue and return its uuid, if any."""
+        while metric_uuid := self.__scheduler.pop_due(now):
+            if self.__can_collect(self.__metrics[metric_uuid]):
+                return metric_uuid
+        return None
+
+    def __start_collection_tasks(self, session: aiohttp.ClientSession) -> None:
+        """Start collection tasks for the metrics that are due, until the maximum number of tasks is running."""
+        now = datetime.now()
+        next_fetch = now + timedelta(seconds=self.MEASUREMENT_FREQUENCY)
+        while self.__scheduler.nr_tasks() < self.MEASUREMENT_LIMIT and (metric_uuid := self.__next_due_metric(now)):
+            metric = self.__metrics[metric_uuid]
+            task = asyncio.create_task(self.collect_metric(session, metric_uuid, metric, next_fetch))
+            task.add_done_callback(partial(self.__collection_task_done, session, metric_uuid))
+            self.__scheduler.add_task(metric_uuid, task)
+
+    def __collection_task_done(self, session: aiohttp.ClientSession, metric_uuid: str, task: asyncio.Task) -> None:
+        """Reschedule the collected metric and start collecting the next metric that is due."""
+        self.__scheduler.remove_task(metric_uuid)
+        if not task.cancelled() and (exception := task.exception()):
+            logging.error("Collecting metric %s failed: %s", metric_uuid, exception)
+        if metric_uuid in self.__metrics:
+            self.__scheduler.schedule(metric_uuid, self.next_fetch.get(metric_uuid, datetime.min))
+        self.__start_collection_tasks(session)
+
+    def __log_queue_statistics(self) -> None:
+        """Log the number of metrics that are due, the number of metrics being collected, and the maximum lag."""
+        now = datetime.now()
+        due = self.__scheduler.due(now)
+        overdue = [due for due in due if due > datetime.min]  # Edited metrics are due at datetime.min, ignore them
+        lag = (now - min(overdue)).total_seconds() if overdue else 0.0
+        logging.info(
+            "Metric queue: %d metrics queued, %d metrics due, %d metrics being collected, lag %.1f seconds",
+            self.__scheduler.nr_scheduled(),
+            len(due),
+            self.__scheduler.nr_tasks(),
+            lag,
+        )
 
     def __can_collect(self, metric) -> bool:
         """Return whether the user has specified all mandatory parameters for all sources."""
@@ -155,12 +219,3 @@ class Collector:
                 ):
                     return False
         return bool(sources)
-
-    def __should_collect(self, metric_uuid: str, metric) -> bool:
-        """Return whether the metric should be collected.
-
-        Metric should be collected when the user changes the configuration or when it has been collected too long ago.
-        """
-        metric_edited = self.__previous_metrics.get(metric_uuid) != metric
-        metric_due = self.next_fetch.get(metric_uuid, datetime.min) <= datetime.now()
-        return metric_edited or metric_due
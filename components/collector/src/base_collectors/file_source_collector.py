@@ -1,19 +1,24 @@
 """File source collector base classes."""
 
 import asyncio
+import copy
 import io
 import itertools
 import json
 import zipfile
 from abc import ABC
+from collections import OrderedDict
 from http import HTTPStatus
-from typing import cast
+from typing import Optional, cast
 from urllib.parse import urlparse
 
+import aiohttp
+
+from collector_utilities.functions import run_in_parse_executor
 from collector_utilities.type import JSON, URL, Response, Responses
-from model import SourceResponses
+from model import SourceMeasurement, SourceResponses
 
-from .source_collector import SourceCollector
+from .source_collector import SourceCollector, SourceUpToDatenessCollector
 
 
 class FakeResponse:
@@ -28,7 +33,11 @@ class FakeResponse:
 
     async def json(self, content_type=None) -> JSON:  # pylint: disable=unused-argument
         """Return the JSON version of the contents."""
-        return cast(JSON, json.loads(self.contents))
+        return cast(JSON, await run_in_parse_executor(json.loads, self.contents))
+
+    async def read(self) -> bytes:
+        """Return the contents."""
+        return self.contents
 
     async def text(self) -> str:
         """Return the text version of the contents."""
@@ -39,15 +48,84 @@ class FileSourceCollector(SourceCollector, ABC):  # pylint: disable=abstract-met
     """Base class for source collectors that retrieve files."""
 
     file_extensions: list[str] = []  # Subclass responsibility
+    # Validators (ETag and Last-Modified headers) and measurements of retrieved files, shared by all file source
+    # collectors so that files can be retrieved conditionally and unmodified files don't need to be parsed again. Maps
+    # the collector class and source parameters to (conditional request headers, measurement) tuples. The least
+    # recently used measurements are removed when the maximum is reached, so measurements of files that are no longer
+    # collected don't linger:
+    previous_measurements: "OrderedDict[str, tuple[dict[str, str], SourceMeasurement]]" = OrderedDict()
+    MAX_PREVIOUS_MEASUREMENTS = 1000
+
+    def __init__(self, session: aiohttp.ClientSession, source, data_model) -> None:
+        super().__init__(session, source, data_model)
+        parameters = json.dumps(source.get("parameters", {}), sort_keys=True)
+        self.__previous_measurement_key = f"{self.__class__.__name__}:{parameters}"
+        self.__conditional_request_headers: dict[str, str] = {}
+
+    async def collect(self) -> SourceMeasurement:
+        """Extend to remember the measurement so it can be reused as long as the file is not modified."""
+        measurement = await super().collect()
+        if self.__conditional_request_headers and not measurement.has_error():
+            previous_measurement = copy.copy(measurement)
+            previous_measurement.entities = measurement.entities[: measurement.MAX_ENTITIES]
+            self.__remember_previous_measurement(previous_measurement)
+        return measurement
+
+    def __remember_previous_measurement(self, measurement: SourceMeasurement) -> None:
+        """Remember the measurement, forgetting the least recently used measurements if there are too many."""
+        self.previous_measurements[self.__previous_measurement_key] = (self.__conditional_request_headers, measurement)
+        self.previous_measurements.move_to_end(self.__previous_measurement_key)
+        while len(self.previous_measurements) > self.MAX_PREVIOUS_MEASUREMENTS:
+            self.previous_measurements.popitem(last=False)
 
     async def _get_source_responses(self, *urls: URL, **kwargs) -> SourceResponses:
-        """Extend to unzip any zipped responses."""
-        responses = await super()._get_source_responses(*urls)
+        """Extend to make a conditional request if the file was retrieved before, and to unzip any zipped responses."""
+        if self.__can_reuse_previous_measurement(*urls) and (
+            previous := self.previous_measurements.get(self.__previous_measurement_key)
+        ):
+            kwargs["headers"] = previous[0]
+        responses = await super()._get_source_responses(*urls, **kwargs)
+        if self.__not_modified(responses):
+            return responses
+        if self.__can_reuse_previous_measurement(*urls):
+            self.__conditional_request_headers = self.__conditional_request_headers_for(responses[0])
         if urlparse(str(urls[0])).path.endswith(".zip"):
             unzipped_responses = await asyncio.gather(*[self.__unzip(response) for response in responses])
             responses[:] = list(itertools.chain(*unzipped_responses))
         return responses
 
+    def _unmodified_measurement(self, responses: SourceResponses) -> Optional[SourceMeasurement]:
+        """Override to return (a copy of) the previous measurement if the file has not been modified."""
+        if self.__not_modified(responses) and (
+            previous := self.previous_measurements.get(self.__previous_measurement_key)
+        ):
+            self.previous_measurements.move_to_end(self.__previous_measurement_key)
+            return copy.copy(previous[1])
+        return None
+
+    def __can_reuse_previous_measurement(self, *urls: URL) -> bool:
+        """Return whether the measurement can be reused if the file has not been modified.
+
+        Measurements of multiple files are not reused because the files may not all have been modified. Source
+        up-to-dateness measurements are not reused because they depend on the current date.
+        """
+        return len(urls) == 1 and not isinstance(self, SourceUpToDatenessCollector)
+
+    @staticmethod
+    def __not_modified(responses: SourceResponses) -> bool:
+        """Return whether the responses show that the file has not been modified since it was last retrieved."""
+        return len(responses) == 1 and responses[0].status == HTTPStatus.NOT_MODIFIED
+
+    @staticmethod
+    def __conditional_request_headers_for(response: Response) -> dict[str, str]:
+        """Return the headers for a conditional request, based on the validators of the response, if any."""
+        headers = {}
+        if etag := response.headers.get("ETag"):
+            headers["If-None-Match"] = etag
+        if last_modified := response.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
     def _headers(self) -> dict[str, str]:
         """Extend to add a private token to the headers, if present in the parameters."""
         headers = super()._headers()
@@ -60,12 +138,17 @@ class FileSourceCollector(SourceCollector, ABC):  # pylint: disable=abstract-met
     @classmethod
     async def __unzip(cls, response: Response) -> Responses:
         """Unzip the response content and return a (new) response for each applicable file in the zip archive."""
-        with zipfile.ZipFile(io.BytesIO(await response.read())) as response_zipfile:
-            names = [name for name in response_zipfile.namelist() if name.split(".")[-1].lower() in cls.file_extensions]
-            if not names:
-                raise LookupError(f"Zipfile contains no files with extension {' or '.join(cls.file_extensions)}")
-            responses = [FakeResponse(response_zipfile.read(name), name) for name in names]
-        return cast(Responses, responses)
+        files = await cls._run_in_executor(unzip, await response.read(), cls.file_extensions)
+        return cast(Responses, [FakeResponse(contents, name) for name, contents in files])
+
+
+def unzip(contents: bytes, file_extensions: list[str]) -> list[tuple[str, bytes]]:
+    """Return the names and contents of the files in the zip archive that have one of the file extensions."""
+    with zipfile.ZipFile(io.BytesIO(contents)) as zip_file:
+        names = [name for name in zip_file.namelist() if name.split(".")[-1].lower() in file_extensions]
+        if not names:
+            raise LookupError(f"Zipfile contains no files with extension {' or '.join(file_extensions)}")
+        return [(name, zip_file.read(name)) for name in names]
 
 
 class CSVFileSourceCollector(FileSourceCollector, ABC):  # pylint: disable=abstract-method
@@ -0,0 +1,68 @@
+"""Metric scheduler."""
+
+import asyncio
+import heapq
+from datetime import datetime
+from typing import Optional
+
+
+class MetricScheduler:
+    """Keep track of when metrics are due to be collected and of the metrics being collected.
+
+    The queue is a heap of (due date time, metric uuid) tuples. Rescheduling a metric pushes a new tuple on the heap;
+    the scheduled dict has the current due date time of each queued metric so outdated tuples can be skipped.
+    """
+
+    def __init__(self) -> None:
+        self.__queue: list[tuple[datetime, str]] = []
+        self.__scheduled: dict[str, datetime] = {}
+        self.__tasks: dict[str, asyncio.Task] = {}
+
+    def schedule(self, metric_uuid: str, due: datetime) -> None:
+        """Schedule the metric to be collected at the due date and time."""
+        if self.__scheduled.get(metric_uuid) != due:
+            self.__scheduled[metric_uuid] = due
+            heapq.heappush(self.__queue, (due, metric_uuid))
+
+    def unschedule_all_except(self, metric_uuids) -> None:
+        """Unschedule the metrics not in the metric uuids. The queue entries will be skipped when popped."""
+        for metric_uuid in set(self.__scheduled) - set(metric_uuids):
+            del self.__scheduled[metric_uuid]
+
+    def pop_due(self, now: datetime) -> Optional[str]:
+        """Remove the first metric that is due from the queue and return its uuid, if any."""
+        while self.__queue and self.__queue[0][0] <= now:
+            due, metric_uuid = heapq.heappop(self.__queue)
+            if self.__scheduled.get(metric_uuid) == due:
+                del self.__scheduled[metric_uuid]
+                return metric_uuid
+            # Otherwise, the metric was rescheduled or unscheduled after this entry was pushed on the heap
+        return None
+
+    def due(self, now: datetime) -> list[datetime]:
+        """Return the due date times of the scheduled metrics that are due."""
+        return [due for due in self.__scheduled.values() if due <= now]
+
+    def nr_scheduled(self) -> int:
+        """Return the number of scheduled metrics."""
+        return len(self.__scheduled)
+
+    def add_task(self, metric_uuid: str, task: asyncio.Task) -> None:
+        """Add the task that collects the metric."""
+        self.__tasks[metric_uuid] = task
+
+    def remove_task(self, metric_uuid: str) -> None:
+        """Remove the task that collected the metric."""
+        del self.__tasks[metric_uuid]
+
+    def is_collecting(self, metric_uuid: str) -> bool:
+        """Return whether the metric is being collected."""
+        return metric_uuid in self.__tasks
+
+    def is_collecting_other_metrics(self, metric_uuid: str) -> bool:
+        """Return whether metrics other than the metric are being collected."""
+        return any(not task.done() for uuid, task in self.__tasks.items() if uuid != metric_uuid)
+
+    def nr_tasks(self) -> int:
+        """Return the number of metrics being collected."""
+        return len(self.__tasks)
@@ -2,17 +2,18 @@
 
 import asyncio
 import logging
+import time
 import traceback
 import urllib
 from abc import ABC, abstractmethod
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
 from datetime import datetime
-from typing import Any, Final, Optional, Union, cast
+from typing import Any, Final, Hashable, Optional, Union, cast
 
 import aiohttp
 from packaging.version import Version
 
-from collector_utilities.functions import days_ago, stable_traceback, tokenless
+from collector_utilities.functions import ReturnValue, days_ago, run_in_parse_executor, stable_traceback, tokenless
 from collector_utilities.type import URL, Response, Value
 from model import Entities, Entity, SourceMeasurement, SourceResponses
 
@@ -29,8 +30,22 @@ class SourceCollector(ABC):
     """
 
     API_URL_PARAMETER_KEY = "url"
+    DEFAULT_MAX_CONNECTIONS_PER_HOST = 8  # Used if the data model doesn't specify the maximum for the source type
     source_type = ""  # The source type is set on the subclass, when the subclass is registered
     subclasses: set[type["SourceCollector"]] = set()
+    # Semaphores to limit the number of concurrent requests per host, shared by all source collectors. Maps hosts to
+    # (maximum number of connections, semaphore) tuples:
+    host_semaphores: dict[str, tuple[int, asyncio.Semaphore]] = {}
+    # In-flight and recently completed get requests, shared by all source collectors so that identical requests made
+    # for different metrics result in one request to the source. Maps request keys to (expiration time, task) tuples.
+    # Because all responses are cached equally long, the cache is ordered by expiration time:
+    response_cache: dict[Hashable, tuple[float, asyncio.Task]] = {}
+    RESPONSE_CACHE_TTL = 60  # Seconds
+    # Source collectors that parse the response bodies while they're being read, using the iterparse functions in
+    # collector_utilities.functions, can set STREAM_LARGE_RESPONSES so that bodies larger than MAX_BUFFERED_BODY_SIZE,
+    # or of unknown size, are not read into memory first. Responses with unread bodies are not shared:
+    STREAM_LARGE_RESPONSES = False
+    MAX_BUFFERED_BODY_SIZE = 1024 * 1024  # Bytes
 
     def __init__(self, session: aiohttp.ClientSession, source, data_model) -> None:
         self._session = session
@@ -125,14 +140,86 @@ class SourceCollector(ABC):
         if credentials is not None:
             kwargs["auth"] = aiohttp.BasicAuth(credentials[0], credentials[1])
         if headers := self._headers():
-            kwargs["headers"] = headers
-        tasks = [self._session.get(url, **kwargs) for url in urls if url]
+            kwargs["headers"] = headers | kwargs.get("headers", {})
+        tasks = [self.__get(url, **kwargs) for url in urls if url]
         responses = await asyncio.gather(*tasks, return_exceptions=True)
         for response in responses:
             if isinstance(response, Exception):
                 raise response
         return SourceResponses(responses=list(responses), api_url=urls[0])
 
+    async def __get(self, url: URL, **kwargs) -> Response:
+        """Get the url, sharing the response with identical requests made by other source collectors."""
+        key = self.__request_key(url, **kwargs)
+        now = time.monotonic()
+        if (cached := self.response_cache.get(key)) and cached[0] > now:
+            task = cached[1]
+        else:
+            read_large_body = not self.STREAM_LARGE_RESPONSES
+            task = asyncio.create_task(self.__get_uncached(url, read_large_body=read_large_body, **kwargs))
+            self.__cache_response(key, task, now)
+        try:
+            # Shield the task so that a cancelled request doesn't cancel the other requests waiting for the response
+            response: Response = await asyncio.shield(task)
+        except Exception:
+            if self.response_cache.get(key, (0.0, None))[1] is task:
+                del self.response_cache[key]  # Don't cache failed requests
+            raise
+        if self.STREAM_LARGE_RESPONSES and self.__is_large(response):
+            # An unread body can only be read once, so the first source collector to get the response removes it from
+            # the cache and other source collectors waiting for the same response make a new request:
+            if self.response_cache.get(key, (0.0, None))[1] is not task:
+                return await self.__get_uncached(url, read_large_body=False, **kwargs)
+            del self.response_cache[key]
+        return response
+
+    def __request_key(self, url: URL, **kwargs) -> Hashable:
+        """Return a key that identifies the request."""
+        headers = tuple(sorted(kwargs.get("headers", {}).items()))
+        # Streamed responses are not shared with source collectors that read the response body first:
+        return self._session, "GET", str(url), kwargs.get("auth"), headers, self.STREAM_LARGE_RESPONSES
+
+    @classmethod
+    def __cache_response(cls, key: Hashable, task: asyncio.Task, now: float) -> None:
+        """Add the response to the response cache and remove the expired responses, whatever their request key."""
+        cls.response_cache.pop(key, None)  # Remove the expired response, if any, so the new response is added last
+        cls.response_cache[key] = (now + cls.RESPONSE_CACHE_TTL, task)
+        while (oldest_key := next(iter(cls.response_cache))) != key and cls.response_cache[oldest_key][0] <= now:
+            del cls.response_cache[oldest_key]
+
+    async def __get_uncached(self, url: URL, read_large_body: bool = True, **kwargs) -> Response:
+        """Get the url, limiting the number of concurrent requests per host, and read the response body.
+
+        Reading the response body releases the connection to the connection pool so it can be reused by other requests.
+        It also makes it possible for multiple source collectors to share the response. Large bodies are left unread if
+        read_large_body is False, so they can be parsed while being read. Note that the connection is then still in use
+        after the host semaphore has been released.
+        """
+        async with self.__host_semaphore(url):
+            response = await self._session.get(url, **kwargs)
+            if read_large_body or not self.__is_large(response):
+                await response.read()
+        return response
+
+    @classmethod
+    def __is_large(cls, response: Response) -> bool:
+        """Return whether the response body is larger than the maximum size to buffer, or of unknown size."""
+        return response.content_length is None or response.content_length > cls.MAX_BUFFERED_BODY_SIZE
+
+    def __host_semaphore(self, url: URL) -> asyncio.Semaphore:
+        """Return the semaphore that limits the number of concurrent requests to the host of the url.
+
+        If source types with different maximums access the same host, the lowest maximum applies. When a source type
+        with a lower maximum than the current semaphore accesses the host, the semaphore is replaced. Requests holding
+        the old semaphore finish normally.
+        """
+        host = urllib.parse.urlsplit(str(url)).netloc
+        source_type = self._data_model.get("sources", {}).get(self.source_type, {})
+        max_connections = source_type.get("max_connections_per_host", self.DEFAULT_MAX_CONNECTIONS_PER_HOST)
+        if host not in self.host_semaphores or max_connections < self.host_semaphores[host][0]:
+            self.host_semaphores[host] = (max_connections, asyncio.Semaphore(max_connections))
+        return self.host_semaphores[host][1]
+
     def _basic_auth_credentials(self) -> Optional[tuple[str, str]]:
         """Return the basic authentication credentials, if any."""
         if token := cast(str, self.__parameters.get("private_token", "")):
@@ -153,6 +240,8 @@ class SourceCollector(ABC):
         """
         if responses.connection_error:
             measurement = SourceMeasurement(total=None)
+        elif unmodified_measurement := self._unmodified_measurement(responses):
+            measurement = unmodified_measurement
         else:
             try:
                 measurement = await self._parse_source_responses(responses)
@@ -160,6 +249,14 @@ class SourceCollector(ABC):
                 measurement = SourceMeasurement(parse_error=stable_traceback(traceback.format_exc()))
         return measurement
 
+    def _unmodified_measurement(self, responses: SourceResponses) -> Optional[SourceMeasurement]:
+        """Return the previous measurement if the responses show that the source has not been modified since then.
+
+        Can be overridden by source collectors that make conditional requests to prevent parsing unmodified sources.
+        """
+        # pylint: disable=no-self-use,unused-argument
+        return None
+
     async def _parse_source_responses(self, responses: SourceResponses) -> SourceMeasurement:
         """Parse the responses to get the measurement value, the total value, and the entities for the metric.
 
@@ -172,6 +269,15 @@ class SourceCollector(ABC):
             value=await self._parse_value(responses),
         )
 
+    @classmethod
+    async def _run_in_executor(cls, function: Callable[..., ReturnValue], *args) -> ReturnValue:
+        """Run the CPU-heavy function, such as a parser, in the parse executor so it doesn't block the event loop.
+
+        Pass raw response bodies as bytes or str so the executor doesn't need to copy them (when using threads). With a
+        process pool, the function, arguments, and return value need to be picklable.
+        """
+        return await run_in_parse_executor(function, *args)
+
     async def _parse_entities(self, responses: SourceResponses) -> Entities:
         """Parse the entities from the responses."""
         # pylint: disable=no-self-use,unused-argument
@@ -1,25 +1,52 @@
 """Utility functions."""
 
-import contextlib
+import asyncio
+import functools
 import hashlib
+import io
+import os
 import re
-import time
 import urllib
-from collections.abc import Collection, Generator
+from collections.abc import Callable, Collection, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import cast
+from typing import TypeVar, Union, cast
 from xml.etree.ElementTree import Element  # nosec, Element is not available from defusedxml, but only used as type
 
+import aiohttp
 from defusedxml import ElementTree
 
 from .type import URL, Namespaces, Response
 
 
+ReturnValue = TypeVar("ReturnValue")
+
+
+@functools.cache
+def parse_executor() -> Executor:
+    """Return the executor for CPU-heavy parsing, so parsing doesn't block the event loop."""
+    # The executor is cached and lives as long as the collector, so it's not used as context manager:
+    # pylint: disable=consider-using-with
+    max_workers = int(os.environ.get("COLLECTOR_PARSE_WORKERS", 0)) or None  # None means the executor's default
+    if os.environ.get("COLLECTOR_PARSE_EXECUTOR", "thread") == "process":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="parser")
+
+
+async def run_in_parse_executor(function: Callable[..., ReturnValue], *args) -> ReturnValue:
+    """Run the function in the parse executor.
+
+    With a process pool, the function, arguments, and return value need to be picklable. Use module-level functions
+    and return plain data, such as strings, numbers, lists, and dicts, rather than parse trees.
+    """
+    return await asyncio.get_running_loop().run_in_executor(parse_executor(), function, *args)
+
+
 async def parse_source_response_xml(response: Response, allowed_root_tags: Collection[str] = None) -> Element:
     """Parse the XML from the source response."""
-    tree = cast(Element, ElementTree.fromstring(await response.text(), forbid_dtd=False))
-    if allowed_root_tags and tree.tag not in allowed_root_tags:
-        raise AssertionError(f'The XML root element should be one of "{allowed_root_tags}" but is "{tree.tag}"')
+    parse = functools.partial(ElementTree.fromstring, forbid_dtd=False)
+    tree = cast(Element, await run_in_parse_executor(parse, await response.text()))
+    check_xml_root_tag(tree, allowed_root_tags)
     return tree
 
 
@@ -33,6 +60,115 @@ async def parse_source_response_xml_with_namespace(
     return tree, namespaces
 
 
+async def iterparse_source_response_xml(
+    response: Response,
+    tags: Collection[str],
+    parse_element: Callable[[Element], ReturnValue],
+    allowed_root_tags: Collection[str] = None,
+) -> list[ReturnValue]:
+    """Parse the XML from the source response incrementally, in the parse executor.
+
+    Return the data that the parse function extracts from each element with one of the tags. Elements are passed to the
+    parse function as soon as they are complete. Afterwards, they are removed from the tree to limit memory use. This
+    means that the ancestors of the elements are incomplete.
+    """
+    return await parse_xml_elements_from_response(response, tags, parse_element, allowed_root_tags)
+
+
+async def iterparse_source_response_xml_with_namespace(
+    response: Response,
+    tags: Collection[str],
+    parse_element: Callable[[Element, Namespaces], ReturnValue],
+    allowed_root_tags: Collection[str] = None,
+) -> list[ReturnValue]:
+    """Parse the XML with namespace from the source response incrementally, in the parse executor.
+
+    The tags should not include the namespace; elements with the tags in the namespace of the root element are parsed.
+    """
+    return await parse_xml_elements_from_response(response, tags, parse_element, allowed_root_tags, True)
+
+
+async def parse_xml_elements_from_response(response: Response, *args) -> list:
+    """Parse the XML elements from the response body, see parse_xml_elements() for the arguments.
+
+    If the body has not been read yet because it's large (see SourceCollector.STREAM_LARGE_RESPONSES), the body is
+    parsed while it's being read, so only the incomplete elements are kept in memory. The stream can't be passed to
+    another process, so the parser then runs in a thread that reads the body in chunks via the event loop.
+    """
+    if isinstance(response, aiohttp.ClientResponse) and not response.content.at_eof():
+        loop = asyncio.get_running_loop()
+        executor = parse_executor()
+        thread_executor = executor if isinstance(executor, ThreadPoolExecutor) else None  # None: the default executor
+        try:
+            stream = BlockingStreamReader(response.content, loop)
+            return await loop.run_in_executor(thread_executor, parse_xml_elements, stream, *args)
+        finally:
+            response.close()  # Close rather than release the connection; the body may not have been read entirely
+    return await run_in_parse_executor(parse_xml_elements, await response.read(), *args)
+
+
+class BlockingStreamReader:  # pylint: disable=too-few-public-methods
+    """File-like wrapper for an asyncio stream, to read the stream from a thread other than the event loop thread."""
+
+    def __init__(self, stream: aiohttp.StreamReader, loop: asyncio.AbstractEventLoop) -> None:
+        self.__stream = stream
+        self.__loop = loop
+
+    def read(self, size: int = -1) -> bytes:
+        """Read at most size bytes from the stream, blocking until they're available or the stream ends."""
+        return asyncio.run_coroutine_threadsafe(self.__stream.read(size), self.__loop).result()
+
+
+def parse_xml_elements(
+    contents: Union[bytes, BlockingStreamReader],
+    tags: Collection[str],
+    parse_element: Callable[..., ReturnValue],
+    allowed_root_tags: Collection[str] = None,
+    with_namespace: bool = False,
+) -> list[ReturnValue]:
+    """Parse the XML contents incrementally and return the data the parse function extracts from the elements."""
+    elements = iterparse_xml(contents, tags, allowed_root_tags, with_namespace)
+    if with_namespace:
+        return [parse_element(element, namespaces) for element, namespaces in elements]
+    return [parse_element(element) for element, _ in elements]
+
+
+def iterparse_xml(
+    contents: Union[bytes, BlockingStreamReader],
+    tags: Collection[str],
+    allowed_root_tags: Collection[str] = None,
+    with_namespace: bool = False,
+) -> Iterator[tuple[Element, Namespaces]]:
+    """Parse the XML contents incrementally, with the same protections as parse_source_response_xml().
+
+    The parser reads the contents in chunks, so the contents are not copied or decoded as a whole.
+    """
+    source = io.BytesIO(contents) if isinstance(contents, bytes) else contents
+    events = ElementTree.iterparse(source, events=("start", "end"), forbid_dtd=False)
+    if (start_of_root := next(events, None)) is None:
+        return
+    root = cast(Element, start_of_root[1])
+    check_xml_root_tag(root, allowed_root_tags)
+    namespaces = dict(ns=root.tag.split("}")[0][1:]) if with_namespace else {}
+    qualified_tags = {f"{{{namespaces['ns']}}}{tag}" for tag in tags} if with_namespace else set(tags)
+    ancestors = [root]
+    for event, element in events:
+        if event == "start":
+            ancestors.append(element)
+            continue
+        ancestors.pop()
+        if element.tag in qualified_tags:
+            yield element, namespaces
+            if ancestors:
+                ancestors[-1].remove(element)
+
+
+def check_xml_root_tag(root: Element, allowed_root_tags: Collection[str] = None) -> None:
+    """Check that the root element has one of the allowed tags, if specified."""
+    if allowed_root_tags and root.tag not in allowed_root_tags:
+        raise AssertionError(f'The XML root element should be one of "{allowed_root_tags}" but is "{root.tag}"')
+
+
 Substitution = tuple[re.Pattern[str], str]
 MEMORY_ADDRESS_SUB: Substitution = (re.compile(r" at 0x[0-9abcdef]+>"), ">")
 TOKEN_SUB: Substitution = (re.compile(r"token=[^&]+"), "token=<redacted>")
@@ -91,23 +227,3 @@ def match_string_or_regular_expression(string: str, strings_and_or_regular_expre
             if string_or_regular_expression == string:
                 return True
     return False
-
-
-class Clock:  # pylint: disable=too-few-public-methods
-    """Class to keep track of time."""
-
-    def __init__(self) -> None:
-        self.start = time.perf_counter()
-        self.duration = 0.0
-
-    def stop(self) -> None:
-        """Stop the clock."""
-        self.duration = time.perf_counter() - self.start
-
-
-@contextlib.contextmanager
-def timer() -> Generator[Clock, None, None]:
-    """Timer context manager."""
-    clock = Clock()
-    yield clock
-    clock.stop()
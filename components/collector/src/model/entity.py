@@ -1,6 +1,7 @@
 """Measurement entity model class."""
 
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
+from typing import Optional
 
 
 class Entity(dict):
@@ -18,27 +19,54 @@ class Entity(dict):
 
 
 class Entities(list[Entity]):
-    """Class to hold a list of unique entities."""
+    """Class to hold a list of unique entities.
 
-    def __init__(self, entities: Iterable[Entity] = ()):
+    If a maximum number of entities is given, entities beyond the maximum are counted, but not kept. Collectors that
+    parse many entities can use this to prevent creating entities that won't be sent to the server anyway.
+    """
+
+    def __init__(self, entities: Iterable[Entity] = (), max_entities: Optional[int] = None):
         """Extend to filter duplicate entities."""
         super().__init__()
-        self.__keys: set[str] = set()  # Keep track of the keys in a set to make adding entities faster
+        self._keys: set[str] = set()  # Keep track of the keys in a set to make adding entities faster
+        self.__max_entities = max_entities
         self.extend(entities)
 
     def __add__(self, other) -> "Entities":
-        """Return the concatenation of the entities."""
-        return self.__class__(super().__add__(other))
+        """Return the concatenation of the entities, including the entities not kept because of the maximum."""
+        entities = self.__class__(super().__add__(other))
+        entities._keys |= self._keys
+        if isinstance(other, Entities):
+            entities._keys |= other._keys
+        return entities
 
     def __getitem__(self, item):
         """Override to return an Entities slice or an Entity."""
         return self.__class__(super().__getitem__(item)) if isinstance(item, slice) else super().__getitem__(item)
 
+    @property
+    def nr_entities(self) -> int:
+        """Return the number of unique entities, including the entities not kept because of the maximum."""
+        return len(self._keys)
+
+    @property
+    def full(self) -> bool:
+        """Return whether the maximum number of entities has been reached."""
+        return self.__max_entities is not None and len(self) >= self.__max_entities
+
+    def add(self, key: str, create_entity: Callable[[], Entity]) -> None:
+        """Add the entity created by the callable, unless an entity with the same key was added before.
+
+        If the maximum number of entities has been reached, the entity is counted, but not created.
+        """
+        if (key := Entity.safe_entity_key(key)) not in self._keys:
+            self._keys.add(key)
+            if not self.full:
+                super().append(create_entity())
+
     def append(self, entity: Entity) -> None:
         """Extend to only append the entity if it's not already in the list."""
-        if (key := entity["key"]) not in self.__keys:
-            self.__keys.add(key)
-            super().append(entity)
+        self.add(entity["key"], lambda: entity)
 
     def extend(self, entities: Iterable[Entity]) -> None:
         """Extend to only add entities that aren't already in the list."""
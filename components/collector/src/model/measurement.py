@@ -1,7 +1,9 @@
 """Measurement model classes."""
 
+import json
 from typing import Optional, Sequence
 
+from collector_utilities.functions import md5_hash
 from collector_utilities.type import ErrorMessage, Value, URL
 
 from .entity import Entities
@@ -15,7 +17,7 @@ class SourceMeasurement:  # pylint: disable=too-few-public-methods,too-many-inst
     def __init__(
         self, *, value: Value = None, total: Value = "100", entities: Entities = None, parse_error: ErrorMessage = None
     ) -> None:
-        self.value = str(len(entities)) if value is None and entities is not None else value
+        self.value = str(entities.nr_entities) if value is None and entities is not None else value
         self.total = total
         self.entities = Entities() if entities is None else entities
         self.parse_error = parse_error
@@ -29,8 +31,12 @@ class SourceMeasurement:  # pylint: disable=too-few-public-methods,too-many-inst
         return bool(self.connection_error or self.parse_error)
 
     def as_dict(self):
-        """Return the source measurement as dict."""
-        return dict(
+        """Return the source measurement as dict, including a hash of its contents.
+
+        The server compares the content hashes to decide whether the measurement is unchanged, so it doesn't need to
+        compare the entities.
+        """
+        measurement = dict(
             value=self.value,
             total=self.total,
             entities=self.entities[: self.MAX_ENTITIES],
@@ -40,6 +46,8 @@ class SourceMeasurement:  # pylint: disable=too-few-public-methods,too-many-inst
             landing_url=self.landing_url,
             source_uuid=self.source_uuid,
         )
+        measurement["content_hash"] = md5_hash(json.dumps(measurement, sort_keys=True))
+        return measurement
 
 
 class MetricMeasurement:  # pylint: disable=too-few-public-methods
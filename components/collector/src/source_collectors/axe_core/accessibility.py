@@ -1,11 +1,12 @@
 """Axe-core accessibility analysis collectors."""
 
 from collections.abc import Collection
+from functools import partial
 from typing import Any
 
 from base_collectors import JSONFileSourceCollector
 from collector_utilities.functions import md5_hash, match_string_or_regular_expression
-from model import Entities, Entity, SourceResponses
+from model import Entities, Entity, SourceMeasurement, SourceResponses
 
 
 class AxeCoreAccessibility(JSONFileSourceCollector):
@@ -23,7 +24,11 @@ class AxeCoreAccessibility(JSONFileSourceCollector):
                 violations = {result_type: json.get(result_type) for result_type in self._parameter("result_types")}
                 url = json.get("url", "")
             entity_attributes.extend(self.__parse_violations(violations, url))
-        return Entities(Entity(key=self.__create_key(attributes), **attributes) for attributes in entity_attributes)
+        entities = Entities(max_entities=SourceMeasurement.MAX_ENTITIES)
+        for attributes in entity_attributes:
+            key = self.__create_key(attributes)
+            entities.add(key, partial(Entity, key, **attributes))
+        return entities
 
     def __parse_violations(self, violations: dict[str, list[dict[str, list]]], url: str) -> list[dict[str, Any]]:
         """Parse the violations."""
@@ -2,6 +2,7 @@
 
 from abc import ABC
 from collections.abc import Sequence
+from functools import partial
 from typing import Optional
 
 from dateutil.parser import parse
@@ -9,7 +10,7 @@ from dateutil.parser import parse
 from base_collectors import SourceCollector
 from collector_utilities.functions import match_string_or_regular_expression
 from collector_utilities.type import URL, Job
-from model import Entities, Entity, SourceResponses
+from model import Entities, Entity, SourceMeasurement, SourceResponses
 
 
 class GitLabBase(SourceCollector, ABC):  # pylint: disable=abstract-method
@@ -65,19 +66,22 @@ class GitLabJobsBase(GitLabProjectBase):
 
     async def _parse_entities(self, responses: SourceResponses) -> Entities:
         """Override to parse the jobs from the responses."""
-        return Entities(
-            [
-                Entity(
-                    key=job["id"],
-                    name=job["name"],
-                    url=job["web_url"],
-                    build_status=job["status"],
-                    branch=job["ref"],
-                    stage=job["stage"],
-                    build_date=str(parse(job.get("finished_at") or job["created_at"]).date()),
-                )
-                for job in await self.__jobs(responses)
-            ]
+        entities = Entities(max_entities=SourceMeasurement.MAX_ENTITIES)
+        for job in await self.__jobs(responses):
+            entities.add(job["id"], partial(self.__entity, job))
+        return entities
+
+    @staticmethod
+    def __entity(job: Job) -> Entity:
+        """Transform a job into a job entity."""
+        return Entity(
+            key=job["id"],
+            name=job["name"],
+            url=job["web_url"],
+            build_status=job["status"],
+            branch=job["ref"],
+            stage=job["stage"],
+            build_date=str(parse(job.get("finished_at") or job["created_at"]).date()),
         )
 
     async def __jobs(self, responses: SourceResponses) -> Sequence[Job]:
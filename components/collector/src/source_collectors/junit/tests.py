@@ -1,36 +1,40 @@
 """JUnit tests collector."""
 
+from functools import partial
 from typing import cast
+from xml.etree.ElementTree import Element  # nosec, Element is not available from defusedxml, but only used as type
 
 from base_collectors import XMLFileSourceCollector
-from collector_utilities.functions import parse_source_response_xml
+from collector_utilities.functions import iterparse_source_response_xml
 from model import Entities, Entity, SourceMeasurement, SourceResponses
 
 
 class JUnitTests(XMLFileSourceCollector):
     """Collector for JUnit tests."""
 
+    STREAM_LARGE_RESPONSES = True
+
     async def _parse_source_responses(self, responses: SourceResponses) -> SourceMeasurement:
         """Override to parse the tests from the JUnit XML."""
-        entities = Entities()
+        entities = Entities(max_entities=SourceMeasurement.MAX_ENTITIES)
         test_statuses_to_count = cast(list[str], self._parameter("test_result"))
-        junit_status_nodes = dict(errored="error", failed="failure", skipped="skipped")
         total = 0
         for response in responses:
-            tree = await parse_source_response_xml(response)
-            for test_case in tree.findall(".//testcase"):
-                for test_result, junit_status_node in junit_status_nodes.items():
-                    if test_case.find(junit_status_node) is not None:
-                        break
-                else:
-                    test_result = "passed"
+            for name, class_name, test_result in await iterparse_source_response_xml(
+                response, ["testcase"], parse_test_case
+            ):
                 if test_result in test_statuses_to_count:
-                    entities.append(self.__entity(test_case, test_result))
+                    entities.add(name, partial(Entity, name, name=name, class_name=class_name, test_result=test_result))
                 total += 1
         return SourceMeasurement(entities=entities, total=str(total))
 
-    @staticmethod
-    def __entity(case_node, case_result: str) -> Entity:
-        """Transform a test case into a test case entity."""
-        name = case_node.get("name", "<nameless test case>")
-        return Entity(key=name, name=name, class_name=case_node.get("classname", ""), test_result=case_result)
+
+def parse_test_case(test_case: Element) -> tuple[str, str, str]:
+    """Return the name, class name, and test result of the test case."""
+    junit_status_nodes = dict(errored="error", failed="failure", skipped="skipped")
+    for test_result, junit_status_node in junit_status_nodes.items():
+        if test_case.find(junit_status_node) is not None:
+            break
+    else:
+        test_result = "passed"
+    return test_case.get("name", "<nameless test case>"), test_case.get("classname", ""), test_result
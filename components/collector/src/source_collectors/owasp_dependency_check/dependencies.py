@@ -1,44 +1,63 @@
 """OWASP Dependency Check dependencies collector."""
 
+from typing import Any
 from xml.etree.ElementTree import Element  # nosec, Element is not available from defusedxml, but only used as type
 
-from collector_utilities.functions import parse_source_response_xml_with_namespace, sha1_hash
+from collector_utilities.functions import iterparse_source_response_xml_with_namespace, sha1_hash
 from collector_utilities.type import Namespaces
 from model import Entities, Entity, SourceResponses
 
 from .base import OWASPDependencyCheckBase
 
 
+Dependency = dict[str, Any]
+
+
 class OWASPDependencyCheckDependencies(OWASPDependencyCheckBase):
     """Collector to get the dependencies from the OWASP Dependency Check XML report."""
 
+    STREAM_LARGE_RESPONSES = True
+
     async def _parse_entities(self, responses: SourceResponses) -> Entities:
         """Override to parse the dependencies from the XML."""
         landing_url = await self._landing_url(responses)
         entities = Entities()
         for response in responses:
-            tree, namespaces = await parse_source_response_xml_with_namespace(response, self.allowed_root_tags)
-            entities.extend(
-                [
-                    self._parse_entity(dependency, index, namespaces, landing_url)
-                    for (index, dependency) in enumerate(self._dependencies(tree, namespaces))
-                ]
-            )
+            dependency_index = 0
+            for dependency in await iterparse_source_response_xml_with_namespace(
+                response, ["dependency"], parse_dependency, self.allowed_root_tags
+            ):
+                if self._include_dependency(dependency):
+                    entities.append(self._parse_entity(dependency, dependency_index, landing_url))
+                    dependency_index += 1
         return entities
 
-    def _dependencies(self, tree: Element, namespaces: Namespaces) -> list[Element]:  # pylint: disable=no-self-use
-        """Return the dependencies."""
-        return tree.findall(".//ns:dependency", namespaces)
+    def _include_dependency(self, dependency: Dependency) -> bool:
+        """Return whether to include the dependency."""
+        # pylint: disable=no-self-use,unused-argument
+        return True
 
     def _parse_entity(  # pylint: disable=no-self-use
-        self, dependency: Element, dependency_index: int, namespaces: Namespaces, landing_url: str
+        self, dependency: Dependency, dependency_index: int, landing_url: str
     ) -> Entity:
         """Parse the entity from the dependency."""
-        file_path = dependency.findtext("ns:filePath", default="", namespaces=namespaces)
-        file_name = dependency.findtext("ns:fileName", default="", namespaces=namespaces)
-        sha1 = dependency.findtext("ns:sha1", namespaces=namespaces)
+        file_path, file_name, sha1 = dependency["file_path"], dependency["file_name"], dependency["sha1"]
         # We can only generate an entity landing url if a sha1 is present in the XML, but unfortunately not all
         # dependencies have one, so check for it:
         entity_landing_url = f"{landing_url}#l{dependency_index + 1}_{sha1}" if sha1 else ""
         key = sha1 if sha1 else sha1_hash(file_path + file_name)
         return Entity(key=key, file_path=file_path, file_name=file_name, url=entity_landing_url)
+
+
+def parse_dependency(dependency: Element, namespaces: Namespaces) -> Dependency:
+    """Return the file path, file name, sha1, and the severities of the vulnerabilities of the dependency."""
+    vulnerabilities = dependency.findall(".//ns:vulnerabilities/ns:vulnerability", namespaces)
+    return dict(
+        file_path=dependency.findtext("ns:filePath", default="", namespaces=namespaces),
+        file_name=dependency.findtext("ns:fileName", default="", namespaces=namespaces),
+        sha1=dependency.findtext("ns:sha1", default="", namespaces=namespaces),
+        severities=[
+            vulnerability.findtext(".//ns:severity", default="", namespaces=namespaces).lower()
+            for vulnerability in vulnerabilities
+        ],
+    )
@@ -1,22 +1,40 @@
 """Performancetest-runner base classes."""
 
 from abc import ABC
+from collections.abc import Callable
+from typing import cast
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 
 from base_collectors import HTMLFileSourceCollector
+from collector_utilities.functions import ReturnValue
 from collector_utilities.type import Response
 
 
 class PerformanceTestRunnerBaseClass(HTMLFileSourceCollector, ABC):  # pylint: disable=abstract-method
     """Base class for performance test runner collectors."""
 
-    @staticmethod
-    async def _soup(response: Response):
-        """Return the HTML soup."""
-        return BeautifulSoup(await response.text(), "html.parser")
+    @classmethod
+    async def _parse_html(cls, response: Response, parse_soup: Callable[..., ReturnValue], *args) -> ReturnValue:
+        """Parse the HTML in the parse executor and return the data that the parse function extracts from the soup."""
+        return await cls._run_in_executor(parse_html, await response.text(), parse_soup, *args)
 
-    @staticmethod
-    def _name(transaction) -> str:
-        """Return the name of the transaction."""
-        return str(transaction.find("td", class_="name").string)
+    @classmethod
+    async def _text(cls, response: Response, element_id: str) -> str:
+        """Return the text of the element with the id."""
+        return await cls._parse_html(response, text, element_id)
+
+
+def parse_html(html: str, parse_soup: Callable[..., ReturnValue], *args) -> ReturnValue:
+    """Parse the HTML and return the data that the parse function extracts from the soup."""
+    return parse_soup(BeautifulSoup(html, "html.parser"), *args)
+
+
+def text(soup: BeautifulSoup, element_id: str) -> str:
+    """Return the text of the element with the id."""
+    return str(cast(Tag, soup.find(id=element_id)).string)
+
+
+def transaction_name(transaction: Tag) -> str:
+    """Return the name of the transaction."""
+    return str(cast(Tag, transaction.find("td", class_="name")).string)
@@ -14,7 +14,7 @@ class PerformanceTestRunnerScalability(PerformanceTestRunnerBaseClass):
         """Override to parse the scalability breaking point from the responses."""
         trend_breaks = []
         for response in responses:
-            breaking_point = int((await self._soup(response)).find(id="trendbreak_scalability").string)
+            breaking_point = int(await self._text(response, "trendbreak_scalability"))
             if breaking_point == 100:
                 raise SourceCollectorException(
                     "No performance scalability breaking point occurred (breaking point is at 100%, expected < 100%)"
@@ -13,5 +13,5 @@ class PerformanceTestRunnerPerformanceTestStability(PerformanceTestRunnerBaseCla
         """Override to parse the trend break percentage from the responses and return the minimum percentage."""
         trend_breaks = []
         for response in responses:
-            trend_breaks.append(int((await self._soup(response)).find(id="trendbreak_stability").string))
+            trend_breaks.append(int(await self._text(response, "trendbreak_stability")))
         return str(min(trend_breaks))
@@ -1,11 +1,11 @@
 """Performancetest-runner slow transactions collector."""
 
-from bs4 import Tag
+from bs4 import BeautifulSoup
 
 from collector_utilities.functions import match_string_or_regular_expression
 from model import Entities, Entity, SourceResponses
 
-from .base import PerformanceTestRunnerBaseClass
+from .base import PerformanceTestRunnerBaseClass, transaction_name
 
 
 class PerformanceTestRunnerSlowTransactions(PerformanceTestRunnerBaseClass):
@@ -13,31 +13,32 @@ class PerformanceTestRunnerSlowTransactions(PerformanceTestRunnerBaseClass):
 
     async def _parse_entities(self, responses: SourceResponses) -> Entities:
         """Override to parse the slow transactions from the responses."""
-        return Entities([self.__entity(transaction) for transaction in await self.__slow_transactions(responses)])
+        slow_transactions = await self.__slow_transactions(responses)
+        return Entities([Entity(key=name, name=name, threshold=threshold) for name, threshold in slow_transactions])
 
-    @classmethod
-    def __entity(cls, transaction) -> Entity:
-        """Transform a transaction into a transaction entity."""
-        name = cls._name(transaction)
-        threshold = "high" if transaction.select("td.red.evaluated") else "warning"
-        return Entity(key=name, name=name, threshold=threshold)
-
-    async def __slow_transactions(self, responses: SourceResponses) -> list[Tag]:
-        """Return the slow transactions in the performance test report."""
+    async def __slow_transactions(self, responses: SourceResponses) -> list[tuple[str, str]]:
+        """Return the names and thresholds of the slow transactions in the performance test report."""
         thresholds = self._parameter("thresholds")
         transactions_to_include = self._parameter("transactions_to_include")
         transactions_to_ignore = self._parameter("transactions_to_ignore")
 
-        def include(transaction) -> bool:
+        def include(name: str) -> bool:
             """Return whether the transaction should be included."""
-            name = self._name(transaction)
             if transactions_to_include and not match_string_or_regular_expression(name, transactions_to_include):
                 return False
             return not match_string_or_regular_expression(name, transactions_to_ignore)
 
-        slow_transactions: list[Tag] = []
+        slow_transactions: list[tuple[str, str]] = []
         for response in responses:
-            soup = await self._soup(response)
-            for color in thresholds:
-                slow_transactions.extend(soup.select(f"tr.transaction:has(> td.{color}.evaluated)"))
-        return [transaction for transaction in slow_transactions if include(transaction)]
+            slow_transactions.extend(await self._parse_html(response, parse_slow_transactions, thresholds))
+        return [(name, threshold) for name, threshold in slow_transactions if include(name)]
+
+
+def parse_slow_transactions(soup: BeautifulSoup, thresholds: list[str]) -> list[tuple[str, str]]:
+    """Return the names and thresholds of the transactions that exceed one of the thresholds."""
+    slow_transactions = []
+    for color in thresholds:
+        for transaction in soup.select(f"tr.transaction:has(> td.{color}.evaluated)"):
+            threshold = "high" if transaction.select("td.red.evaluated") else "warning"
+            slow_transactions.append((transaction_name(transaction), threshold))
+    return slow_transactions
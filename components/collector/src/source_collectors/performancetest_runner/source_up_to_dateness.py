@@ -13,7 +13,5 @@ class PerformanceTestRunnerSourceUpToDateness(PerformanceTestRunnerBaseClass, So
 
     async def _parse_source_response_date_time(self, response: Response) -> datetime:
         """Override to parse the start date time of the test from the response."""
-        datetime_parts = [
-            int(part) for part in (await self._soup(response)).find(id="start_of_the_test").string.split(".")
-        ]
+        datetime_parts = [int(part) for part in (await self._text(response, "start_of_the_test")).split(".")]
         return datetime(*datetime_parts)  # type: ignore
@@ -1,8 +1,9 @@
 """Robot Framework tests collector."""
 
 from typing import cast
+from xml.etree.ElementTree import Element  # nosec, Element is not available from defusedxml, but only used as type
 
-from collector_utilities.functions import parse_source_response_xml
+from collector_utilities.functions import iterparse_source_response_xml
 from collector_utilities.type import Response
 from model import Entities, Entity, SourceMeasurement, SourceResponses
 
@@ -12,6 +13,8 @@ from .base import RobotFrameworkBaseClass
 class RobotFrameworkTests(RobotFrameworkBaseClass):
     """Collector for Robot Framework tests."""
 
+    STREAM_LARGE_RESPONSES = True
+
     async def _parse_source_responses(self, responses: SourceResponses) -> SourceMeasurement:
         """Override to parse the tests from the Robot Framework XML."""
         nr_of_tests, total_nr_of_tests, test_entities = 0, 0, Entities()
@@ -29,13 +32,30 @@ class RobotFrameworkTests(RobotFrameworkBaseClass):
         response: Response, test_results: list[str], all_test_results: list[str]
     ) -> tuple[int, int, Entities]:
         """Parse a Robot Framework XML."""
-        nr_of_tests, total_nr_of_tests, entities = 0, 0, Entities()
-        tree = await parse_source_response_xml(response)
-        stats = [stat for stat in tree.findall("statistics/total/stat") if (stat.text or "").lower() == "all tests"][0]
+        nr_of_tests, total_nr_of_tests = 0, 0
+        entities_by_test_result = {test_result: Entities() for test_result in all_test_results}
+        # The tests precede the statistics in the XML, so collect the test entities per test result while parsing:
+        for tag, attributes in await iterparse_source_response_xml(response, ["test", "statistics"], parse_element):
+            if tag == "test":
+                if (test_result := attributes["test_result"]) in test_results:
+                    entity = Entity(key=attributes["id"], name=attributes["name"], test_result=test_result)
+                    entities_by_test_result[test_result].append(entity)
+                continue
+            for test_result in all_test_results:
+                total_nr_of_tests += int(attributes.get(test_result, 0))
+                if test_result in test_results:
+                    nr_of_tests += int(attributes.get(test_result, 0))
+        entities = Entities()
         for test_result in all_test_results:
-            total_nr_of_tests += int(stats.get(test_result, 0))
-            if test_result in test_results:
-                nr_of_tests += int(stats.get(test_result, 0))
-                for test in tree.findall(f".//test/status[@status='{test_result.upper()}']/.."):
-                    entities.append(Entity(key=test.get("id", ""), name=test.get("name", ""), test_result=test_result))
+            entities.extend(entities_by_test_result[test_result])
         return nr_of_tests, total_nr_of_tests, entities
+
+
+def parse_element(element: Element) -> tuple[str, dict[str, str]]:
+    """Return the tag and the attributes of the test, or the tag and the attributes of the all tests statistics."""
+    if element.tag == "test":
+        status = element.find("status")
+        test_result = "" if status is None else status.get("status", "").lower()
+        return element.tag, dict(id=element.get("id", ""), name=element.get("name", ""), test_result=test_result)
+    stats = [stat for stat in element.findall("total/stat") if (stat.text or "").lower() == "all tests"][0]
+    return element.tag, dict(stats.attrib)
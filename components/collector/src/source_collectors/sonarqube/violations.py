@@ -45,11 +45,14 @@ class SonarQubeViolations(SonarQubeCollector):
     async def _parse_source_responses(self, responses: SourceResponses) -> SourceMeasurement:
         """Override to parse the issues."""
         value = 0
-        entities = Entities()
+        entities = Entities(max_entities=SourceMeasurement.MAX_ENTITIES)
         for response in responses:
             json = await response.json()
             value += int(json.get("total", 0))
-            entities.extend([await self._entity(issue) for issue in json.get("issues", [])])
+            for issue in json.get("issues", []):
+                if entities.full:
+                    break  # The value is the total reported by SonarQube, so there's no need to count the other issues
+                entities.append(await self._entity(issue))
         return SourceMeasurement(value=str(value), entities=entities)
 
     async def __issue_landing_url(self, issue_key: str) -> URL:
@@ -1,5 +1,7 @@
 """Unit tests for the collector main script."""
 
+import asyncio
+import json
 import logging
 import unittest
 from copy import deepcopy
@@ -10,11 +12,12 @@ import aiohttp
 
 import quality_time_collector
 from base_collectors import Collector, MetricCollector, SourceCollector
+from collector_utilities.functions import md5_hash
 from model import SourceMeasurement, SourceResponses
 
 
-class CollectorTest(unittest.IsolatedAsyncioTestCase):
-    """Unit tests for the collection methods."""
+class CollectorTestCase(unittest.IsolatedAsyncioTestCase):
+    """Base class for the collector unit tests."""
 
     @classmethod
     def setUpClass(cls) -> None:  # pylint: disable=invalid-name
@@ -40,7 +43,7 @@ class CollectorTest(unittest.IsolatedAsyncioTestCase):
         self.collector = Collector()
         self.collector.data_model = self.data_model
         self.url = "https://url"
-        self.measurement_api_url = "http://localhost:5001/internal-api/v3/measurements"
+        self.measurement_api_url = "http://localhost:5001/internal-api/v3/measurements/batch"
         self.metrics = dict(
             metric_uuid=dict(
                 addition="sum",
@@ -64,17 +67,24 @@ class CollectorTest(unittest.IsolatedAsyncioTestCase):
         post.return_value.close = Mock()
         return patch("aiohttp.ClientSession.post", post)
 
+    @staticmethod
+    async def _wait_for_collection_tasks():
+        """Wait for the collection tasks started by the collector, including tasks started when other tasks finish."""
+        while tasks := asyncio.all_tasks() - {asyncio.current_task()}:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def _fetch_measurements(self, mock_async_get_request, number=1, side_effect=None):
         """Fetch the measurements with patched get method."""
         with self._patched_get(mock_async_get_request, side_effect):
             async with aiohttp.ClientSession() as session:
                 for _ in range(number):
                     await self.collector.collect_metrics(session)
+                    await self._wait_for_collection_tasks()
 
     def _source(self, **kwargs):
         """Create a source."""
         connection_error = kwargs.get("connection_error")
-        return dict(
+        source = dict(
             api_url=kwargs.get("api_url", self.url),
             landing_url=kwargs.get("landing_url", self.url),
             value=None if connection_error else kwargs.get("value", "42"),
@@ -84,6 +94,12 @@ class CollectorTest(unittest.IsolatedAsyncioTestCase):
             parse_error=None,
             source_uuid="source_id",
         )
+        source["content_hash"] = md5_hash(json.dumps(source, sort_keys=True))
+        return source
+
+
+class CollectorTest(CollectorTestCase):
+    """Unit tests for the collection methods."""
 
     async def test_fetch_successful(self):
         """Test fetching a test metric."""
@@ -111,7 +127,7 @@ class CollectorTest(unittest.IsolatedAsyncioTestCase):
             await self._fetch_measurements(mock_async_get_request)
         post.assert_called_once_with(
             self.measurement_api_url,
-            json=dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid"),
+            json=dict(measurements=[dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid")]),
         )
 
     async def test_fetch_without_sources(self):
@@ -155,7 +171,11 @@ class CollectorTest(unittest.IsolatedAsyncioTestCase):
             )
         post.assert_called_once_with(
             self.measurement_api_url,
-            json=dict(has_error=True, sources=[self._source(connection_error="error")], metric_uuid="metric_uuid"),
+            json=dict(
+                measurements=[
+                    dict(has_error=True, sources=[self._source(connection_error="error")], metric_uuid="metric_uuid")
+                ]
+            ),
         )
 
     async def test_fetch_with_empty_client_error(self):
@@ -170,9 +190,9 @@ class CollectorTest(unittest.IsolatedAsyncioTestCase):
             await self._fetch_measurements(None, side_effect=[mock_async_get_request, aiohttp.ClientPayloadError()])
         post.assert_called_once_with(
             self.measurement_api_url,
-            json=dict(
+            json=dict(measurements=[dict(
                 has_error=True, sources=[self._source(connection_error="ClientPayloadError")], metric_uuid="metric_uuid"
-            ),
+            )]),
         )
 
     async def test_fetch_with_post_error(self):
@@ -183,7 +203,7 @@ class CollectorTest(unittest.IsolatedAsyncioTestCase):
             await self._fetch_measurements(mock_async_get_request)
         post.assert_called_once_with(
             self.measurement_api_url,
-            json=dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid"),
+            json=dict(measurements=[dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid")]),
         )
 
     @patch("asyncio.sleep", Mock(side_effect=RuntimeError))
@@ -192,11 +212,13 @@ class CollectorTest(unittest.IsolatedAsyncioTestCase):
         """Test the collect method."""
         mock_async_get_request = AsyncMock()
         mock_async_get_request.json.side_effect = [self.data_model, self.metrics]
-        with self._patched_get(mock_async_get_request), self._patched_post() as post, self.assertRaises(RuntimeError):
-            await quality_time_collector.collect()
+        with self._patched_get(mock_async_get_request), self._patched_post() as post:
+            with self.assertRaises(RuntimeError):
+                await quality_time_collector.collect()
+            await self._wait_for_collection_tasks()
         post.assert_called_once_with(
             self.measurement_api_url,
-            json=dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid"),
+            json=dict(measurements=[dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid")]),
         )
 
     async def test_fetch_twice(self):
@@ -206,51 +228,9 @@ class CollectorTest(unittest.IsolatedAsyncioTestCase):
         with self._patched_post() as post:
             await self._fetch_measurements(mock_async_get_request, number=2)
         post.assert_called_once_with(
-            self.measurement_api_url, json=dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid")
-        )
-
-    async def test_fetch_in_batches(self):
-        """Test that metrics are fetched in batches."""
-        self.collector.MEASUREMENT_LIMIT = 1
-        self.metrics["metric_uuid2"] = dict(
-            addition="sum", type="metric", sources=dict(source_id=dict(type="source", parameters=dict(url=self.url)))
-        )
-        mock_async_get_request = AsyncMock()
-        mock_async_get_request.json.side_effect = [self.metrics, self.metrics]
-        with self._patched_post() as post:
-            await self._fetch_measurements(mock_async_get_request, number=2)
-        expected_call1 = call(
-            self.measurement_api_url, json=dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid")
-        )
-        expected_call2 = call(
-            self.measurement_api_url, json=dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid2")
-        )
-        post.assert_has_calls(calls=[expected_call1, call().close(), expected_call2, call().close()])
-
-    async def test_prioritize_edited_metrics(self):
-        """Test that edited metrics get priority."""
-        self.collector.MEASUREMENT_LIMIT = 1
-        self.metrics["metric_uuid2"] = dict(
-            addition="sum", type="metric", sources=dict(source_id=dict(type="source", parameters=dict(url=self.url)))
-        )
-        edited_metrics = deepcopy(self.metrics)
-        edited_url = edited_metrics["metric_uuid"]["sources"]["source_id"]["parameters"]["url"] = "https://edited_url"
-        mock_async_get_request = AsyncMock()
-        mock_async_get_request.json.side_effect = [self.metrics, edited_metrics]
-        with self._patched_post() as post:
-            await self._fetch_measurements(mock_async_get_request, number=2)
-        expected_call1 = call(
-            self.measurement_api_url, json=dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid")
-        )
-        expected_call2 = call(
             self.measurement_api_url,
-            json=dict(
-                has_error=False,
-                sources=[self._source(api_url=edited_url, landing_url=edited_url)],
-                metric_uuid="metric_uuid",
-            ),
+            json=dict(measurements=[dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid")]),
         )
-        post.assert_has_calls(calls=[expected_call1, call().close(), expected_call2, call().close()])
 
     async def test_missing_mandatory_parameter(self):
         """Test that a metric with sources but without a mandatory parameter is skipped."""
@@ -276,7 +256,7 @@ class CollectorTest(unittest.IsolatedAsyncioTestCase):
             await self._fetch_measurements(mock_async_get_request)
         post.assert_called_once_with(
             self.measurement_api_url,
-            json=dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid"),
+            json=dict(measurements=[dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid")]),
         )
 
     @patch("builtins.open", mock_open())
@@ -308,3 +288,135 @@ class CollectorTest(unittest.IsolatedAsyncioTestCase):
         mocked_log.assert_called_once_with(
             "Could not write health check time stamp to %s: %s", "/home/collector/health_check.txt", io_error
         )
+
+
+class CollectorQueueTest(CollectorTestCase):
+    """Unit tests for the queue of metrics to collect."""
+
+    async def test_start_next_metric_when_slot_frees_up(self):
+        """Test that the next metric is collected as soon as the collection of another metric is done."""
+        self.collector.MEASUREMENT_LIMIT = 1
+        self.metrics["metric_uuid2"] = dict(
+            addition="sum", type="metric", sources=dict(source_id=dict(type="source", parameters=dict(url=self.url)))
+        )
+        mock_async_get_request = AsyncMock()
+        mock_async_get_request.json.return_value = self.metrics
+        with self._patched_post() as post:
+            await self._fetch_measurements(mock_async_get_request)
+        expected_call1 = call(
+            self.measurement_api_url,
+            json=dict(measurements=[dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid")]),
+        )
+        expected_call2 = call(
+            self.measurement_api_url,
+            json=dict(measurements=[dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid2")]),
+        )
+        post.assert_has_calls(calls=[expected_call1, call().close(), expected_call2, call().close()])
+
+    async def test_post_measurements_in_batches(self):
+        """Test that measurements of metrics that are measured concurrently are posted in one batch."""
+        self.metrics["metric_uuid2"] = dict(
+            addition="sum", type="metric", sources=dict(source_id=dict(type="source", parameters=dict(url=self.url)))
+        )
+        mock_async_get_request = AsyncMock()
+        mock_async_get_request.json.return_value = self.metrics
+        with self._patched_post() as post:
+            await self._fetch_measurements(mock_async_get_request)
+        measurement1 = dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid")
+        measurement2 = dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid2")
+        post.assert_called_once_with(self.measurement_api_url, json=dict(measurements=[measurement1, measurement2]))
+
+    async def test_post_full_batch(self):
+        """Test that measurements are posted as soon as the batch is full."""
+        self.collector.MEASUREMENT_BATCH_SIZE = 1
+        self.metrics["metric_uuid2"] = dict(
+            addition="sum", type="metric", sources=dict(source_id=dict(type="source", parameters=dict(url=self.url)))
+        )
+        mock_async_get_request = AsyncMock()
+        mock_async_get_request.json.return_value = self.metrics
+        with self._patched_post() as post:
+            await self._fetch_measurements(mock_async_get_request)
+        self.assertEqual(2, post.await_count)
+
+    async def test_prioritize_edited_metrics(self):
+        """Test that edited metrics get priority over metrics that are due."""
+        self.collector.MEASUREMENT_LIMIT = 1
+        self.metrics["metric_uuid2"] = dict(
+            addition="sum", type="metric", sources=dict(source_id=dict(type="source", parameters=dict(url=self.url)))
+        )
+        edited_metrics = deepcopy(self.metrics)
+        edited_url = edited_metrics["metric_uuid2"]["sources"]["source_id"]["parameters"]["url"] = "https://edited_url"
+        mock_async_get_request = AsyncMock()
+        mock_async_get_request.json.side_effect = [self.metrics, edited_metrics]
+        with self._patched_get(mock_async_get_request), self._patched_post() as post:
+            async with aiohttp.ClientSession() as session:
+                await self.collector.collect_metrics(session)
+                await self._wait_for_collection_tasks()
+                self.collector.next_fetch["metric_uuid"] = datetime(2000, 1, 1)  # Make the first metric due
+                await self.collector.collect_metrics(session)
+                await self._wait_for_collection_tasks()
+        expected_call1 = call(
+            self.measurement_api_url,
+            json=dict(measurements=[dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid")]),
+        )
+        expected_call2 = call(
+            self.measurement_api_url,
+            json=dict(measurements=[dict(has_error=False, sources=[self._source()], metric_uuid="metric_uuid2")]),
+        )
+        expected_call3 = call(
+            self.measurement_api_url,
+            json=dict(measurements=[dict(
+                has_error=False,
+                sources=[self._source(api_url=edited_url, landing_url=edited_url)],
+                metric_uuid="metric_uuid2",
+            )]),
+        )
+        post.assert_has_calls(
+            calls=[
+                expected_call1,
+                call().close(),
+                expected_call2,
+                call().close(),
+                expected_call3,
+                call().close(),
+                expected_call1,
+                call().close(),
+            ]
+        )
+
+    async def test_deleted_metric_is_not_collected(self):
+        """Test that a metric that is deleted while queued, is not collected."""
+        self.collector.MEASUREMENT_LIMIT = 0
+        mock_async_get_request = AsyncMock()
+        mock_async_get_request.json.side_effect = [self.metrics, {}]
+        with self._patched_post() as post:
+            await self._fetch_measurements(mock_async_get_request)
+            self.collector.MEASUREMENT_LIMIT = 1
+            await self._fetch_measurements(mock_async_get_request)
+        post.assert_not_called()
+
+    async def test_metrics_are_kept_when_getting_the_metrics_fails(self):
+        """Test that the queued metrics are still collected if getting the metrics fails."""
+        self.collector.MEASUREMENT_LIMIT = 0
+        mock_async_get_request = AsyncMock()
+        mock_async_get_request.json.side_effect = [self.metrics, RuntimeError]
+        with self._patched_post() as post:
+            await self._fetch_measurements(mock_async_get_request)
+            self.collector.MEASUREMENT_LIMIT = 1
+            await self._fetch_measurements(mock_async_get_request)
+        post.assert_called_once()
+
+    async def test_failing_collection_task(self):
+        """Test that a failing collection task is logged and that the next metric is collected."""
+        self.collector.MEASUREMENT_LIMIT = 1
+        self.metrics["metric_uuid2"] = dict(
+            addition="sum", type="metric", sources=dict(source_id=dict(type="source", parameters=dict(url=self.url)))
+        )
+        mock_async_get_request = AsyncMock()
+        mock_async_get_request.json.return_value = self.metrics
+        with self._patched_post() as post, patch.object(
+            self.collector, "collect_metric", AsyncMock(side_effect=[RuntimeError, None])
+        ) as collect_metric:
+            await self._fetch_measurements(mock_async_get_request)
+        self.assertEqual(2, collect_metric.await_count)
+        post.assert_not_called()
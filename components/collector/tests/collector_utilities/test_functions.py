@@ -1,9 +1,29 @@
 """Unit tests for the utility functions."""
 
+import os
 import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-
-from collector_utilities.functions import days_ago, hashless, is_regexp, stable_traceback, tokenless
+from operator import methodcaller
+from unittest.mock import patch
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from defusedxml import EntitiesForbidden
+
+from collector_utilities.functions import (
+    days_ago,
+    hashless,
+    is_regexp,
+    iterparse_source_response_xml,
+    iterparse_xml,
+    parse_executor,
+    parse_xml_elements,
+    run_in_parse_executor,
+    stable_traceback,
+    tokenless,
+)
 from collector_utilities.type import URL
 
 
@@ -103,3 +123,105 @@ class IsRegularExpressionTest(unittest.TestCase):
         self.assertTrue(is_regexp(".*"))
         self.assertTrue(is_regexp("bar?foo"))
         self.assertTrue(is_regexp("[a-z]+foo"))
+
+
+class IterparseXMLTest(unittest.TestCase):
+    """Unit tests for the iterparse XML function."""
+
+    def test_elements(self):
+        """Test that the elements with the tags are yielded."""
+        xml = b'<suite><case name="1"><failure/></case><other/><case name="2"/></suite>'
+        elements = []
+        for element, _ in iterparse_xml(xml, ["case"]):
+            elements.append((element.get("name"), element.find("failure") is not None))
+        self.assertEqual([("1", True), ("2", False)], elements)
+
+    def test_removed_elements(self):
+        """Test that yielded elements are removed from their parent."""
+        xml = b"<suite><case/><case/><other/></suite>"
+        for element, _ in iterparse_xml(xml, ["case", "suite"]):
+            if element.tag == "suite":
+                self.assertEqual(["other"], [child.tag for child in element])
+
+    def test_namespace(self):
+        """Test that the namespace of the root element is used."""
+        xml = b'<analysis xmlns="https://ns"><dependency><fileName>x.jar</fileName></dependency></analysis>'
+        elements = list(iterparse_xml(xml, ["dependency"], with_namespace=True))
+        self.assertEqual("x.jar", elements[0][0].findtext("ns:fileName", namespaces=elements[0][1]))
+
+    def test_allowed_root_tags(self):
+        """Test that an exception is raised if the root tag is not allowed."""
+        self.assertRaises(AssertionError, list, iterparse_xml(b"<suite/>", ["case"], ["testsuites"]))
+
+    def test_parse_xml_elements(self):
+        """Test that the data parsed from the elements with the tags is returned."""
+        xml = b'<analysis xmlns="https://ns"><dependency><fileName>x.jar</fileName></dependency></analysis>'
+        file_names = parse_xml_elements(xml, ["dependency"], self.file_name, with_namespace=True)
+        self.assertEqual(["x.jar"], file_names)
+
+    @staticmethod
+    def file_name(element, namespaces) -> str:
+        """Return the file name of the dependency."""
+        return str(element.findtext("ns:fileName", namespaces=namespaces))
+
+    def test_entities_are_forbidden(self):
+        """Test that the XML is parsed safely."""
+        xml = b'<!DOCTYPE suite [<!ENTITY a "a">]><suite>&a;</suite>'
+        self.assertRaises(EntitiesForbidden, list, iterparse_xml(xml, ["suite"]))
+
+
+class IterparseSourceResponseXMLTest(unittest.IsolatedAsyncioTestCase):
+    """Unit tests for the iterparse source response XML function."""
+
+    @staticmethod
+    async def stream_xml(request: web.Request) -> web.StreamResponse:
+        """Stream an XML document with many elements, without content length."""
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b"<suite>")
+        for index in range(1000):
+            await response.write(b"".join(b'<case name="%d"/>' % (index * 100 + case) for case in range(100)))
+        await response.write(b"</suite>")
+        return response
+
+    async def test_unread_body_is_parsed_while_being_read(self):
+        """Test that a response body that has not been read is parsed while it's being read."""
+        app = web.Application()
+        app.router.add_get("/", self.stream_xml)
+        async with TestServer(app) as server, aiohttp.ClientSession() as session:
+            response = await session.get(server.make_url("/"))
+            names = await iterparse_source_response_xml(response, ["case"], methodcaller("get", "name"))
+        self.assertEqual([str(index) for index in range(100000)], names)
+        self.assertTrue(response.closed)
+
+
+class ParseExecutorTest(unittest.IsolatedAsyncioTestCase):
+    """Unit tests for the parse executor."""
+
+    def setUp(self):  # pylint: disable=invalid-name
+        """Override to clear the cached executor and to shut down the executor created by the test afterwards."""
+        parse_executor.cache_clear()
+        self.addCleanup(parse_executor.cache_clear)
+        self.addCleanup(lambda: parse_executor().shutdown())
+
+    def test_thread_pool_by_default(self):
+        """Test that the parse executor is a thread pool by default."""
+        self.assertIsInstance(parse_executor(), ThreadPoolExecutor)
+
+    @patch.dict(os.environ, dict(COLLECTOR_PARSE_EXECUTOR="process", COLLECTOR_PARSE_WORKERS="2"))
+    def test_process_pool(self):
+        """Test that the parse executor can be a process pool."""
+        self.assertIsInstance(parse_executor(), ProcessPoolExecutor)
+
+    async def test_run_in_parse_executor(self):
+        """Test that a function can be run in the parse executor."""
+        self.assertEqual(3, await run_in_parse_executor(sum, [1, 2]))
+
+    async def test_parse_xml_elements_in_process_pool(self):
+        """Test that XML elements can be parsed in a process pool, because the parsed data is picklable."""
+        xml = b'<suite><case name="1"/><case name="2"/></suite>'
+        # Patch the environment in the test body, because patch.dict doesn't decorate async tests on Python 3.9:
+        with patch.dict(os.environ, dict(COLLECTOR_PARSE_EXECUTOR="process", COLLECTOR_PARSE_WORKERS="1")):
+            self.assertIsInstance(parse_executor(), ProcessPoolExecutor)
+        names = await run_in_parse_executor(parse_xml_elements, xml, ["case"], methodcaller("get", "name"))
+        self.assertEqual(["1", "2"], names)
@@ -12,3 +12,33 @@ class EntityTest(unittest.TestCase):
         """Test that duplicate entities are removed on initialization."""
         entities = Entities([Entity(key="1"), Entity(key="2"), Entity(key="2")])
         self.assertEqual(2, len(entities))
+
+    def test_max_entities(self):
+        """Test that entities beyond the maximum are counted, but not kept."""
+        entities = Entities([Entity(key="1"), Entity(key="2"), Entity(key="3"), Entity(key="3")], max_entities=2)
+        self.assertEqual(2, len(entities))
+        self.assertEqual(3, entities.nr_entities)
+        self.assertTrue(entities.full)
+
+    def test_entities_beyond_maximum_are_not_created(self):
+        """Test that entities beyond the maximum are not created."""
+        created = []
+
+        def create_entity(key: str) -> Entity:
+            """Create the entity."""
+            created.append(key)
+            return Entity(key=key)
+
+        entities = Entities(max_entities=1)
+        for key in ("a/1", "a/1", "b/2"):
+            entities.add(key, lambda key=key: create_entity(key))
+        self.assertEqual(["a/1"], created)
+        self.assertEqual(2, entities.nr_entities)
+
+    def test_add_entities_beyond_maximum(self):
+        """Test that the entities not kept because of the maximum are counted when adding entities."""
+        entities = Entities([Entity(key="1"), Entity(key="2")], max_entities=1)
+        other_entities = Entities([Entity(key="2"), Entity(key="3"), Entity(key="4")], max_entities=1)
+        total = entities + other_entities
+        self.assertEqual(["1", "2"], [entity["key"] for entity in total])
+        self.assertEqual(4, total.nr_entities)
@@ -0,0 +1,30 @@
+"""Measurement model unit tests."""
+
+import unittest
+
+from model import Entities, Entity, SourceMeasurement
+
+
+class SourceMeasurementTest(unittest.TestCase):
+    """Source measurement unit tests."""
+
+    @staticmethod
+    def content_hash(**kwargs) -> str:
+        """Return the content hash of a source measurement."""
+        return SourceMeasurement(**kwargs).as_dict()["content_hash"]
+
+    def test_content_hash_of_equal_measurements(self):
+        """Test that measurements with the same contents have the same content hash."""
+        entities = Entities([Entity(key="key", name="name")])
+        self.assertEqual(self.content_hash(entities=entities), self.content_hash(entities=Entities(entities)))
+
+    def test_content_hash_of_measurements_with_different_entities(self):
+        """Test that measurements with different entities have different content hashes."""
+        self.assertNotEqual(
+            self.content_hash(entities=Entities([Entity(key="key", name="name")])),
+            self.content_hash(entities=Entities([Entity(key="key", name="other name")])),
+        )
+
+    def test_content_hash_of_measurements_with_different_errors(self):
+        """Test that measurements with different errors have different content hashes."""
+        self.assertNotEqual(self.content_hash(parse_error="error"), self.content_hash(parse_error="other error"))
@@ -24,6 +24,13 @@ class JUnitTestReportTest(JUnitCollectorTestCase):
         response = await self.collect(get_request_text=self.JUNIT_XML)
         self.assert_measurement(response, value="5", total="5", entities=self.expected_entities)
 
+    async def test_many_tests(self):
+        """Test that all tests are counted, but that only the maximum number of entities is kept."""
+        test_cases = "".join(f'<testcase name="tc{index}" classname="cn"/>' for index in range(150))
+        response = await self.collect(get_request_text=f"<testsuites><testsuite>{test_cases}</testsuite></testsuites>")
+        self.assert_measurement(response, value="150", total="150")
+        self.assertEqual(100, len(response.sources[0].entities))
+
     async def test_failed_tests(self):
         """Test that the failed tests are returned."""
         self.set_source_parameter("test_result", ["failed"])
@@ -12,7 +12,8 @@ from unittest.mock import AsyncMock, PropertyMock, patch
 
 import aiohttp
 
-from base_collectors import MetricCollector
+from base_collectors import MetricCollector, SourceCollector
+from base_collectors.file_source_collector import FileSourceCollector
 
 
 MODULE_DIR = pathlib.Path(__file__).resolve().parent
@@ -42,6 +43,11 @@ class SourceCollectorTestCase(unittest.IsolatedAsyncioTestCase):  # skipcq: PTC-
 
     def setUp(self) -> None:  # pylint: disable=invalid-name
         """Extend to set up the source and metric under test."""
+        # Start each test without cached responses and previous measurements, and remove the ones the test added:
+        for cache in (SourceCollector.response_cache, FileSourceCollector.previous_measurements):
+            patcher = patch.dict(cache, clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
         self.sources = dict(source_id=dict(type=self.SOURCE_TYPE, parameters=dict(url=f"https://{self.SOURCE_TYPE}")))
         self.metric = dict(type=self.METRIC_TYPE, sources=self.sources, addition=self.METRIC_ADDITION)
 
@@ -78,7 +84,8 @@ class SourceCollectorTestCase(unittest.IsolatedAsyncioTestCase):  # skipcq: PTC-
         """Create the mock get request."""
         get_request = AsyncMock()
         get_request.json = get_request_json
-        get_request.read.return_value = content
+        get_request.read.return_value = content or text.encode()
+        get_request.content_length = len(get_request.read.return_value)
         get_request.text.return_value = text
         type(get_request).headers = PropertyMock(return_value=headers or {})
         type(get_request).links = PropertyMock(return_value={}, side_effect=[links, {}] if links else None)
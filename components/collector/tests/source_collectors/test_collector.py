@@ -1,13 +1,16 @@
 """Unit tests for the Collector class."""
 
+import asyncio
 from datetime import datetime
-from unittest.mock import Mock, patch
+from http import HTTPStatus
+from unittest.mock import AsyncMock, Mock, patch
 
 import aiohttp
 
-from base_collectors import SourceCollector
+from base_collectors import MetricCollector, SourceCollector
+from base_collectors.file_source_collector import FileSourceCollector
 from collector_utilities.type import URL
-from model import SourceResponses
+from model import SourceMeasurement, SourceResponses
 
 from .source_collector_test_case import SourceCollectorTestCase
 
@@ -47,6 +50,114 @@ class CollectorTest(SourceCollectorTestCase):
         self.assert_measurement(response, value="2", url=self.JUNIT_XML, source_index=0)
         self.assert_measurement(response, value="88", url=sonarqube_url, source_index=1)
 
+    async def test_max_connections_per_host(self):
+        """Test that the number of concurrent requests per host is limited by the maximum in the data model."""
+        sonarqube_url = "https://sonarqube:9000"
+        self.sources["sonarqube"] = dict(type="sonarqube", parameters=dict(url=sonarqube_url, component="id"))
+        with patch("asyncio.Semaphore", wraps=asyncio.Semaphore) as semaphore:
+            await self.collect(get_request_json_return_value={}, get_request_text=self.JUNIT_XML)
+        semaphore.assert_any_call(4)
+        self.assertEqual(4, SourceCollector.host_semaphores["sonarqube:9000"][0])
+
+    async def test_max_connections_per_host_is_shared_by_source_types(self):
+        """Test that source types accessing the same host share the lowest maximum number of concurrent requests."""
+        sonarqube_url = "https://sonarqube:9000"
+        self.sources["source_id"]["parameters"]["url"] = f"{sonarqube_url}/junit.xml"
+        self.sources["sonarqube"] = dict(type="sonarqube", parameters=dict(url=sonarqube_url, component="id"))
+        with patch.dict(SourceCollector.host_semaphores, clear=True):
+            await self.collect(get_request_json_return_value={}, get_request_text=self.JUNIT_XML)
+            self.assertEqual(4, SourceCollector.host_semaphores["sonarqube:9000"][0])
+            self.assertEqual(["sonarqube:9000"], list(SourceCollector.host_semaphores))
+
+    async def collect_twice_with_same_url(self, get_side_effect=None, content_length=len(JUNIT_XML)):
+        """Collect a metric with two sources with the same url and return the mocked get method."""
+        self.sources["junit2"] = dict(type="junit", parameters=dict(url=self.JUNIT_URL))
+        response = AsyncMock(headers={}, content_length=content_length)
+        response.read.return_value = self.JUNIT_XML.encode()
+        mocked_get = AsyncMock(return_value=response, side_effect=get_side_effect)
+        with patch("aiohttp.ClientSession.get", mocked_get):
+            async with aiohttp.ClientSession() as session:
+                measurement = await MetricCollector(session, self.metric, self.data_model).collect()
+        return mocked_get, measurement
+
+    async def test_identical_requests_are_made_once(self):
+        """Test that identical requests for different sources share the response."""
+        mocked_get, measurement = await self.collect_twice_with_same_url()
+        mocked_get.assert_awaited_once()
+        self.assert_measurement(measurement, value="2", source_index=0)
+        self.assert_measurement(measurement, value="2", source_index=1)
+
+    async def test_large_responses_are_not_shared(self):
+        """Test that identical requests are made again if the response body is too large to read before parsing."""
+        mocked_get, measurement = await self.collect_twice_with_same_url(content_length=None)
+        self.assertEqual(2, mocked_get.await_count)
+        self.assert_measurement(measurement, value="2", source_index=1)
+
+    @patch.object(SourceCollector, "RESPONSE_CACHE_TTL", 0)
+    async def test_expired_responses_are_not_shared(self):
+        """Test that identical requests are made again when the cached response has expired."""
+        mocked_get, _ = await self.collect_twice_with_same_url()
+        self.assertEqual(2, mocked_get.await_count)
+
+    @patch.object(SourceCollector, "RESPONSE_CACHE_TTL", 0)
+    async def test_expired_responses_are_removed(self):
+        """Test that expired responses are removed from the cache when other responses are added."""
+        with patch.dict(SourceCollector.response_cache, {"expired request": (0.0, Mock())}, clear=True):
+            await self.collect_twice_with_same_url()
+            self.assertNotIn("expired request", SourceCollector.response_cache)
+            self.assertEqual(1, len(SourceCollector.response_cache))
+
+    async def test_failed_requests_are_not_cached(self):
+        """Test that failed requests are not cached."""
+        response = AsyncMock(headers={}, content_length=len(self.JUNIT_XML))
+        response.read.return_value = self.JUNIT_XML.encode()
+        mocked_get = AsyncMock(side_effect=[aiohttp.ClientConnectionError("error"), response])
+        with patch("aiohttp.ClientSession.get", mocked_get):
+            async with aiohttp.ClientSession() as session:
+                await MetricCollector(session, self.metric, self.data_model).collect()
+                measurement = await MetricCollector(session, self.metric, self.data_model).collect()
+        self.assert_measurement(measurement, value="2")
+
+    async def collect_with_conditional_request(self, second_response):
+        """Collect the metric twice, the second time with a conditional request, and return the mocked get method."""
+        headers = {"ETag": '"1"', "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        response = AsyncMock(headers=headers, content_length=len(self.JUNIT_XML))
+        response.read.return_value = self.JUNIT_XML.encode()
+        mocked_get = AsyncMock(side_effect=[response, second_response])
+        with patch("aiohttp.ClientSession.get", mocked_get):
+            async with aiohttp.ClientSession() as session:
+                await MetricCollector(session, self.metric, self.data_model).collect()
+                measurement = await MetricCollector(session, self.metric, self.data_model).collect()
+        conditional_headers = {"If-None-Match": '"1"', "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        self.assertEqual(conditional_headers, mocked_get.call_args.kwargs["headers"])
+        return measurement
+
+    async def test_unmodified_file_is_not_parsed_again(self):
+        """Test that the previous measurement is reused if the file has not been modified since the last request."""
+        not_modified = AsyncMock(status=HTTPStatus.NOT_MODIFIED, headers={}, content_length=0)
+        parse_source_responses = AsyncMock(return_value=SourceMeasurement(value="2"))
+        with patch("source_collectors.junit.tests.JUnitTests._parse_source_responses", parse_source_responses):
+            measurement = await self.collect_with_conditional_request(not_modified)
+        parse_source_responses.assert_awaited_once()
+        self.assert_measurement(measurement, value="2", api_url=self.JUNIT_URL, landing_url=self.JUNIT_URL)
+
+    async def test_modified_file_is_parsed_again(self):
+        """Test that the file is parsed again if it has been modified since the last request."""
+        modified = AsyncMock(status=HTTPStatus.OK, headers={}, content_length=len(self.JUNIT_XML))
+        modified.read.return_value = b'<testsuite><testcase name="tc1" /></testsuite>'
+        measurement = await self.collect_with_conditional_request(modified)
+        self.assert_measurement(measurement, value="1")
+
+    async def test_least_recently_used_measurements_are_forgotten(self):
+        """Test that the least recently used previous measurement is removed when the maximum is reached."""
+        FileSourceCollector.previous_measurements["least recently used"] = ({}, Mock())
+        modified = AsyncMock(status=HTTPStatus.OK, headers={}, content_length=len(self.JUNIT_XML))
+        modified.read.return_value = self.JUNIT_XML.encode()
+        with patch.object(FileSourceCollector, "MAX_PREVIOUS_MEASUREMENTS", 1):
+            await self.collect_with_conditional_request(modified)
+        self.assertNotIn("least recently used", FileSourceCollector.previous_measurements)
+        self.assertEqual(1, len(FileSourceCollector.previous_measurements))
+
     async def test_parse_error(self):
         """Test that an error retrieving the data is handled."""
         mock_response = Mock()
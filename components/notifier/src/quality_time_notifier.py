@@ -19,12 +19,12 @@ async def notify(log_level: int = None) -> NoReturn:
     logging.getLogger().setLevel(log_level or logging.ERROR)
     sleep_duration = int(os.environ.get("NOTIFIER_SLEEP_DURATION", 60))
     api_version = "v3"
-    reports_url = (
-        f"http://{os.environ.get('SERVER_HOST', 'localhost')}:"
-        f"{os.environ.get('SERVER_PORT', '5001')}/api/{api_version}/report"
-    )
+    server_url = f"http://{os.environ.get('SERVER_HOST', 'localhost')}:{os.environ.get('SERVER_PORT', '5001')}"
+    reports_url = f"{server_url}/api/{api_version}/report"
+    measurements_url = f"{server_url}/api/{api_version}/measurements"
     data_model = await retrieve_data_model(api_version)
     most_recent_measurement_seen = datetime.max.replace(tzinfo=timezone.utc)
+    cursor = ""  # The reports only need to be retrieved if there are measurements since the cursor
     outbox = Outbox()
     notification_finder = NotificationFinder(data_model)
     while True:
@@ -32,15 +32,23 @@ async def notify(log_level: int = None) -> NoReturn:
         logging.info("Determining notifications...")
         try:
             async with aiohttp.ClientSession(raise_for_status=True, trust_env=True) as session:
-                response = await session.get(reports_url)
-                json = await response.json()
+                since = cursor or datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+                response = await session.get(measurements_url, params=dict(since=since))
+                changes = await response.json()
+                json = None
+                if not cursor or changes["measurements"]:
+                    response = await session.get(reports_url)
+                    json = await response.json()
+            new_cursor = changes["cursor"]
         except Exception as reason:  # pylint: disable=broad-except
-            logging.error("Could not get reports from %s: %s", reports_url, reason)
-            json = dict(reports=[])
-        notifications = notification_finder.get_notifications(json, most_recent_measurement_seen)
-        outbox.add_notifications(notifications)
+            logging.error("Could not get measurements or reports from %s: %s", server_url, reason)
+            json, new_cursor = dict(reports=[]), ""
+        if json is not None:
+            notifications = notification_finder.get_notifications(json, most_recent_measurement_seen)
+            outbox.add_notifications(notifications)
+            most_recent_measurement_seen = most_recent_measurement_timestamp(json)
         outbox.send_notifications()
-        most_recent_measurement_seen = most_recent_measurement_timestamp(json)
+        cursor = new_cursor
         logging.info("Sleeping %.1f seconds...", sleep_duration)
         await asyncio.sleep(sleep_duration)
 
@@ -99,6 +99,11 @@ class NotifyTests(unittest.IsolatedAsyncioTestCase):
         """Retrieve data_model from class variable."""
         return FakeResponse(json_data=DATA_MODEL)
 
+    @staticmethod
+    async def return_measurements(*measurements):
+        """Return the measurements response asynchronously."""
+        return FakeResponse(dict(measurements=list(measurements), cursor="2020-01-02T00:00:00+00:00"))
+
     @staticmethod
     async def return_report(report=None):
         """Return the reports response asynchronously."""
@@ -124,7 +129,13 @@ class NotifyTests(unittest.IsolatedAsyncioTestCase):
     @patch("aiohttp.ClientSession.get")
     async def test_no_new_red_metrics(self, mocked_get, mocked_sleep, mocked_send):
         """Test that no notifications are sent if there are no new red metrics."""
-        mocked_get.side_effect = [self.return_data_model(), self.return_report(), self.return_report()]
+        mocked_get.side_effect = [
+            self.return_data_model(),
+            self.return_measurements(),
+            self.return_report(),
+            self.return_measurements(dict(start=self.history, end=self.history)),
+            self.return_report(),
+        ]
         mocked_sleep.side_effect = [None, RuntimeError]
         try:
             await notify()
@@ -132,6 +143,24 @@ class NotifyTests(unittest.IsolatedAsyncioTestCase):
             pass
         mocked_send.assert_not_called()
 
+    @patch("asyncio.sleep")
+    @patch("aiohttp.ClientSession.get")
+    async def test_no_new_measurements(self, mocked_get, mocked_sleep):
+        """Test that the reports are not retrieved again if there are no new measurements."""
+        mocked_get.side_effect = [
+            self.return_data_model(),
+            self.return_measurements(),
+            self.return_report(),
+            self.return_measurements(),
+        ]
+        mocked_sleep.side_effect = [None, RuntimeError]
+        try:
+            await notify()
+        except RuntimeError:
+            pass
+        self.assertEqual(4, mocked_get.call_count)
+        self.assertEqual(dict(since="2020-01-02T00:00:00+00:00"), mocked_get.call_args[1]["params"])
+
     @patch("outbox.Outbox.send_notifications")
     @patch("asyncio.sleep")
     @patch("aiohttp.ClientSession.get")
@@ -149,7 +178,13 @@ class NotifyTests(unittest.IsolatedAsyncioTestCase):
         report2["subjects"]["subject1"]["metrics"]["metric1"]["recent_measurements"].append(
             dict(start=now, end=now, count=dict(status="target_not_met", value="10"))
         )
-        mocked_get.side_effect = [self.return_data_model(), self.return_report(report), self.return_report(report2)]
+        mocked_get.side_effect = [
+            self.return_data_model(),
+            self.return_measurements(),
+            self.return_report(report),
+            self.return_measurements(dict(start=now, end=now)),
+            self.return_report(report2),
+        ]
         mocked_sleep.side_effect = [None, RuntimeError]
         try:
             await notify()
@@ -185,7 +220,12 @@ class NotifyTests(unittest.IsolatedAsyncioTestCase):
                 )
             ),
         )
-        mocked_get.side_effect = [self.return_data_model(), self.return_report(report), self.return_report(report)]
+        mocked_get.side_effect = [
+            self.return_data_model(),
+            self.return_measurements(),
+            self.return_report(report),
+            self.return_measurements(),
+        ]
         mocked_sleep.side_effect = [None, RuntimeError]
         try:
             await notify()
@@ -224,7 +264,13 @@ class NotifyTests(unittest.IsolatedAsyncioTestCase):
         report2["subjects"]["subject1"]["metrics"]["metric1"]["recent_measurements"].append(
             dict(start=now, end=now, count=dict(status="target_met", value="10"))
         )
-        mocked_get.side_effect = [self.return_data_model(), self.return_report(report), self.return_report(report2)]
+        mocked_get.side_effect = [
+            self.return_data_model(),
+            self.return_measurements(),
+            self.return_report(report),
+            self.return_measurements(dict(start=now, end=now)),
+            self.return_report(report2),
+        ]
         mocked_sleep.side_effect = [None, RuntimeError]
         try:
             await notify()
@@ -32,6 +32,7 @@ check_values  # unused function (/Users/fniessink/Developer/quality-time/compone
 check_api_values  # unused function (/Users/fniessink/Developer/quality-time/components/server/src/data/meta/parameter.py:82)
 check_parameters  # unused function (/Users/fniessink/Developer/quality-time/components/server/src/data/meta/source.py:34)
 check_sources  # unused function (/Users/fniessink/Developer/quality-time/components/server/src/data/meta/source.py:56)
+max_connections_per_host  # unused variable (/Users/fniessink/Developer/quality-time/components/server/src/data_model/meta/source.py:33)
 DOWNVOTES  # unused variable (/Users/fniessink/Developer/quality-time/components/server/src/data/meta/unit.py:15)
 min_value  # unused variable (/Users/fniessink/Developer/quality-time/components/server/src/data/parameters.py:28)
 check_unit  # unused function (/Users/fniessink/Developer/quality-time/components/server/src/data/parameters.py:30)
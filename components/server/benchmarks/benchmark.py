@@ -0,0 +1,234 @@
+"""Benchmark the latency and memory use of the server's hot routes against a synthetic database.
+
+Run from the components/server folder, for example: ci/benchmark.sh --scale small --output results.json
+"""
+
+# isort: off
+from gevent import monkey  # pylint: disable=import-error
+
+monkey.patch_all()  # Patch like the server does, so the routes run as they would in production
+
+# isort: on
+# pylint: disable=wrong-import-order,wrong-import-position
+
+import argparse
+import io
+import json
+import logging
+import random
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import bottle
+import pymongo
+from pymongo.database import Database
+
+from initialization import init_bottle
+from synthetic_database import SCALES, SyntheticDatabase, generate
+
+
+@dataclass
+class Request:
+    """Request to send to the server."""
+
+    method: str
+    path: str
+    json: Optional[dict] = None
+
+
+# Scenarios map route names to functions that return a request to the route, given the synthetic database, a random
+# generator to pick items to request, and the index of the call:
+Scenario = Callable[[SyntheticDatabase, random.Random, int], Request]
+
+
+# The number of measurements per posted batch, the default batch size of the collector:
+MEASUREMENT_BATCH_SIZE = 10
+
+
+def post_measurements(synthetic: SyntheticDatabase, rng: random.Random, index: int) -> Request:
+    """Return a request to post a batch of measurements, like the collector does.
+
+    Alternate batches of new and unchanged measurements, to both insert and merge.
+    """
+    value = str(index // 2)
+    measurements = []
+    for metric_uuid in rng.sample(synthetic.metric_uuids, min(MEASUREMENT_BATCH_SIZE, len(synthetic.metric_uuids))):
+        source: dict = dict(
+            source_uuid=synthetic.source_uuids[metric_uuid],
+            value=value,
+            total="100",
+            entities=[],
+            parse_error=None,
+            connection_error=None,
+            api_url=None,
+            landing_url=None,
+            content_hash=f"benchmark-{value}",
+        )
+        measurements.append(dict(metric_uuid=metric_uuid, has_error=False, sources=[source]))
+    return Request("POST", "/internal-api/v3/measurements/batch", dict(measurements=measurements))
+
+
+SCENARIOS: dict[str, Scenario] = dict(
+    get_reports=lambda synthetic, rng, index: Request("GET", "/api/v3/report"),
+    get_report=lambda synthetic, rng, index: Request("GET", f"/api/v3/report/{rng.choice(synthetic.report_uuids)}"),
+    get_metrics=lambda synthetic, rng, index: Request("GET", "/internal-api/v3/metrics"),
+    post_measurements=post_measurements,
+    get_measurements=lambda synthetic, rng, index: Request(
+        "GET", f"/api/v3/measurements/{rng.choice(synthetic.metric_uuids)}"
+    ),
+    get_subject_measurements=lambda synthetic, rng, index: Request(
+        "GET", f"/api/v3/subject/{rng.choice(synthetic.subject_uuids)}/measurements"
+    ),
+    get_changelog=lambda synthetic, rng, index: Request("GET", "/api/v3/changelog/10"),
+    get_report_changelog=lambda synthetic, rng, index: Request(
+        "GET", f"/api/v3/changelog/report/{rng.choice(synthetic.report_uuids)}/10"
+    ),
+    get_metric_changelog=lambda synthetic, rng, index: Request(
+        "GET", f"/api/v3/changelog/metric/{rng.choice(synthetic.metric_uuids)}/10"
+    ),
+)
+
+
+@dataclass
+class Result:  # pylint: disable=too-many-instance-attributes
+    """Benchmark result of one route."""
+
+    route: str
+    calls: int
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+    peak_memory_mb: float
+    response_kb: float
+
+
+def send(request: Request) -> bytes:
+    """Send the request to the bottle application, with all plugins applied, and return the response body."""
+    body = json.dumps(request.json).encode() if request.json is not None else b""
+    environ: dict = dict(
+        REQUEST_METHOD=request.method,
+        PATH_INFO=request.path,
+        QUERY_STRING="",
+        SERVER_NAME="benchmark",
+        SERVER_PORT="5001",
+        CONTENT_TYPE="application/json",
+        CONTENT_LENGTH=str(len(body)),
+        HTTP_ACCEPT_ENCODING="identity",
+    )
+    errors = io.StringIO()
+    environ.update({"wsgi.input": io.BytesIO(body), "wsgi.url_scheme": "http", "wsgi.errors": errors})
+    statuses = []
+    chunks = bottle.default_app()(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    response = b"".join(chunks)
+    if hasattr(chunks, "close"):
+        chunks.close()
+    if not statuses[0].startswith("2"):
+        raise RuntimeError(f"{request.method} {request.path} failed: {statuses[0]}\n{errors.getvalue()}")
+    return response
+
+
+def benchmark(route: str, synthetic: SyntheticDatabase, calls: int, warmup: int, seed: int) -> Result:
+    """Benchmark the route and return the latency percentiles and peak memory use."""
+    rng = random.Random(seed)
+    scenario = SCENARIOS[route]
+    for index in range(warmup):  # Fill the caches, as they would be on a running server
+        send(scenario(synthetic, rng, index))
+    durations, response_sizes = [], []
+    for index in range(warmup, warmup + calls):
+        request = scenario(synthetic, rng, index)
+        start = time.perf_counter()
+        response_sizes.append(len(send(request)))
+        durations.append((time.perf_counter() - start) * 1000)
+    # Measure the memory use separately, because tracing memory allocations slows down the routes considerably:
+    tracemalloc.start()
+    send(scenario(synthetic, rng, warmup + calls))
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    percentiles = statistics.quantiles(durations, n=100, method="inclusive") if len(durations) > 1 else durations * 99
+    return Result(
+        route=route,
+        calls=calls,
+        p50_ms=round(percentiles[49], 2),
+        p90_ms=round(percentiles[89], 2),
+        p99_ms=round(percentiles[98], 2),
+        max_ms=round(max(durations), 2),
+        peak_memory_mb=round(peak_memory / 1024**2, 2),
+        response_kb=round(statistics.mean(response_sizes) / 1024, 1),
+    )
+
+
+def connect(database_url: str) -> Database:
+    """Return the benchmark database, in MongoDB if a database URL is given, and in mongomock otherwise."""
+    if database_url:
+        return pymongo.MongoClient(database_url).quality_time_benchmark_db
+    import mongomock  # pylint: disable=import-outside-toplevel
+
+    return mongomock.MongoClient().quality_time_benchmark_db
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES.keys(), default="small", help="size of the synthetic database")
+    for key in asdict(SCALES["small"]):
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, help=f"override the {key.replace('_', ' ')}")
+    parser.add_argument(
+        "--database-url",
+        default="",
+        help="URL of the MongoDB to benchmark against, its benchmark database is dropped first; if no URL is given, "
+        "mongomock is used and routes that use aggregation stages mongomock doesn't support are skipped",
+    )
+    parser.add_argument("--routes", nargs="+", choices=SCENARIOS.keys(), default=list(SCENARIOS), help="routes")
+    parser.add_argument("--calls", type=int, default=20, help="number of measured calls per route")
+    parser.add_argument("--warmup", type=int, default=1, help="number of unmeasured calls per route")
+    parser.add_argument("--seed", type=int, default=0, help="seed for generating the database and picking items")
+    parser.add_argument("--output", type=argparse.FileType("w"), help="write the results to this file as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Generate the synthetic database, benchmark the routes, and report the results."""
+    logging.getLogger().setLevel(logging.INFO)
+    arguments = parse_arguments()
+    scale = SCALES[arguments.scale]
+    scale = type(scale)(**{key: getattr(arguments, key) or value for key, value in asdict(scale).items()})
+    database = connect(arguments.database_url)
+    database.client.drop_database(database.name)
+    logging.info("Generating %d metrics with %d measurements", scale.nr_metrics(), scale.nr_measurements())
+    synthetic = generate(database, scale, arguments.seed)
+    init_bottle(database)
+    bottle.default_app().catchall = False  # Let exceptions propagate, so unsupported mongomock features can be detected
+    logging.getLogger().setLevel(logging.WARNING)  # Don't log the requests
+    print(f"{'route':<26}{'calls':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'peak MB':>10}{'KB':>10}")
+    results, skipped, failures = [], {}, {}
+    for route in arguments.routes:
+        try:
+            result = benchmark(route, synthetic, arguments.calls, arguments.warmup, arguments.seed)
+        except Exception as reason:  # pylint: disable=broad-except
+            message = (str(reason).strip() or reason.__class__.__name__).splitlines()[-1]
+            if isinstance(reason, NotImplementedError) and not arguments.database_url:
+                # Mongomock raises NotImplementedError for aggregation stages and operators it doesn't support:
+                skipped[route] = message
+                print(f"{route:<26} skipped: {message}")
+            else:
+                failures[route] = message
+                print(f"{route:<26} failed: {message}")
+            continue
+        results.append(result)
+        print(
+            f"{result.route:<26}{result.calls:>7}{result.p50_ms:>10}{result.p90_ms:>10}{result.p99_ms:>10}"
+            f"{result.max_ms:>10}{result.peak_memory_mb:>10}{result.response_kb:>10}"
+        )
+    if arguments.output:
+        results_json = [asdict(result) for result in results]
+        output = dict(scale=asdict(scale), results=results_json, skipped=skipped, failures=failures)
+        json.dump(output, arguments.output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Synthetic databases for benchmarking the server."""
+
+import json
+import logging
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from pymongo.database import Database
+
+from database.datamodels import (
+    default_metric_attributes,
+    default_source_parameters,
+    default_subject_attributes,
+    latest_datamodel,
+)
+from database.measurements import measurement_buckets
+from initialization.database import create_indexes
+from initialization.datamodel import import_datamodel
+from initialization.report import initialize_reports_overview
+from model.measurement import Measurement
+from model.metric import Metric
+from server_utilities.functions import md5_hash
+
+
+# Time between the synthetic measurements of a metric:
+MEASUREMENT_INTERVAL = timedelta(hours=4)
+# Chance that the value of a metric changes between two consecutive measurements:
+VALUE_CHANGE_PROBABILITY = 0.2
+# Number of metric types used for the synthetic metrics:
+NR_METRIC_TYPES = 10
+
+
+@dataclass
+class Scale:  # pylint: disable=too-many-instance-attributes
+    """Size of a synthetic database."""
+
+    reports: int = 10
+    subjects_per_report: int = 5
+    metrics_per_subject: int = 20
+    measurements_per_metric: int = 100
+    entities_per_measurement: int = 10
+
+    def nr_metrics(self) -> int:
+        """Return the total number of metrics."""
+        return self.reports * self.subjects_per_report * self.metrics_per_subject
+
+    def nr_measurements(self) -> int:
+        """Return the total number of measurements."""
+        return self.nr_metrics() * self.measurements_per_metric
+
+
+# Predefined scales, from a small database to quickly check the benchmark to a large database with 1000 reports, 50000
+# metrics, and 10 million measurements:
+SCALES = dict(
+    small=Scale(reports=10, subjects_per_report=2, metrics_per_subject=10, measurements_per_metric=100),
+    medium=Scale(reports=100, subjects_per_report=3, metrics_per_subject=10, measurements_per_metric=300),
+    large=Scale(reports=1000, subjects_per_report=5, metrics_per_subject=10, measurements_per_metric=200),
+)
+
+
+@dataclass
+class SyntheticDatabase:
+    """Uuids of the generated reports, subjects, and metrics, so benchmarks can pick items to request."""
+
+    report_uuids: list[str] = field(default_factory=list)
+    subject_uuids: list[str] = field(default_factory=list)
+    metric_uuids: list[str] = field(default_factory=list)
+    source_uuids: dict[str, str] = field(default_factory=dict)  # Source uuid per metric uuid
+
+
+def generate(database: Database, scale: Scale, seed: int = 0) -> SyntheticDatabase:
+    """Fill the database with synthetic reports and measurements, reproducibly for the same scale and seed."""
+    rng = random.Random(seed)
+    import_datamodel(database)
+    initialize_reports_overview(database)
+    data_model = latest_datamodel(database)
+    metric_types = [key for key, metric in data_model["metrics"].items() if metric.get("default_source")]
+    metric_types = rng.sample(metric_types, min(NR_METRIC_TYPES, len(metric_types)))
+    synthetic = SyntheticDatabase()
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    for report_index in range(scale.reports):
+        report_uuid = _uuid(rng)
+        subjects = {}
+        for subject_index in range(scale.subjects_per_report):
+            subject_uuid = _uuid(rng)
+            subject = default_subject_attributes(database) | dict(name=f"Subject {subject_index}")
+            for metric_index in range(scale.metrics_per_subject):
+                metric_uuid, source_uuid = _uuid(rng), _uuid(rng)
+                metric_type = metric_types[metric_index % len(metric_types)]
+                source_type = data_model["metrics"][metric_type]["default_source"]
+                source = dict(
+                    type=source_type,
+                    name=None,
+                    parameters=default_source_parameters(database, metric_type, source_type)
+                    | dict(url=f"https://{source_type}.example.org"),
+                )
+                metric = default_metric_attributes(database, metric_type) | dict(sources={source_uuid: source})
+                subject["metrics"][metric_uuid] = metric
+                _insert_measurements(database, scale, rng, now, Metric(data_model, metric, metric_uuid), source_uuid)
+                synthetic.metric_uuids.append(metric_uuid)
+                synthetic.source_uuids[metric_uuid] = source_uuid
+            subjects[subject_uuid] = subject
+            synthetic.subject_uuids.append(subject_uuid)
+        database.reports.insert_one(
+            dict(
+                report_uuid=report_uuid,
+                title=f"Report {report_index}",
+                subjects=subjects,
+                timestamp=now.isoformat(),
+                delta=dict(description=f"Benchmark created report {report_index}.", email="", uuids=[report_uuid]),
+                last=True,
+                version=1,
+            )
+        )
+        synthetic.report_uuids.append(report_uuid)
+        logging.info("Generated report %d of %d", report_index + 1, scale.reports)
+    create_indexes(database)
+    return synthetic
+
+
+def _insert_measurements(  # pylint: disable=too-many-arguments
+    database: Database, scale: Scale, rng: random.Random, now: datetime, metric: Metric, source_uuid: str
+) -> None:
+    """Insert the measurements of the metric, and the measurement buckets with the compact history."""
+    if not scale.measurements_per_metric:
+        return
+    templates: dict[int, dict] = {}  # Measurements are the same, except for start and end, if the value is the same
+    value = rng.randint(0, 2 * scale.entities_per_measurement)
+    measurements = []
+    for index in range(scale.measurements_per_metric, 0, -1):
+        if rng.random() < VALUE_CHANGE_PROBABILITY:
+            value = rng.randint(0, 2 * scale.entities_per_measurement)
+        if value not in templates:
+            templates[value] = _measurement(metric, source_uuid, value, scale.entities_per_measurement)
+        start = now - index * MEASUREMENT_INTERVAL
+        end = start + MEASUREMENT_INTERVAL - timedelta(seconds=1)
+        measurements.append(templates[value] | dict(start=start.isoformat(), end=end.isoformat()))
+    measurements[-1]["end"] = now.isoformat()
+    database.measurements.insert_many(measurements, ordered=False)
+    database.measurement_buckets.insert_many(list(measurement_buckets(measurements)), ordered=False)
+
+
+def _measurement(metric: Metric, source_uuid: str, value: int, nr_entities: int) -> dict:
+    """Return a measurement of the metric with the value, as the server would store it."""
+    entities = [
+        dict(key=f"entity-{index}", name=f"Entity {index}", description="Synthetic entity " * 5)
+        for index in range(min(value, nr_entities))
+    ]
+    source = dict(
+        source_uuid=source_uuid,
+        value=str(value),
+        total="100",
+        entities=entities,
+        parse_error=None,
+        connection_error=None,
+        api_url=None,
+        landing_url=None,
+    )
+    source["content_hash"] = md5_hash(json.dumps(source, sort_keys=True))
+    measurement = Measurement(metric, dict(metric_uuid=metric.uuid, has_error=False, sources=[source]))
+    measurement.update_measurement()
+    return dict(json.loads(json.dumps(measurement)))  # Convert the model objects to plain dicts
+
+
+def _uuid(rng: random.Random) -> str:
+    """Return a random, but reproducible, uuid."""
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
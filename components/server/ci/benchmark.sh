@@ -0,0 +1,5 @@
+#!/bin/sh
+
+# For Windows compatibility; prevent path from ending with a ':'
+export PYTHONPATH=`python -c 'import sys;print(":".join(sys.argv[1:]))' src benchmarks $PYTHONPATH`
+python benchmarks/benchmark.py "$@"
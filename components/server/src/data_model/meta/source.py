@@ -30,6 +30,7 @@ class Source(DescribedModel):  # pylint: disable=too-few-public-methods
     configuration: Optional[Configurations] = None
     parameters: Parameters
     entities: Entities = cast(Entities, {})
+    max_connections_per_host: int = Field(8, gt=0)  # Maximum number of concurrent requests the collector makes
 
     @validator("parameters")
     def check_parameters(cls, parameters, values):  # pylint: disable=no-self-argument,no-self-use
@@ -43,6 +43,7 @@ JENKINS = Source(
     name="Jenkins",
     description="Jenkins is an open source continuous integration/continuous deployment server.",
     url="https://jenkins.io/",
+    max_connections_per_host=4,
     parameters=dict(
         inactive_days=Days(
             name="Number of days without builds after which to consider CI-jobs unused.",
@@ -98,6 +99,7 @@ JENKINS_TEST_REPORT = Source(
     name="Jenkins test report",
     description="A Jenkins job with test results.",
     url="https://plugins.jenkins.io/junit",
+    max_connections_per_host=4,
     parameters=dict(
         test_result=TestResult(values=["failed", "passed", "skipped"]),
         **jenkins_access_parameters(
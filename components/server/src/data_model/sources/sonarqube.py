@@ -73,6 +73,7 @@ SONARQUBE = Source.parse_obj(
         "automatic reviews with static analysis of code to detect bugs, code smells, and security "
         "vulnerabilities on 20+ programming languages.",
         url="https://www.sonarqube.org",
+        max_connections_per_host=4,
         configuration=dict(
             commented_out_rules=dict(
                 metrics=["commented_out_code"],
@@ -0,0 +1,50 @@
+"""Caches of database contents, kept per database object."""
+
+import weakref
+from typing import Generic, Optional, TypeVar
+
+from pymongo.database import Database
+
+
+Value = TypeVar("Value")
+
+
+class DatabaseCache(Generic[Value]):
+    """Cache that keeps one value per database object, for as long as the database object exists.
+
+    The values are keyed by the identity of the database object instead of by the database object itself, because
+    hashing a pymongo database requires a connection to the database server.
+
+    The generation of the cache is increased whenever cached values are invalidated. Callers that read a value from the
+    database compare the generation before and after reading, so a value read before the invalidation is not stored.
+    """
+
+    def __init__(self) -> None:
+        self.__values: dict[int, tuple[weakref.ref, Value]] = {}
+        self.__generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Return the generation of the cache."""
+        return self.__generation
+
+    def get(self, database: Database) -> Optional[Value]:
+        """Return the cached value for the database, if any."""
+        if (entry := self.__values.get(id(database))) and entry[0]() is database:
+            return entry[1]
+        return None
+
+    def set(self, database: Database, value: Value) -> Value:
+        """Cache the value for the database and return it."""
+        key = id(database)
+        self.__values[key] = (weakref.ref(database, lambda _ref: self.__values.pop(key, None)), value)
+        return value
+
+    def clear(self, database: Database) -> None:
+        """Remove the cached value for the database."""
+        self.__values.pop(id(database), None)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Increase the generation of the cache so values read before now are not stored."""
+        self.__generation += 1
@@ -0,0 +1,166 @@
+"""Change feed of the measurements collection."""
+
+import logging
+import queue
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Optional, get_args
+
+import pymongo
+from pymongo.database import Database
+from pymongo.errors import OperationFailure, PyMongoError
+
+from server_utilities.functions import iso_timestamp
+from server_utilities.type import Scale
+from .caches import DatabaseCache
+
+
+# Seconds between queries for changed measurements if the database doesn't support change streams, and between retries
+# after errors:
+POLL_INTERVAL = 10
+
+# Measurement fields needed to describe the changes:
+CHANGE_FIELDS = ["metric_uuid", "start", "end", "count.status", "percentage.status", "version_number.status"]
+
+
+class Subscription:
+    """Subscription to the change feed."""
+
+    def __init__(self) -> None:
+        self.__queue: queue.SimpleQueue[dict] = queue.SimpleQueue()
+
+    def put(self, change: dict) -> None:
+        """Add the change to the changes not yet retrieved."""
+        self.__queue.put(change)
+
+    def changes(self) -> list[dict]:
+        """Return the changes since the previous call, without waiting for new changes."""
+        changes = []
+        while not self.__queue.empty():
+            changes.append(self.__queue.get())
+        return changes
+
+
+class ChangeFeed:
+    """Change feed of the measurements collection of one database.
+
+    One watcher thread watches the measurements collection and passes the changes to all subscribers, so the load on the
+    database doesn't depend on the number of subscribers. The watcher uses a change stream if the database supports it,
+    and otherwise falls back to regularly querying for measurements whose end changed. The watcher runs only while
+    there are subscribers.
+    """
+
+    def __init__(self, database: Database) -> None:
+        self.__database = database
+        self.__subscriptions: set[Subscription] = set()
+        self.__lock = threading.Lock()  # Protects the subscriptions and the watcher
+        self.__watcher: Optional[threading.Thread] = None
+        self.__stop_watcher = threading.Event()
+
+    @contextmanager
+    def subscribe(self) -> Iterator[Subscription]:
+        """Subscribe to the change feed, starting the watcher if it's not running yet.
+
+        When the last subscriber unsubscribes, the watcher is stopped.
+        """
+        subscription = Subscription()
+        with self.__lock:
+            self.__subscriptions.add(subscription)
+            if self.__watcher is None:
+                # Each watcher gets its own stop event, so a stopping watcher can't be restarted by accident:
+                self.__stop_watcher = threading.Event()
+                self.__watcher = threading.Thread(
+                    target=self.__watch, args=(self.__stop_watcher,), name="measurement change feed", daemon=True
+                )
+                self.__watcher.start()
+        try:
+            yield subscription
+        finally:
+            with self.__lock:
+                self.__subscriptions.discard(subscription)
+                if not self.__subscriptions and self.__watcher is not None:
+                    self.__stop_watcher.set()  # The watcher stops the next time it checks the stop event
+                    self.__watcher = None
+
+    def publish(self, operation: str, measurement: dict) -> None:
+        """Pass the change of the measurement to the subscribers.
+
+        The change has the status of the measurement per scale, so the change can be described using just the
+        measurement document. Subscribers pick the status of the scale of the metric.
+        """
+        change = dict(
+            operation=operation,
+            metric_uuid=measurement["metric_uuid"],
+            statuses={scale: measurement[scale].get("status") for scale in get_args(Scale) if scale in measurement},
+            start=measurement["start"],
+            end=measurement["end"],
+        )
+        for subscription in list(self.__subscriptions):
+            subscription.put(change)
+
+    def __watch(self, stop: threading.Event) -> None:
+        """Watch the measurements collection until stopped, using a change stream if the database supports it."""
+        use_change_stream = True
+        while not stop.is_set():
+            try:
+                if use_change_stream:
+                    self.watch_change_stream(stop)
+                else:
+                    self.poll(stop)
+            except OperationFailure as reason:
+                if use_change_stream:
+                    logging.info("Can't use a change stream to watch the measurements (%s), polling instead", reason)
+                    use_change_stream = False
+                else:
+                    logging.error("Polling the measurements failed: %s", reason)
+                    stop.wait(POLL_INTERVAL)
+            except PyMongoError as reason:
+                logging.error("Watching the measurements failed: %s", reason)
+                stop.wait(POLL_INTERVAL)
+
+    def watch_change_stream(self, stop: threading.Event) -> None:
+        """Pass the inserted and updated measurements from the change stream to the subscribers, until stopped."""
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["insert", "update"]}}},
+            {"$project": {"operationType": True, **{f"fullDocument.{field}": True for field in CHANGE_FIELDS}}},
+        ]
+        # Wait at most a second for changes, so the stop event is checked regularly:
+        with self.__database.measurements.watch(
+            pipeline, full_document="updateLookup", max_await_time_ms=1000
+        ) as change_stream:
+            while change_stream.alive and not stop.is_set():
+                if (change := change_stream.try_next()) and (measurement := change.get("fullDocument")):
+                    self.publish(change["operationType"], measurement)
+
+    def poll(self, stop: threading.Event, polls: Optional[int] = None) -> None:
+        """Regularly query for measurements that were added or whose end changed and pass them to the subscribers.
+
+        Measurements that start after the previous query are inserted, the others are updated. Keep polling until
+        stopped, or until the number of polls, if given, is done.
+        """
+        since = iso_timestamp()
+        seen: set[tuple] = set()  # Measurements already passed on that end at the since timestamp
+        while (polls is None or polls > 0) and not stop.wait(POLL_INTERVAL):
+            measurements = list(
+                self.__database.measurements.find(
+                    filter={"end": {"$gte": since}}, sort=[("end", pymongo.ASCENDING)], projection=CHANGE_FIELDS
+                )
+            )
+            for measurement in measurements:
+                if (measurement["_id"], measurement["end"]) not in seen:
+                    self.publish("insert" if measurement["start"] >= since else "update", measurement)
+            if measurements:
+                since = measurements[-1]["end"]
+                seen = {(measurement["_id"], since) for measurement in measurements if measurement["end"] == since}
+            if polls is not None:
+                polls -= 1
+
+
+# The change feed per database:
+_change_feeds: DatabaseCache[ChangeFeed] = DatabaseCache()
+
+
+def change_feed(database: Database) -> ChangeFeed:
+    """Return the change feed of the measurements collection of the database."""
+    return _change_feeds.get(database) or _change_feeds.set(database, ChangeFeed(database))
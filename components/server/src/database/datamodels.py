@@ -1,19 +1,53 @@
 """Data models collection."""
 
-from typing import Any
+import copy
+from collections import OrderedDict
+from typing import Any, cast
 
 import pymongo
 from pymongo.database import Database
 
 from server_utilities.functions import iso_timestamp
+from server_utilities.read_only import ReadOnlyDict, read_only
+from .caches import DatabaseCache
+
+
+# Sort order:
+TIMESTAMP_DESCENDING = [("timestamp", pymongo.DESCENDING)]
+
+# The data model only changes when the server inserts a new one at startup, so cache the latest data model until a new
+# one is inserted. Data models used for past report dates are cached by timestamp, least recently used first:
+MAX_CACHED_PAST_DATAMODELS = 8
+_latest_datamodels: DatabaseCache[ReadOnlyDict] = DatabaseCache()
+_past_datamodels: DatabaseCache["OrderedDict[str, ReadOnlyDict]"] = DatabaseCache()
 
 
 def latest_datamodel(database: Database, max_iso_timestamp: str = ""):
-    """Return the latest data model."""
-    timestamp_filter = dict(timestamp={"$lte": max_iso_timestamp}) if max_iso_timestamp else None
-    if data_model := database.datamodels.find_one(timestamp_filter, sort=[("timestamp", pymongo.DESCENDING)]):
+    """Return a read-only view of the latest data model."""
+    if not max_iso_timestamp:
+        if (data_model := _latest_datamodels.get(database)) is None and (data_model := _find_datamodel(database)):
+            _latest_datamodels.set(database, data_model)
+        return data_model or {}
+    timestamp_filter = dict(timestamp={"$lte": max_iso_timestamp})
+    projection = dict(_id=False, timestamp=True)
+    if not (timestamp := database.datamodels.find_one(timestamp_filter, projection, sort=TIMESTAMP_DESCENDING)):
+        return {}
+    past_datamodels = _past_datamodels.get(database) or _past_datamodels.set(database, OrderedDict())
+    key = timestamp.get("timestamp", "")
+    if key in past_datamodels:
+        past_datamodels.move_to_end(key)
+    elif data_model := _find_datamodel(database, timestamp_filter):
+        past_datamodels[key] = data_model
+        if len(past_datamodels) > MAX_CACHED_PAST_DATAMODELS:
+            past_datamodels.popitem(last=False)
+    return past_datamodels.get(key, {})
+
+
+def _find_datamodel(database: Database, timestamp_filter=None) -> ReadOnlyDict:
+    """Return a read-only version of the most recent data model in the database that matches the filter."""
+    if data_model := database.datamodels.find_one(timestamp_filter, sort=TIMESTAMP_DESCENDING):
         data_model["_id"] = str(data_model["_id"])
-    return data_model or {}
+    return cast(ReadOnlyDict, read_only(data_model or {}))
 
 
 def insert_new_datamodel(database: Database, data_model):
@@ -21,13 +55,14 @@ def insert_new_datamodel(database: Database, data_model):
     if "_id" in data_model:  # pragma: no cover-behave
         del data_model["_id"]
     data_model["timestamp"] = iso_timestamp()
+    _latest_datamodels.clear(database)
     return database.datamodels.insert_one(data_model)
 
 
 def default_source_parameters(database: Database, metric_type: str, source_type: str):
     """Return the source parameters with their default values for the specified metric."""
     parameters = latest_datamodel(database)["sources"].get(source_type, {}).get("parameters", {}).items()
-    return {key: value["default_value"] for key, value in parameters if metric_type in value["metrics"]}
+    return {key: copy.deepcopy(value["default_value"]) for key, value in parameters if metric_type in value["metrics"]}
 
 
 def default_metric_attributes(database: Database, metric_type: str = ""):
@@ -51,7 +86,7 @@ def default_metric_attributes(database: Database, metric_type: str = ""):
         direction=None,
         target=defaults["target"],
         near_target=defaults["near_target"],
-        tags=defaults["tags"],
+        tags=list(defaults["tags"]),
     )
 
 
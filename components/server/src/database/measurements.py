@@ -1,15 +1,134 @@
 """Measurements collection."""
 
+import time
+from collections.abc import Iterable, Iterator, Sequence
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, get_args
 
 import pymongo
+from bson.objectid import ObjectId
+from pymongo import InsertOne, UpdateMany, UpdateOne
 from pymongo.database import Database
 
 from model.measurement import Measurement
 from model.metric import Metric
 from server_utilities.functions import iso_timestamp
-from server_utilities.type import MeasurementId, MetricId
+from server_utilities.read_only import ReadOnlyDict, read_only
+from server_utilities.type import MeasurementId, MetricId, Scale
+from .caches import DatabaseCache
+
+
+# Number of days of measurements that reports show:
+RECENT_MEASUREMENT_DAYS = 7
+
+# The measurement buckets contain the compact history of the measurements of a metric. Each bucket has an array of
+# measurement ids, start and end timestamps, and per scale an array for each of the scale fields below. The measurement
+# ids are needed to update the end of measurements. Buckets are filled with measurements until they are full:
+MEASUREMENTS_PER_BUCKET = 1000
+BUCKET_SCALES: tuple[Scale, ...] = get_args(Scale)
+BUCKET_SCALE_FIELDS = ("value", "status", "target", "near_target", "debt_target", "direction")
+
+# The end of unchanged measurements is updated every time the collector measures the metric again. To not write to the
+# measurement buckets for every unchanged measurement, the ends are written to the buckets in batches: when there are
+# MAX_PENDING_BUCKET_ENDS pending ends, when the oldest pending end is BUCKET_END_WRITE_INTERVAL seconds old, when
+# measurements are added to the buckets, and before the measurement history is read. The pending ends are kept per
+# server process, so another server process may read ends from the buckets that are at most the interval behind:
+MAX_PENDING_BUCKET_ENDS = 100
+BUCKET_END_WRITE_INTERVAL = 60  # Seconds
+
+# Date formats of the periods in which downsampled measurement histories are aggregated, by resolution:
+RESOLUTION_DATE_FORMATS = dict(day="%Y-%m-%d", week="%G-W%V", month="%Y-%m")
+
+
+class RecentMeasurements:
+    """The recent measurements, without entities, per metric.
+
+    The recent measurements are read from the database once and then kept up to date when measurements are inserted or
+    their end date and time is changed, so reports don't need to read all recent measurements from the database. Each
+    change of the measurements of a metric increases the version of the metric.
+    """
+
+    def __init__(self, measurements: Iterable[dict]) -> None:
+        self.__measurements: dict[MetricId, list[tuple[Optional[MeasurementId], ReadOnlyDict]]] = {}
+        self.__metric_uuids: dict[MeasurementId, MetricId] = {}
+        self.__versions: dict[MetricId, int] = {}
+        self.__version = 0
+        for measurement in measurements:
+            self.add(measurement)
+
+    def add(self, measurement: dict) -> None:
+        """Add the measurement."""
+        metric_uuid = measurement["metric_uuid"]
+        measurement_id = measurement.get("_id")
+        recent = {key: value for key, value in measurement.items() if key != "_id"}
+        if "sources" in recent:
+            recent["sources"] = [
+                {key: value for key, value in source.items() if key != "entities"} for source in recent["sources"]
+            ]
+        self.__measurements.setdefault(metric_uuid, []).append((measurement_id, read_only(recent)))
+        if measurement_id is not None:
+            self.__metric_uuids[measurement_id] = metric_uuid
+        self.__changed(metric_uuid)
+
+    def update_end(self, measurement_id: MeasurementId, end: str) -> bool:
+        """Set the end date and time of the measurement. Return whether the measurement is a recent measurement."""
+        if (metric_uuid := self.__metric_uuids.get(measurement_id)) is None:
+            return False
+        measurements = self.__measurements[metric_uuid]
+        for index in reversed(range(len(measurements))):  # The measurement to update is usually the last one
+            if measurements[index][0] == measurement_id:
+                measurements[index] = (measurement_id, ReadOnlyDict(measurements[index][1], end=end))
+                self.__changed(metric_uuid)
+                return True
+        return False  # pragma: no cover
+
+    def by_metric_uuid(self) -> dict[MetricId, list[ReadOnlyDict]]:
+        """Return the recent measurements per metric."""
+        return {metric_uuid: self.of_metric(metric_uuid) for metric_uuid in list(self.__measurements)}
+
+    def of_metric(self, metric_uuid: MetricId) -> list[ReadOnlyDict]:
+        """Return the recent measurements of the metric, removing the measurements that are no longer recent."""
+        measurements = self.__measurements.get(metric_uuid, [])
+        min_iso_timestamp = _min_recent_iso_timestamp()
+        pruned = False
+        while measurements and measurements[0][1]["end"] < min_iso_timestamp:
+            if (measurement_id := measurements.pop(0)[0]) is not None:
+                self.__metric_uuids.pop(measurement_id, None)
+            pruned = True
+        if not measurements:
+            self.__measurements.pop(metric_uuid, None)
+        if pruned:
+            self.__changed(metric_uuid)
+        return [measurement for _measurement_id, measurement in measurements]
+
+    def since(self, min_iso_timestamp: str) -> list[ReadOnlyDict]:
+        """Return the recent measurements, of all metrics, that end at or after the date and time, sorted by start."""
+        measurements = []
+        for metric_uuid in list(self.__measurements):
+            for measurement in reversed(self.of_metric(metric_uuid)):  # The measurements of a metric don't overlap
+                if measurement["end"] < min_iso_timestamp:
+                    break
+                measurements.append(measurement)
+        return sorted(measurements, key=lambda measurement: str(measurement["start"]))
+
+    def version(self, metric_uuid: MetricId) -> int:
+        """Return the version of the recent measurements of the metric."""
+        return self.__versions.get(metric_uuid, 0)
+
+    def __changed(self, metric_uuid: MetricId) -> None:
+        """Increase the version of the recent measurements of the metric."""
+        self.__version += 1
+        self.__versions[metric_uuid] = self.__version
+
+
+def _min_recent_iso_timestamp() -> str:
+    """Return the date and time after which measurements are recent."""
+    return (datetime.fromisoformat(iso_timestamp()) - timedelta(days=RECENT_MEASUREMENT_DAYS)).isoformat()
+
+
+# The recent measurements per database. The generation of the cache is increased whenever measurements are written so
+# recent measurements that were read before the write are not stored:
+_recent_measurements: DatabaseCache[RecentMeasurements] = DatabaseCache()
 
 
 def latest_measurement(database: Database, metric: Metric) -> Optional[Measurement]:
@@ -18,50 +137,340 @@ def latest_measurement(database: Database, metric: Metric) -> Optional[Measureme
     return None if latest is None else Measurement(metric, latest)
 
 
-def latest_successful_measurement(database: Database, metric: Metric) -> Optional[Measurement]:
-    """Return the latest successful measurement."""
-    latest_successful = database.measurements.find_one(
-        filter={"metric_uuid": metric.uuid, "has_error": False}, sort=[("start", pymongo.DESCENDING)]
+def latest_and_latest_successful_measurement(
+    database: Database, metric: Metric
+) -> tuple[Optional[Measurement], Optional[Measurement]]:
+    """Return the latest measurement and the latest successful measurement, using one aggregation.
+
+    The entities of the latest measurement are not returned, as comparing content hashes suffices to decide whether a
+    new measurement is equal to the latest measurement. Of the latest successful measurement, only the source uuids and
+    entity user data are returned, as that's all that is needed to copy the entity user data to new measurements.
+    """
+    latest = database.measurements.aggregate(
+        [
+            {"$match": {"metric_uuid": metric.uuid}},
+            {"$sort": {"start": pymongo.DESCENDING}},
+            {"$limit": 1},
+            {"$project": {"sources.entities": False}},
+            {
+                "$lookup": {
+                    "from": "measurements",
+                    "pipeline": [
+                        {"$match": {"metric_uuid": metric.uuid, "has_error": False}},
+                        {"$sort": {"start": pymongo.DESCENDING}},
+                        {"$limit": 1},
+                        {"$project": {"_id": False, "sources.source_uuid": True, "sources.entity_user_data": True}},
+                    ],
+                    "as": "latest_successful",
+                }
+            },
+        ]
+    )
+    if (latest_document := next(iter(latest), None)) is None:
+        return None, None
+    latest_successful = latest_document.pop("latest_successful")
+    return (
+        Measurement(metric, latest_document),
+        Measurement(metric, latest_successful[0]) if latest_successful else None,
+    )
+
+
+def latest_measurements(database: Database, *metrics: Metric, successful: bool = False) -> dict[MetricId, Measurement]:
+    """Return the latest (successful) measurement of each of the metrics, without entities, using one aggregation."""
+    if not metrics:
+        return {}
+    metrics_by_uuid = {metric.uuid: metric for metric in metrics}
+    measurement_filter: dict = {"metric_uuid": {"$in": list(metrics_by_uuid)}}
+    if successful:
+        measurement_filter["has_error"] = False
+    latest = database.measurements.aggregate(
+        [
+            {"$match": measurement_filter},
+            {"$sort": {"metric_uuid": pymongo.ASCENDING, "start": pymongo.DESCENDING}},
+            {"$group": {"_id": "$metric_uuid", "measurement": {"$first": "$$ROOT"}}},
+            {"$project": {"measurement.sources.entities": False}},
+        ]
+    )
+    return {item["_id"]: Measurement(metrics_by_uuid[item["_id"]], item["measurement"]) for item in latest}
+
+
+def recent_measurements(database: Database) -> RecentMeasurements:
+    """Return the recent measurements, reading them from the database if needed."""
+    if (cached := _recent_measurements.get(database)) is not None:
+        return cached
+    generation = _recent_measurements.generation
+    min_iso_timestamp = _min_recent_iso_timestamp()
+    recent = RecentMeasurements(
+        database.measurements.find(
+            filter={"end": {"$gte": min_iso_timestamp}},
+            sort=[("start", pymongo.ASCENDING)],
+            projection={"sources.entities": False},
+        )
     )
-    return None if latest_successful is None else Measurement(metric, latest_successful)
+    if generation == _recent_measurements.generation:
+        _recent_measurements.set(database, recent)
+    return recent
 
 
-def recent_measurements_by_metric_uuid(database: Database, max_iso_timestamp: str = "", days=7):
+def recent_measurements_by_metric_uuid(database: Database, max_iso_timestamp: str = "", days=RECENT_MEASUREMENT_DAYS):
     """Return all recent measurements."""
+    if not max_iso_timestamp and days == RECENT_MEASUREMENT_DAYS:
+        return recent_measurements(database).by_metric_uuid()
     max_iso_timestamp = max_iso_timestamp or iso_timestamp()
     min_iso_timestamp = (datetime.fromisoformat(max_iso_timestamp) - timedelta(days=days)).isoformat()
-    recent_measurements = database.measurements.find(
+    measurements = database.measurements.find(
         filter={"end": {"$gte": min_iso_timestamp}, "start": {"$lte": max_iso_timestamp}},
         sort=[("start", pymongo.ASCENDING)],
         projection={"_id": False, "sources.entities": False},
     )
     measurements_by_metric_uuid: dict[MetricId, list] = {}
-    for measurement in recent_measurements:
+    for measurement in measurements:
         measurements_by_metric_uuid.setdefault(measurement["metric_uuid"], []).append(measurement)
     return measurements_by_metric_uuid
 
 
+def measurements_since(database: Database, min_iso_timestamp: str = "") -> list:
+    """Return the measurements, without entities, that were added or whose end was updated at or after the timestamp.
+
+    Without timestamp, return the recent measurements.
+    """
+    min_iso_timestamp = min_iso_timestamp or _min_recent_iso_timestamp()
+    if min_iso_timestamp >= _min_recent_iso_timestamp():
+        return recent_measurements(database).since(min_iso_timestamp)
+    return list(
+        database.measurements.find(
+            filter={"end": {"$gte": min_iso_timestamp}},
+            sort=[("start", pymongo.ASCENDING)],
+            projection={"_id": False, "sources.entities": False},
+        )
+    )
+
+
+def measurement_history(
+    database: Database, *metric_uuids: MetricId, min_iso_timestamp: str = "", max_iso_timestamp: str = ""
+) -> Iterator[dict]:
+    """Return the compact history of the measurements of the metrics, read from the measurement buckets.
+
+    The measurements in the history only have a start and end timestamp and per scale the value, status, and targets.
+    """
+    _write_pending_bucket_ends(database)
+    bucket_filter: dict = {"metric_uuid": {"$in": list(metric_uuids)}}
+    if min_iso_timestamp:
+        bucket_filter["last_end"] = {"$gt": min_iso_timestamp}
+    if max_iso_timestamp:
+        bucket_filter["first_start"] = {"$lt": max_iso_timestamp}
+    buckets = database.measurement_buckets.find(
+        bucket_filter,
+        sort=[("metric_uuid", pymongo.ASCENDING), ("first_start", pymongo.ASCENDING)],
+        projection={"_id": False, "measurement_ids": False},
+    )
+    for bucket in buckets:
+        for index, (start, end) in enumerate(zip(bucket["start"], bucket["end"])):
+            if (min_iso_timestamp and end <= min_iso_timestamp) or (max_iso_timestamp and start >= max_iso_timestamp):
+                continue
+            measurement = dict(metric_uuid=bucket["metric_uuid"], start=start, end=end)
+            for scale in BUCKET_SCALES:
+                scale_fields = {field: bucket[scale][field][index] for field in BUCKET_SCALE_FIELDS}
+                if any(value is not None for value in scale_fields.values()):
+                    measurement[scale] = scale_fields
+            yield measurement
+
+
+def downsampled_measurement_history(
+    database: Database, metric_uuid: MetricId, scale: Scale, resolution: str, max_iso_timestamp: str = ""
+) -> list[dict]:
+    """Return the history of the measurements of the metric aggregated per day, week, or month.
+
+    Each aggregated measurement has the start of the first and the end of the last measurement in the period. For the
+    scale, it has the minimum and maximum value and the last value, status, targets, and direction in the period.
+    """
+    _write_pending_bucket_ends(database)
+    bucket_filter: dict = {"metric_uuid": metric_uuid}
+    measurement_filter: dict = {}
+    if max_iso_timestamp:
+        bucket_filter["first_start"] = measurement_filter["start"] = {"$lt": max_iso_timestamp}
+    scale_fields = {field: {"$arrayElemAt": [f"${scale}.{field}", "$index"]} for field in BUCKET_SCALE_FIELDS}
+    value = {"$convert": {"input": "$value", "to": "double", "onError": None, "onNull": None}}
+    pipeline = [
+        {"$match": bucket_filter},
+        {"$project": {"_id": False, "start": True, "end": True, scale: True}},
+        {"$unwind": {"path": "$start", "includeArrayIndex": "index"}},
+        {"$project": {"start": True, "end": {"$arrayElemAt": ["$end", "$index"]}, **scale_fields}},
+        {"$match": measurement_filter},
+        {"$sort": {"start": pymongo.ASCENDING}},
+        {
+            "$group": {
+                "_id": {
+                    "$dateToString": {
+                        "format": RESOLUTION_DATE_FORMATS[resolution],
+                        "date": {"$dateFromString": {"dateString": "$start"}},
+                    }
+                },
+                "start": {"$first": "$start"},
+                "end": {"$last": "$end"},
+                "min": {"$min": value},
+                "max": {"$max": value},
+                **{field: {"$last": f"${field}"} for field in BUCKET_SCALE_FIELDS},
+            }
+        },
+        {"$sort": {"start": pymongo.ASCENDING}},
+    ]
+    return [
+        {
+            "metric_uuid": metric_uuid,
+            "start": period["start"],
+            "end": period["end"],
+            scale: {field: period.get(field) for field in ("min", "max") + BUCKET_SCALE_FIELDS},
+        }
+        for period in database.measurement_buckets.aggregate(pipeline)
+    ]
+
+
+def history_resolution(database: Database, metric_uuid: MetricId, max_points: int) -> str:
+    """Return the finest resolution for which the history of the measurements of the metric has at most max points."""
+    first_bucket = database.measurement_buckets.find_one(
+        {"metric_uuid": metric_uuid}, sort=[("first_start", pymongo.ASCENDING)], projection=["first_start"]
+    )
+    if first_bucket is None:
+        return "day"
+    days = (datetime.fromisoformat(iso_timestamp()) - datetime.fromisoformat(first_bucket["first_start"])).days + 1
+    if days <= max_points:
+        return "day"
+    return "week" if days / 7 <= max_points else "month"
+
+
+def measurement_buckets(measurements: Iterable[dict]) -> Iterator[dict]:
+    """Group the measurements, sorted by metric and start, into measurement buckets."""
+    bucket: dict = {}
+    for measurement in measurements:
+        metric_uuid = measurement["metric_uuid"]
+        if bucket.get("metric_uuid") != metric_uuid or bucket["nr_measurements"] == MEASUREMENTS_PER_BUCKET:
+            if bucket:
+                yield bucket
+            bucket = dict(
+                metric_uuid=metric_uuid,
+                nr_measurements=0,
+                first_start=measurement["start"],
+                last_end=measurement["end"],
+                measurement_ids=[],
+                start=[],
+                end=[],
+            )
+            for scale in BUCKET_SCALES:
+                bucket[scale] = {field: [] for field in BUCKET_SCALE_FIELDS}
+        bucket["nr_measurements"] += 1
+        bucket["last_end"] = max(bucket["last_end"], measurement["end"])
+        for path, value in _bucket_fields(measurement).items():
+            if "." in path:
+                scale, field = path.split(".")
+                bucket[scale][field].append(value)
+            else:
+                bucket[path].append(value)
+    if bucket:
+        yield bucket
+
+
+def _bucket_fields(measurement) -> dict:
+    """Return the fields of the measurement that are kept in the measurement buckets, by path of the bucket array."""
+    fields = dict(measurement_ids=measurement["_id"], start=measurement["start"], end=measurement["end"])
+    for scale in BUCKET_SCALES:
+        scale_measurement = measurement.get(scale) or {}
+        for field in BUCKET_SCALE_FIELDS:
+            fields[f"{scale}.{field}"] = scale_measurement.get(field)
+    return fields
+
+
+def _add_to_bucket(measurement) -> UpdateOne:
+    """Return the update that adds the measurement to the last measurement bucket of its metric."""
+    return UpdateOne(
+        {"metric_uuid": measurement["metric_uuid"], "nr_measurements": {"$lt": MEASUREMENTS_PER_BUCKET}},
+        {
+            "$push": _bucket_fields(measurement),
+            "$inc": {"nr_measurements": 1},
+            "$min": {"first_start": measurement["start"]},
+            "$max": {"last_end": measurement["end"]},
+        },
+        upsert=True,
+    )
+
+
+def _update_end_in_bucket(measurement_id: MeasurementId, end: str) -> UpdateOne:
+    """Return the update that sets the end of the measurement in its measurement bucket."""
+    return UpdateOne({"measurement_ids": measurement_id}, {"$set": {"end.$": end}, "$max": {"last_end": end}})
+
+
+class PendingBucketEnds:
+    """The ends of measurements that have not been written to the measurement buckets yet."""
+
+    def __init__(self) -> None:
+        self.__ends: dict[MeasurementId, str] = {}
+        self.__since = 0.0
+
+    def add(self, measurement_id: MeasurementId, end: str) -> None:
+        """Add the end of the measurement, replacing the pending end of the measurement, if any."""
+        if not self.__ends:
+            self.__since = time.monotonic()
+        self.__ends[measurement_id] = end
+
+    def due(self) -> bool:
+        """Return whether the pending ends should be written to the measurement buckets."""
+        return len(self.__ends) >= MAX_PENDING_BUCKET_ENDS or (
+            bool(self.__ends) and time.monotonic() - self.__since >= BUCKET_END_WRITE_INTERVAL
+        )
+
+    def pop_updates(self) -> list[UpdateOne]:
+        """Remove the pending ends and return the updates that write them to the measurement buckets."""
+        ends, self.__ends = self.__ends, {}
+        return [_update_end_in_bucket(measurement_id, end) for measurement_id, end in ends.items()]
+
+
+# The pending measurement bucket ends per database:
+_pending_bucket_ends: DatabaseCache[PendingBucketEnds] = DatabaseCache()
+
+
+def _get_pending_bucket_ends(database: Database) -> PendingBucketEnds:
+    """Return the pending measurement bucket ends of the database."""
+    return _pending_bucket_ends.get(database) or _pending_bucket_ends.set(database, PendingBucketEnds())
+
+
+def _write_pending_bucket_ends(database: Database) -> None:
+    """Write the pending ends to the measurement buckets."""
+    if updates := _get_pending_bucket_ends(database).pop_updates():
+        database.measurement_buckets.bulk_write(updates)
+
+
 def measurements_by_metric(
     database: Database,
     *metric_uuids: MetricId,
     min_iso_timestamp: str = "",
     max_iso_timestamp: str = "",
-):
-    """Return all measurements for one metric, without the entities, except for the most recent one."""
+) -> Iterator[dict]:
+    """Yield all measurements for the metrics, sorted by start, without the entities, except for the most recent one.
+
+    The measurements are read with one sorted query and yielded one by one, so they don't need to be kept in memory.
+    Only the entities of the most recent measurement are read from the database.
+    """
     measurement_filter: dict = {"metric_uuid": {"$in": metric_uuids}}
     if min_iso_timestamp:
         measurement_filter["end"] = {"$gt": min_iso_timestamp}
     if max_iso_timestamp:
         measurement_filter["start"] = {"$lt": max_iso_timestamp}
-    latest_with_entities = database.measurements.find_one(
-        measurement_filter, sort=[("start", pymongo.DESCENDING)], projection={"_id": False}
-    )
-    if not latest_with_entities:
-        return []
-    all_measurements_without_entities = database.measurements.find(
-        measurement_filter, projection={"_id": False, "sources.entities": False}
+    measurements = iter(
+        database.measurements.find(
+            measurement_filter, sort=[("start", pymongo.ASCENDING)], projection={"sources.entities": False}
+        )
     )
-    return list(all_measurements_without_entities)[:-1] + [latest_with_entities]
+    first_measurement: Optional[dict] = next(measurements, None)
+    if first_measurement is None:
+        return
+    previous_measurement: dict = first_measurement
+    for measurement in measurements:
+        del previous_measurement["_id"]
+        yield previous_measurement
+        previous_measurement = measurement
+    latest_measurement_filter = {"_id": previous_measurement["_id"]}
+    if latest_with_entities := database.measurements.find_one(latest_measurement_filter, projection={"_id": False}):
+        yield latest_with_entities
 
 
 def count_measurements(database: Database) -> int:
@@ -71,7 +480,14 @@ def count_measurements(database: Database) -> int:
 
 def update_measurement_end(database: Database, measurement_id: MeasurementId):
     """Set the end date and time of the measurement to the current date and time."""
-    return database.measurements.update_one(filter={"_id": measurement_id}, update={"$set": {"end": iso_timestamp()}})
+    end = iso_timestamp()
+    result = database.measurements.update_one(filter={"_id": measurement_id}, update={"$set": {"end": end}})
+    pending_bucket_ends = _get_pending_bucket_ends(database)
+    pending_bucket_ends.add(measurement_id, end)
+    if pending_bucket_ends.due():
+        _write_pending_bucket_ends(database)
+    _update_recent_measurements_end(database, [measurement_id], end)
+    return result
 
 
 def insert_new_measurement(database: Database, measurement: Measurement) -> Measurement:
@@ -80,10 +496,61 @@ def insert_new_measurement(database: Database, measurement: Measurement) -> Meas
     if "_id" in measurement:
         del measurement["_id"]  # Remove the Mongo ID if present so this measurement can be re-inserted in the database.
     database.measurements.insert_one(measurement)
+    bucket_requests = [_add_to_bucket(measurement), *_get_pending_bucket_ends(database).pop_updates()]
+    database.measurement_buckets.bulk_write(bucket_requests)
+    _add_recent_measurements(database, measurement)
     del measurement["_id"]
     return measurement
 
 
+def insert_new_measurements(
+    database: Database, measurements: Sequence[Measurement], measurement_ids_to_update_end: Sequence[MeasurementId] = ()
+) -> None:
+    """Insert the new measurements and set the end date and time of the other measurements, in one bulk write."""
+    requests: list = []
+    for measurement in measurements:
+        measurement.update_measurement()
+        # Replace the Mongo ID if present so the measurement can be re-inserted, and so the measurement buckets can
+        # refer to the new measurement:
+        measurement["_id"] = ObjectId()
+        requests.append(InsertOne(measurement))
+    end = iso_timestamp()
+    if measurement_ids_to_update_end:
+        requests.append(UpdateMany({"_id": {"$in": list(measurement_ids_to_update_end)}}, {"$set": {"end": end}}))
+    if requests:
+        database.measurements.bulk_write(requests, ordered=False)
+        pending_bucket_ends = _get_pending_bucket_ends(database)
+        for measurement_id in measurement_ids_to_update_end:
+            pending_bucket_ends.add(measurement_id, end)
+        bucket_requests = [_add_to_bucket(measurement) for measurement in measurements]
+        if bucket_requests or pending_bucket_ends.due():
+            bucket_requests.extend(pending_bucket_ends.pop_updates())
+            database.measurement_buckets.bulk_write(bucket_requests)
+        _add_recent_measurements(database, *measurements)
+        _update_recent_measurements_end(database, measurement_ids_to_update_end, end)
+
+
+def _add_recent_measurements(database: Database, *measurements: Measurement) -> None:
+    """Add the inserted measurements to the recent measurements, if they have been read from the database."""
+    _recent_measurements.invalidate()
+    if (recent := _recent_measurements.get(database)) is not None:
+        for measurement in measurements:
+            recent.add(measurement)
+
+
+def _update_recent_measurements_end(database: Database, measurement_ids: Sequence[MeasurementId], end: str) -> None:
+    """Update the end of the measurements in the recent measurements, if they have been read from the database."""
+    _recent_measurements.invalidate()
+    if (recent := _recent_measurements.get(database)) is None:
+        return
+    for measurement_id in measurement_ids:
+        if not recent.update_end(measurement_id, end):
+            # The measurement was no longer recent, but it is now, so add it to the recent measurements:
+            projection = {"sources.entities": False}
+            if measurement := database.measurements.find_one({"_id": measurement_id}, projection=projection):
+                recent.add(measurement)
+
+
 def changelog(database: Database, nr_changes: int, **uuids):
     """Return the changelog for the measurements belonging to the items with the specific uuids."""
     return database.measurements.find(
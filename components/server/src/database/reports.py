@@ -1,35 +1,193 @@
 """Reports collection."""
 
+from collections.abc import Iterable
+from datetime import date
 from typing import Any, Optional, Union, cast
 
 import pymongo
+from pymongo import UpdateMany
 from pymongo.database import Database
 
+from model.iterators import subjects as iter_subjects
 from model.metric import Metric
+from model.transformations import count_metric, hide_credentials, summarize_metric, summarize_report
+from server_utilities import json_patch
 from server_utilities.functions import iso_timestamp, unique
+from server_utilities.read_only import ReadOnlyDict, read_only, writable
 from server_utilities.type import Change, MetricId, ReportId, SubjectId
 from .filters import DOES_EXIST, DOES_NOT_EXIST
-from . import datamodels, sessions
+from . import datamodels, measurements, sessions
+from .caches import DatabaseCache
 
 
 # Sort order:
 TIMESTAMP_DESCENDING = [("timestamp", pymongo.DESCENDING)]
 
+# Each change of a report inserts a new version of the report. The last version is stored completely. When a new version
+# is inserted, the previous version is replaced by a JSON patch that changes the new version into the previous version,
+# except for every REPORT_SNAPSHOT_INTERVAL-th version, which is kept completely. So rebuilding an old version of a
+# report needs at most REPORT_SNAPSHOT_INTERVAL patches:
+REPORT_SNAPSHOT_INTERVAL = 25
+# Fields of report versions that are not part of the contents of the report:
+REPORT_VERSION_FIELDS = ("_id", "timestamp", "delta", "last", "version", "patch")
+# Fields of the report contents that are kept when a version is replaced by a patch, so versions can still be queried:
+REPORT_PATCH_FIELDS = ("report_uuid", "deleted")
+
+# Snapshot of the latest reports, shared between requests, and an index of subject, metric, and source uuids to the
+# uuids of the report, subject, and metric that contain them, per database. Both are invalidated whenever a new report
+# is inserted. The generation of the caches is increased on invalidation so a snapshot or index that was built from
+# reports that were read before the invalidation is not stored:
+_latest_reports: DatabaseCache[tuple[ReadOnlyDict, ...]] = DatabaseCache()
+_uuid_indices: DatabaseCache[dict[str, tuple[str, ...]]] = DatabaseCache()
+
+# Summarized reports per database, keyed by report uuid. A summarized report is a copy of a report from the snapshot of
+# the latest reports with the credentials hidden and the recent measurements summarized. Summarized reports are rebuilt
+# when the report, the data model, or the date changes, and updated per metric when the metric's measurements change.
+# The summarized reports are kept in memory, per server process, and not stored in the database: they are derived from
+# the snapshot of the latest reports and the recent measurements, which are kept in memory as well, so a summary in the
+# database would need to be invalidated by every server process that writes reports or measurements:
+_summarized_reports: DatabaseCache[dict[ReportId, dict]] = DatabaseCache()
+
+# Permissions of the latest reports overview, per database, used to authorize every edit. The permissions are
+# invalidated whenever a new reports overview is inserted, using the generation like the snapshot of the latest reports:
+_latest_permissions: DatabaseCache[ReadOnlyDict] = DatabaseCache()
+
 
 def latest_reports(database: Database, max_iso_timestamp: str = ""):
-    """Return the latest, undeleted, reports in the reports collection."""
+    """Return the latest, undeleted, reports in the reports collection.
+
+    The current reports are read-only reports from the snapshot of the latest reports, shared between requests. Use
+    server_utilities.read_only.writable() to get a copy of a report that can be changed.
+
+    The reports as they were at a past date and time are read with one aggregation that picks the latest version of each
+    report before the date and time, using the report uuid and timestamp index.
+    """
     if max_iso_timestamp and max_iso_timestamp < iso_timestamp():
-        report_filter = dict(deleted=DOES_NOT_EXIST, timestamp={"$lt": max_iso_timestamp})
-        report_uuids = database.reports.distinct("report_uuid", report_filter)
-        reports = []
-        for report_uuid in report_uuids:
-            report_filter["report_uuid"] = report_uuid
-            reports.append(database.reports.find_one(report_filter, sort=TIMESTAMP_DESCENDING))
+        report_versions = database.reports.aggregate(
+            [
+                {"$match": {"timestamp": {"$lt": max_iso_timestamp}}},
+                {"$sort": {"report_uuid": pymongo.ASCENDING, "timestamp": pymongo.DESCENDING}},
+                {"$group": {"_id": "$report_uuid", "report": {"$first": "$$ROOT"}}},
+                {"$replaceRoot": {"newRoot": "$report"}},
+                {"$match": {"deleted": DOES_NOT_EXIST}},
+            ],
+            allowDiskUse=True,
+        )
+        reports = materialize_reports(database, report_versions)
+        for report in reports:
+            report["_id"] = str(report["_id"])
+        return reports
+    return list(_latest_reports_snapshot(database))
+
+
+def materialize_reports(database: Database, report_versions: Iterable[dict]) -> list[dict]:
+    """Return the report versions with their contents, applying the patches of newer versions to patched versions.
+
+    The newer versions needed to materialize the patched versions are read with one query for all report versions.
+    """
+    report_versions = list(report_versions)
+    version_filters = [
+        {
+            "report_uuid": report_version["report_uuid"],
+            "version": {"$gt": report_version["version"], "$lte": report_version["version"] + REPORT_SNAPSHOT_INTERVAL},
+            "timestamp": {"$gte": report_version["timestamp"]},
+        }
+        for report_version in report_versions
+        if "patch" in report_version
+    ]
+    newer_versions: dict[str, list[dict]] = {}
+    if version_filters:
+        for newer_version in database.reports.find(
+            {"$or": version_filters}, sort=[("report_uuid", pymongo.ASCENDING), ("version", pymongo.ASCENDING)]
+        ):
+            newer_versions.setdefault(newer_version["report_uuid"], []).append(newer_version)
+    return [
+        _materialize_report(report_version, newer_versions.get(report_version["report_uuid"], []))
+        for report_version in report_versions
+    ]
+
+
+def _materialize_report(report_version: dict, newer_versions: list[dict]) -> dict:
+    """Return the report version with its contents, applying the patches of newer versions if it's stored as a patch."""
+    if "patch" not in report_version:
+        return report_version
+    patches = [report_version["patch"]]
+    for newer_version in newer_versions:
+        if "patch" not in newer_version:
+            contents = _report_contents(newer_version)
+            break
+        patches.append(newer_version["patch"])
     else:
-        reports = list(database.reports.find({"last": True, "deleted": DOES_NOT_EXIST}))
+        raise LookupError(f"No complete version of report {report_version['report_uuid']} to apply patches to")
+    for patch in reversed(patches):
+        contents = json_patch.apply(contents, patch)
+    contents.update((key, value) for key, value in report_version.items() if key in REPORT_VERSION_FIELDS)
+    del contents["patch"]
+    return contents
+
+
+def _report_contents(report: dict) -> dict:
+    """Return the contents of the report version, without the version fields."""
+    return {key: value for key, value in report.items() if key not in REPORT_VERSION_FIELDS}
+
+
+def latest_reports_containing(database: Database, *uuids: str):
+    """Return the latest, undeleted, read-only reports that contain the subjects, metrics, or sources with the uuids."""
+    report_uuids = {path[0] for uuid in uuids if (path := uuid_path(database, uuid))}
+    return [report for report in _latest_reports_snapshot(database) if report["report_uuid"] in report_uuids]
+
+
+def _latest_reports_snapshot(database: Database) -> tuple[ReadOnlyDict, ...]:
+    """Return the snapshot of the latest, undeleted, reports, reading the reports from the database if needed."""
+    if (snapshot := _latest_reports.get(database)) is not None:
+        return snapshot
+    generation = _latest_reports.generation
+    reports = list(database.reports.find({"last": True, "deleted": DOES_NOT_EXIST}))
     for report in reports:
         report["_id"] = str(report["_id"])
-    return reports
+    snapshot = tuple(read_only(report) for report in reports)
+    if generation == _latest_reports.generation:
+        _latest_reports.set(database, snapshot)
+    return snapshot
+
+
+def summarized_report(database: Database, data_model, report: ReadOnlyDict) -> ReadOnlyDict:
+    """Return the report, from the snapshot of the latest reports, with a summary of the recent measurements.
+
+    The summarized report is shared between requests and may still be being encoded for one response while the summary
+    is brought up to date for another. Therefore the summarized report is read-only and out-of-date summaries are
+    replaced with updated copies rather than changed in place.
+    """
+    summarized_reports = _summarized_reports.get(database)
+    if summarized_reports is None:
+        summarized_reports = _summarized_reports.set(database, {})
+    recent_measurements = measurements.recent_measurements(database)
+    key = (id(report), id(data_model), date.today().isoformat())
+    summary = summarized_reports.get(report["report_uuid"])
+    if summary is None or summary["key"] != key:
+        summarized: dict = writable(report)
+        hide_credentials(data_model, summarized)
+        summarize_report(summarized, recent_measurements.by_metric_uuid(), data_model)
+        versions = {
+            metric_uuid: recent_measurements.version(metric_uuid)
+            for subject in iter_subjects(summarized)
+            for metric_uuid in subject.get("metrics", {})
+        }
+    else:
+        versions = {metric_uuid: recent_measurements.version(metric_uuid) for metric_uuid in summary["versions"]}
+        if versions == summary["versions"]:
+            return cast(ReadOnlyDict, summary["summarized"])
+        summarized = writable(summary["summarized"])
+        for subject_uuid, subject in summarized.get("subjects", {}).items():
+            for metric_uuid, metric in subject.get("metrics", {}).items():
+                if versions[metric_uuid] != summary["versions"][metric_uuid]:
+                    count_metric(summarized, subject_uuid, metric, increment=-1)
+                    summarize_metric(metric, recent_measurements.of_metric(metric_uuid), data_model)
+                    count_metric(summarized, subject_uuid, metric)
+    # Keep the report and data model so their ids are not reused while the summary exists:
+    summary = dict(key=key, report=report, data_model=data_model, summarized=read_only(summarized), versions=versions)
+    summarized_reports[report["report_uuid"]] = summary
+    return cast(ReadOnlyDict, summary["summarized"])
 
 
 def latest_report(database: Database, report_uuid: str):
@@ -48,6 +206,17 @@ def latest_reports_overview(database: Database, max_iso_timestamp: str = "") ->
     return overview or {}
 
 
+def latest_permissions(database: Database) -> ReadOnlyDict:
+    """Return the read-only permissions of the latest reports overview, reading them from the database if needed."""
+    if (permissions := _latest_permissions.get(database)) is not None:
+        return permissions
+    generation = _latest_permissions.generation
+    permissions = cast(ReadOnlyDict, read_only(latest_reports_overview(database).get("permissions", {})))
+    if generation == _latest_permissions.generation:
+        _latest_permissions.set(database, permissions)
+    return permissions
+
+
 def report_exists(database: Database, report_uuid: ReportId):
     """Return whether a report with the specified report uuid exists."""
     return report_uuid in database.reports.distinct("report_uuid")
@@ -55,12 +224,58 @@ def report_exists(database: Database, report_uuid: ReportId):
 
 def latest_metric(database: Database, metric_uuid: MetricId) -> Optional[Metric]:
     """Return the latest metric with the specified metric uuid."""
-    for report in latest_reports(database):
-        for subject in report.get("subjects", {}).values():
-            metrics = subject.get("metrics", {})
-            if metric_uuid in metrics:
-                return Metric(datamodels.latest_datamodel(database), metrics[metric_uuid], metric_uuid)
-    return None
+    return latest_metrics(database, metric_uuid).get(metric_uuid)
+
+
+def latest_metrics(database: Database, *metric_uuids: MetricId) -> dict[MetricId, Metric]:
+    """Return the latest metrics with the specified metric uuids, looking them up via the uuid index."""
+    metric_paths = {}
+    for metric_uuid in metric_uuids:
+        if len(path := uuid_path(database, metric_uuid)) == 2:
+            metric_paths[metric_uuid] = path
+    if not metric_paths:
+        return {}
+    report_uuids = {report_uuid for report_uuid, _subject_uuid in metric_paths.values()}
+    snapshot = _latest_reports_snapshot(database)
+    reports: dict[str, dict] = {
+        report["report_uuid"]: report for report in snapshot if report["report_uuid"] in report_uuids
+    }
+    data_model = datamodels.latest_datamodel(database)
+    metrics = {}
+    for metric_uuid, (report_uuid, subject_uuid) in metric_paths.items():
+        subject = reports.get(report_uuid, {}).get("subjects", {}).get(subject_uuid, {})
+        if metric_uuid in subject.get("metrics", {}):
+            metrics[metric_uuid] = Metric(data_model, subject["metrics"][metric_uuid], metric_uuid)
+    return metrics
+
+
+def uuid_path(database: Database, uuid: str) -> tuple[str, ...]:
+    """Return the uuids of the report, subject, and metric that contain the subject, metric, or source with the uuid.
+
+    Returns an empty tuple if the uuid is not a subject, metric, or source uuid in the latest reports.
+    """
+    if (cached_index := _uuid_indices.get(database)) is not None:
+        return cached_index.get(uuid, ())
+    generation = _uuid_indices.generation
+    index: dict[str, tuple[str, ...]] = {}
+    for report in _latest_reports_snapshot(database):
+        report_uuid = report["report_uuid"]
+        for subject_uuid, subject in report.get("subjects", {}).items():
+            index[subject_uuid] = (report_uuid,)
+            for metric_uuid, metric in subject.get("metrics", {}).items():
+                index[metric_uuid] = (report_uuid, subject_uuid)
+                for source_uuid in metric.get("sources", {}):
+                    index[source_uuid] = (report_uuid, subject_uuid, metric_uuid)
+    if generation == _uuid_indices.generation:
+        _uuid_indices.set(database, index)
+    return index.get(uuid, ())
+
+
+def _invalidate_latest_reports(database: Database) -> None:
+    """Invalidate the snapshot of the latest reports, the uuid index, and the summarized reports of the database."""
+    _latest_reports.clear(database)
+    _uuid_indices.clear(database)
+    _summarized_reports.clear(database)
 
 
 def metrics_of_subject(database: Database, subject_uuid: SubjectId) -> list[MetricId]:
@@ -73,22 +288,46 @@ def metrics_of_subject(database: Database, subject_uuid: SubjectId) -> list[Metr
 
 
 def insert_new_report(database: Database, delta_description: str, *reports_and_uuids) -> dict[str, Any]:
-    """Insert one or more new reports in the reports collection."""
+    """Insert one or more new reports in the reports collection, replacing the previous versions by patches."""
     _prepare_documents_for_insertion(database, delta_description, *reports_and_uuids, last=True)
     reports = [report for report, uuids in reports_and_uuids]
-    report_uuids = [report["report_uuid"] for report in reports]
-    database.reports.update_many({"report_uuid": {"$in": report_uuids}, "last": DOES_EXIST}, {"$unset": {"last": ""}})
+    # Read the previous versions from the database instead of from the snapshot of the latest reports, because the
+    # snapshot may be outdated if another server process inserted a new version of a report:
+    report_filter = {"report_uuid": {"$in": [report["report_uuid"] for report in reports]}, "last": True}
+    previous_reports = {report["report_uuid"]: report for report in database.reports.find(report_filter)}
+    updates = []
+    for report in reports:
+        previous_report: dict = previous_reports.get(report["report_uuid"], {})
+        report["version"] = previous_report.get("version", 0) + 1
+        updates.append(_previous_version_update(report, previous_report))
+    database.reports.bulk_write(updates)
     if len(reports) > 1:
         database.reports.insert_many(reports, ordered=False)
     else:
         database.reports.insert(reports[0])
+    _invalidate_latest_reports(database)
     return dict(ok=True)
 
 
+def _previous_version_update(report: dict, previous_report: dict) -> UpdateMany:
+    """Return the update that marks the previous version of the report as no longer being the last version.
+
+    Unless the previous version is a snapshot version, the update also replaces the contents of the previous version
+    with the patch that changes the new version into the previous version.
+    """
+    update: dict[str, dict] = {"$unset": {"last": ""}}
+    if previous_report.get("version", 0) % REPORT_SNAPSHOT_INTERVAL:
+        previous_contents = _report_contents(previous_report)
+        update["$set"] = {"patch": json_patch.diff(_report_contents(report), previous_contents)}
+        update["$unset"].update((key, "") for key in previous_contents if key not in REPORT_PATCH_FIELDS)
+    return UpdateMany({"report_uuid": report["report_uuid"], "last": DOES_EXIST}, update)
+
+
 def insert_new_reports_overview(database: Database, delta_description: str, reports_overview) -> dict[str, Any]:
     """Insert a new reports overview in the reports overview collection."""
     _prepare_documents_for_insertion(database, delta_description, (reports_overview, []))
     database.reports_overviews.insert(reports_overview)
+    _latest_permissions.clear(database)
     return dict(ok=True)
 
 
@@ -1,12 +1,22 @@
 """Sessions collection."""
 
+import time
 from datetime import datetime
-from typing import cast
+from typing import Optional, cast
 
 import bottle
 from pymongo.database import Database
 
+from server_utilities.read_only import ReadOnlyDict, read_only
 from server_utilities.type import SessionId
+from .caches import DatabaseCache
+
+
+# Sessions found recently, per database, keyed by session id, with the time they were read. Sessions are cached for a
+# short period so authenticating a series of requests doesn't need a query per request. The cached sessions of a
+# database are removed when a user logs in or out:
+SESSION_CACHE_DURATION = 10  # Seconds
+_sessions: DatabaseCache[dict[SessionId, tuple[float, ReadOnlyDict]]] = DatabaseCache()
 
 
 def upsert(
@@ -20,11 +30,13 @@ def upsert(
         ),
         upsert=True,
     )
+    _sessions.clear(database)  # The user's previous session, if any, no longer exists
 
 
 def delete(database: Database, session_id: SessionId) -> None:
     """Remove the session."""
     database.sessions.delete_one(dict(session_id=session_id))
+    _sessions.clear(database)
 
 
 def user(database: Database):
@@ -33,6 +45,17 @@ def user(database: Database):
     return find_session(database, session_id)
 
 
-def find_session(database: Database, session_id: SessionId):
-    """Return the session."""
-    return database.sessions.find_one(dict(session_id=session_id))
+def find_session(database: Database, session_id: SessionId) -> Optional[ReadOnlyDict]:
+    """Return the session, from the cached sessions if it was read recently."""
+    now = time.monotonic()
+    if (cached_sessions := _sessions.get(database)) is None:
+        cached_sessions = _sessions.set(database, {})
+    if (cached_session := cached_sessions.get(session_id)) and cached_session[0] > now - SESSION_CACHE_DURATION:
+        return cached_session[1]
+    if not (session := database.sessions.find_one(dict(session_id=session_id))):
+        return None  # Don't cache unknown session ids, so requests with made up session ids can't fill the cache
+    min_read = now - SESSION_CACHE_DURATION
+    for expired_session_id in [key for key, (read, _) in cached_sessions.items() if read <= min_read]:
+        del cached_sessions[expired_session_id]
+    cached_sessions[session_id] = (now, read_only(session))
+    return cached_sessions[session_id][1]
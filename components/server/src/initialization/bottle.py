@@ -3,7 +3,7 @@
 import bottle
 from pymongo.database import Database
 
-from routes.plugins import AuthPlugin, InjectionPlugin
+from routes.plugins import AuthPlugin, InjectionPlugin, JSONStreamingPlugin
 
 # isort: off
 # pylint: disable=unused-import
@@ -31,3 +31,4 @@ def init_bottle(database: Database) -> None:
     bottle.BaseRequest.MEMFILE_MAX = 1024 * 1024  # Max size of POST body in bytes
     bottle.install(InjectionPlugin(value=database, keyword="database"))
     bottle.install(AuthPlugin())
+    bottle.install(JSONStreamingPlugin())
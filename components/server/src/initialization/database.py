@@ -7,6 +7,7 @@ import pymongo  # pylint: disable=wrong-import-order
 from pymongo.database import Database
 
 from database.filters import DOES_NOT_EXIST
+from database.measurements import BUCKET_SCALE_FIELDS, BUCKET_SCALES, measurement_buckets
 from initialization.secrets import initialize_secrets
 from model.iterators import metrics, sources
 from routes.plugins.auth_plugin import EDIT_ENTITY_PERMISSION, EDIT_REPORT_PERMISSION
@@ -27,6 +28,7 @@ def init_database() -> Database:  # pragma: no cover-behave
     nr_measurements = database.measurements.count_documents({})
     logging.info("Database has %d report documents and %d measurement documents", nr_reports, nr_measurements)
     add_error_flag_to_measurements(database)  # Needed before indexing
+    add_measurement_buckets(database)  # Needed before indexing
     create_indexes(database)
     import_datamodel(database)
     initialize_secrets(database)
@@ -48,12 +50,21 @@ def create_indexes(database: Database) -> None:
     """Create any indexes."""
     database.datamodels.create_index("timestamp")
     database.reports.create_index("timestamp")
+    database.reports.create_index([("report_uuid", pymongo.ASCENDING), ("timestamp", pymongo.DESCENDING)])
+    database.reports.create_index([("report_uuid", pymongo.ASCENDING), ("version", pymongo.ASCENDING)])
     start_index = pymongo.IndexModel([("start", pymongo.ASCENDING)])
+    end_index = pymongo.IndexModel([("end", pymongo.ASCENDING)])
     latest_measurement_index = pymongo.IndexModel([("metric_uuid", pymongo.ASCENDING), ("start", pymongo.DESCENDING)])
     latest_successful_measurement_index = pymongo.IndexModel(
         [("metric_uuid", pymongo.ASCENDING), ("has_error", pymongo.ASCENDING), ("start", pymongo.DESCENDING)]
     )
-    database.measurements.create_indexes([start_index, latest_measurement_index, latest_successful_measurement_index])
+    database.measurements.create_indexes(
+        [start_index, end_index, latest_measurement_index, latest_successful_measurement_index]
+    )
+    bucket_index = pymongo.IndexModel([("metric_uuid", pymongo.ASCENDING), ("first_start", pymongo.ASCENDING)])
+    bucket_measurement_ids_index = pymongo.IndexModel([("measurement_ids", pymongo.ASCENDING)])
+    database.measurement_buckets.create_indexes([bucket_index, bucket_measurement_ids_index])
+    database.sessions.create_index("session_id")
 
 
 def add_last_flag_to_reports(database: Database) -> None:
@@ -175,6 +186,27 @@ def add_error_flag_to_measurements(database: Database) -> None:
     database.measurements.update_many({"has_error": DOES_NOT_EXIST}, {"$set": {"has_error": False}})
 
 
+def add_measurement_buckets(database: Database) -> None:
+    """Add the measurement buckets with the compact history of the measurements, if they don't exist yet."""
+    # Introduced when the most recent version of Quality-time was 3.23.3.
+    if database.measurement_buckets.find_one({}, projection=["_id"]) is not None:
+        return
+    projection = ["metric_uuid", "start", "end"]
+    projection.extend(f"{scale}.{field}" for scale in BUCKET_SCALES for field in BUCKET_SCALE_FIELDS)
+    # Sort in the reverse order of the latest measurement index so the index can be used:
+    sort = [("metric_uuid", pymongo.DESCENDING), ("start", pymongo.ASCENDING)]
+    measurements = database.measurements.find({}, projection=projection, sort=sort)
+    # Fill a separate collection and rename it when done, so an interrupted migration is restarted at the next start:
+    database.measurement_buckets_migration.drop()
+    nr_buckets = 0
+    for bucket in measurement_buckets(measurements):
+        database.measurement_buckets_migration.insert_one(bucket)
+        nr_buckets += 1
+    if nr_buckets:
+        database.measurement_buckets_migration.rename("measurement_buckets", dropTarget=True)
+        logging.info("Added %d measurement buckets", nr_buckets)
+
+
 def current_reports(database: Database):
     """Return the latest versions of all undeleted reports."""
     return list(database.reports.find({"last": True, "deleted": DOES_NOT_EXIST}))
@@ -13,8 +13,7 @@ def import_datamodel(database: Database) -> None:
     """Store the data model in the database."""
     data_model = json.loads(DATA_MODEL_JSON)
     if latest := latest_datamodel(database):
-        del latest["timestamp"]
-        del latest["_id"]
+        latest = {key: value for key, value in latest.items() if key not in ("timestamp", "_id")}
         if data_model == latest:  # pragma: no cover-behave
             logging.info("Skipping loading the data model; it is unchanged")
             return
@@ -1,8 +1,9 @@
 """Reports collection."""
 
 from dataclasses import dataclass
-from typing import Any, cast
+from typing import cast
 
+from server_utilities.read_only import ReadOnlyDict, writable
 from server_utilities.type import MetricId, ReportId, SourceId, SubjectId
 
 
@@ -14,6 +15,13 @@ class Data:
         self.datamodel = data_model
         self.reports = reports
 
+    def writable_reports(self):
+        """Replace the read-only reports with copies that can be changed and return the reports."""
+        for index, report in enumerate(self.reports):
+            if isinstance(report, ReadOnlyDict):
+                self.reports[index] = writable(report)
+        return self.reports
+
     def name(self, entity: str) -> str:
         """Return the name of the entity."""
         instance = getattr(self, entity)
@@ -26,14 +34,18 @@ class ReportData(Data):
     def __init__(self, data_model, reports, report_uuid: ReportId = None, subject_uuid: SubjectId = None) -> None:
         self.report_uuid = self.get_report_uuid(reports, subject_uuid) if subject_uuid else report_uuid
         super().__init__(data_model, reports)
-        self.report = list(filter(lambda report: self.report_uuid == report["report_uuid"], reports))[0]
+        # Copy the report on first use, so it can be changed. Replace the read-only report in the list of reports with
+        # the copy, so other data instances created from the same reports change the same copy:
+        index = next(index for index, report in enumerate(reports) if report["report_uuid"] == self.report_uuid)
+        if isinstance(reports[index], ReadOnlyDict):
+            reports[index] = writable(reports[index])
+        self.report = reports[index]
         self.report_name = self.report.get("title") or ""
 
     @staticmethod
     def get_report_uuid(reports, subject_uuid: SubjectId) -> ReportId:
         """Find the uuid of the report that contains a subject with the given subject uuid."""
-        report = [report for report in reports if subject_uuid in report["subjects"]][0]
-        return cast(ReportId, report["report_uuid"])
+        return cast(ReportId, next(report["report_uuid"] for report in reports if subject_uuid in report["subjects"]))
 
 
 class SubjectData(ReportData):
@@ -48,10 +60,15 @@ class SubjectData(ReportData):
     @staticmethod
     def get_subject_uuid(reports, metric_uuid: MetricId) -> SubjectId:
         """Find the uuid of the subject that contains a metric with the given metric uuid."""
-        subjects: list[tuple[SubjectId, Any]] = []
-        for report in reports:
-            subjects.extend(report["subjects"].items())
-        return [subject_uuid for (subject_uuid, subject) in subjects if metric_uuid in subject["metrics"]][0]
+        return cast(
+            SubjectId,
+            next(
+                subject_uuid
+                for report in reports
+                for subject_uuid, subject in report["subjects"].items()
+                if metric_uuid in subject["metrics"]
+            ),
+        )
 
 
 class MetricData(SubjectData):
@@ -66,11 +83,16 @@ class MetricData(SubjectData):
     @staticmethod
     def get_metric_uuid(reports, source_uuid: SourceId) -> MetricId:
         """Find the uuid of the metric that contains a source with the given source uuid."""
-        metrics: list[tuple[MetricId, Any]] = []
-        for report in reports:
-            for subject in report["subjects"].values():
-                metrics.extend(subject["metrics"].items())
-        return [metric_uuid for (metric_uuid, metric) in metrics if source_uuid in metric["sources"]][0]
+        return cast(
+            MetricId,
+            next(
+                metric_uuid
+                for report in reports
+                for subject in report["subjects"].values()
+                for metric_uuid, metric in subject["metrics"].items()
+                if source_uuid in metric["sources"]
+            ),
+        )
 
 
 class SourceData(MetricData):
@@ -194,6 +194,10 @@ class Measurement(dict):  # lgtm [py/missing-equals]
         any_debt_target = any(self[scale].get("debt_target") is not None for scale in self.metric.scales())
         return self.metric.accept_debt_expired() if any_debt_target else False
 
+    def content_hashes(self) -> list[Optional[str]]:
+        """Return the content hashes of the sources, as calculated by the collector."""
+        return [source.get("content_hash") for source in self.sources()]
+
     def copy_entity_user_data(self, measurement: Measurement) -> None:
         """Copy the entity user data from the measurement to this measurement."""
         old_sources = {source["source_uuid"]: source for source in measurement.sources()}
@@ -98,7 +98,7 @@ def _sources_to_change(data, scope: EditScope) -> Iterator:
 
 def _reports_to_change(data, scope: EditScope) -> Iterator:
     """Return the reports to change, given the scope."""
-    yield from data.reports if scope == "reports" else [data.report]
+    yield from data.writable_reports() if scope == "reports" else [data.report]
 
 
 def _subjects_to_change(data, report, scope: EditScope) -> Iterator:
@@ -118,32 +118,46 @@ def __sources_to_change(data, metric, scope: EditScope) -> Iterator:
     yield from {data.source_uuid: data.source}.items() if scope == "source" else metric["sources"].items()
 
 
+STATUS_COLOR_MAPPING: dict[Status, Color] = cast(
+    dict[Status, Color],
+    dict(target_met="green", debt_target_met="grey", near_target_met="yellow", target_not_met="red"),
+)
+
+
 def summarize_report(report, recent_measurements, data_model) -> None:
     """Add a summary of the measurements to each subject."""
-    status_color_mapping: dict[Status, Color] = cast(
-        dict[Status, Color],
-        dict(target_met="green", debt_target_met="grey", near_target_met="yellow", target_not_met="red"),
-    )
     report["summary"] = dict(red=0, green=0, yellow=0, grey=0, white=0)
     report["summary_by_subject"] = {}
     report["summary_by_tag"] = {}
     for subject_uuid, subject in report.get("subjects", {}).items():
         for metric_uuid, metric in subject.get("metrics", {}).items():
-            recent = metric["recent_measurements"] = recent_measurements.get(metric_uuid, [])
-            scale = metric.get("scale") or data_model["metrics"][metric["type"]].get("default_scale", "count")
-            metric["scale"] = scale
-            last_measurement = recent[-1] if recent else {}
-            metric["status"] = metric_status(metric, last_measurement, scale)
-            if status_start := last_measurement.get(scale, {}).get("status_start"):
-                metric["status_start"] = status_start
-            metric["value"] = last_measurement.get(scale, {}).get("value", last_measurement.get("value"))
-            color = status_color_mapping.get(metric["status"], "white")
-            report["summary"][color] += 1
-            report["summary_by_subject"].setdefault(subject_uuid, dict(red=0, green=0, yellow=0, grey=0, white=0))[
-                color
-            ] += 1
-            for tag in metric.get("tags", []):
-                report["summary_by_tag"].setdefault(tag, dict(red=0, green=0, yellow=0, grey=0, white=0))[color] += 1
+            summarize_metric(metric, recent_measurements.get(metric_uuid, []), data_model)
+            count_metric(report, subject_uuid, metric)
+
+
+def summarize_metric(metric, recent_measurements, data_model) -> None:
+    """Add the recent measurements, scale, status, status start, and value to the metric."""
+    recent = metric["recent_measurements"] = recent_measurements
+    scale = metric.get("scale") or data_model["metrics"][metric["type"]].get("default_scale", "count")
+    metric["scale"] = scale
+    last_measurement = recent[-1] if recent else {}
+    metric["status"] = metric_status(metric, last_measurement, scale)
+    if status_start := last_measurement.get(scale, {}).get("status_start"):
+        metric["status_start"] = status_start
+    else:
+        metric.pop("status_start", None)
+    metric["value"] = last_measurement.get(scale, {}).get("value", last_measurement.get("value"))
+
+
+def count_metric(report, subject_uuid, metric, increment: int = 1) -> None:
+    """Count the status color of the metric in the summaries of the report. Use an increment of -1 to uncount it."""
+    color = STATUS_COLOR_MAPPING.get(metric["status"], "white")
+    report["summary"][color] += increment
+    report["summary_by_subject"].setdefault(subject_uuid, dict(red=0, green=0, yellow=0, grey=0, white=0))[
+        color
+    ] += increment
+    for tag in metric.get("tags", []):
+        report["summary_by_tag"].setdefault(tag, dict(red=0, green=0, yellow=0, grey=0, white=0))[color] += increment
 
 
 def metric_status(metric, last_measurement, scale) -> Optional[Status]:
@@ -1,30 +1,39 @@
 """Measurement routes."""
 
+import json
 import logging
 import time
 from collections.abc import Iterator
-from typing import cast
+from datetime import datetime
+from typing import Optional, Union, cast
 
 import bottle
 from pymongo.database import Database
 
 from database import sessions
+from database.change_feed import change_feed
 from database.datamodels import latest_datamodel
 from database.measurements import (
+    RESOLUTION_DATE_FORMATS,
+    downsampled_measurement_history,
+    history_resolution,
     measurements_by_metric,
     count_measurements,
     insert_new_measurement,
+    insert_new_measurements,
+    latest_and_latest_successful_measurement,
     latest_measurement,
-    latest_successful_measurement,
+    latest_measurements,
+    measurements_since,
     update_measurement_end,
 )
-from database.reports import latest_metric, latest_reports
+from database.reports import latest_metric, latest_metrics, latest_reports_containing
 from model.data import SourceData
 
 from model.measurement import Measurement
 from model.metric import Metric
 from routes.plugins.auth_plugin import EDIT_ENTITY_PERMISSION
-from server_utilities.functions import report_date_time
+from server_utilities.functions import iso_timestamp, report_date_time
 from server_utilities.type import MetricId, SourceId
 
 
@@ -35,20 +44,76 @@ def post_measurement(database: Database) -> None:
     metric_uuid = measurement_data["metric_uuid"]
     if (metric := latest_metric(database, metric_uuid)) is None:
         return  # Metric does not exist, must've been deleted while being measured
-    latest = latest_measurement(database, metric)
+    latest, latest_successful = latest_and_latest_successful_measurement(database, metric)
     measurement = Measurement(metric, measurement_data, previous_measurement=latest)
     if not measurement.sources_exist():
         return  # Measurement has sources that the metric does not have, must've been deleted while being measured
     if latest:
-        latest_successful = latest_successful_measurement(database, metric)
-        measurement.copy_entity_user_data(latest if latest_successful is None else latest_successful)
-        if not latest.debt_target_expired() and latest.sources() == measurement.sources():
+        if _can_be_merged(measurement, latest, latest_successful):
             # If the new measurement is equal to the previous one, merge them together
             update_measurement_end(database, latest["_id"])
             return
     insert_new_measurement(database, measurement)
 
 
+class MeasurementsBatchRequest(bottle.BaseRequest):
+    """Request with a batch of measurements, posted by the collector.
+
+    The maximum size of other requests is 1 MB, see initialization.bottle.init_bottle(), but a batch holds ten
+    measurements by default, each of which may include many entities. Bottle responds with status 413 if the request
+    body is larger than MEMFILE_MAX.
+    """
+
+    MEMFILE_MAX = 10 * 1024 * 1024  # Bytes
+
+
+@bottle.post("/internal-api/v3/measurements/batch", authentication_required=False)
+def post_measurements(database: Database) -> None:
+    """Put the measurements in the database, using one snapshot of the reports to look up the metrics."""
+    measurements_data = dict(MeasurementsBatchRequest(bottle.request.environ).json)["measurements"]
+    metrics = latest_metrics(database, *[measurement_data["metric_uuid"] for measurement_data in measurements_data])
+    latest = latest_measurements(database, *metrics.values())
+    latest_successful = {metric_uuid: m for metric_uuid, m in latest.items() if m.get("has_error") is False}
+    if failed_metrics := [metrics[metric_uuid] for metric_uuid in latest if metric_uuid not in latest_successful]:
+        latest_successful.update(latest_measurements(database, *failed_metrics, successful=True))
+    new_measurements, measurement_ids_to_update_end = [], []
+    for measurement_data in measurements_data:
+        if (metric := metrics.get(measurement_data["metric_uuid"])) is None:
+            continue  # Metric does not exist, must've been deleted while being measured
+        previous = latest.get(metric.uuid)
+        measurement = Measurement(metric, measurement_data, previous_measurement=previous)
+        if not measurement.sources_exist():
+            continue  # Measurement has sources that the metric does not have, must've been deleted while being measured
+        if previous and _can_be_merged(measurement, previous, latest_successful.get(metric.uuid)):
+            if "_id" in previous:  # The previous measurement may be a new measurement from this batch
+                measurement_ids_to_update_end.append(previous["_id"])
+            continue
+        new_measurements.append(measurement)
+        latest[metric.uuid] = measurement
+        if measurement.get("has_error") is False:
+            latest_successful[metric.uuid] = measurement
+    insert_new_measurements(database, new_measurements, measurement_ids_to_update_end)
+
+
+def _can_be_merged(measurement: Measurement, latest: Measurement, latest_successful: Optional[Measurement]) -> bool:
+    """Return whether the new measurement is equal to the latest measurement so they can be merged together.
+
+    The measurements are equal if the content hashes of their sources, calculated by the collector from the values,
+    totals, errors, and entities, are equal. If either measurement lacks content hashes, for example because it was
+    posted by an older collector, the sources themselves are compared. If the measurements can't be merged, the entity
+    user data is copied from the latest successful measurement, if any, to the new measurement.
+    """
+    content_hashes, latest_content_hashes = measurement.content_hashes(), latest.content_hashes()
+    if None in content_hashes or None in latest_content_hashes:
+        equal = latest.sources() == measurement.sources()
+    else:
+        equal = content_hashes == latest_content_hashes
+    if equal and not latest.debt_target_expired():
+        return True
+    measurement.copy_entity_user_data(latest if latest_successful is None else latest_successful)
+    return False
+
+
 @bottle.post(
     "/api/v3/measurement/<metric_uuid>/source/<source_uuid>/entity/<entity_key>/<attribute>",
     permissions_required=[EDIT_ENTITY_PERMISSION],
@@ -57,7 +122,7 @@ def set_entity_attribute(
     metric_uuid: MetricId, source_uuid: SourceId, entity_key: str, attribute: str, database: Database
 ) -> dict:
     """Set an entity attribute."""
-    data = SourceData(latest_datamodel(database), latest_reports(database), source_uuid)
+    data = SourceData(latest_datamodel(database), latest_reports_containing(database, source_uuid), source_uuid)
     metric = Metric(data.datamodel, data.metric, metric_uuid)
     old_measurement = cast(Measurement, latest_measurement(database, metric))
     new_measurement = old_measurement.copy()
@@ -77,14 +142,20 @@ def set_entity_attribute(
     return insert_new_measurement(database, new_measurement)
 
 
-def sse_pack(event_id: int, event: str, data: int, retry: str = "2000") -> str:
+def sse_pack(event_id: int, event: str, data: Union[int, str], retry: str = "2000") -> str:
     """Pack data in Server-Sent Events (SSE) format."""
     return f"retry: {retry}\nid: {event_id}\nevent: {event}\ndata: {data}\n\n"
 
 
 @bottle.get("/api/v3/nr_measurements", authentication_required=False)
 def stream_nr_measurements(database: Database) -> Iterator[str]:
-    """Return the number of measurements as server sent events."""
+    """Return the number of measurements and the changed measurements as server sent events.
+
+    The changes come from the change feed of the measurements collection that is shared by all clients. Changed
+    measurements are sent as a "measurements" event with the metric uuids and statuses of the changed measurements. A
+    "delta" event with the number of measurements is sent when the number of measurements changes, and otherwise once a
+    minute so clients can detect a broken connection.
+    """
     # Keep event IDs consistent
     event_id = int(bottle.request.get_header("Last-Event-Id", -1)) + 1
 
@@ -93,27 +164,68 @@ def stream_nr_measurements(database: Database) -> Iterator[str]:
     bottle.response.set_header("Content-Type", "text/event-stream")
     bottle.response.set_header("Cache-Control", "no-cache")
 
-    # Provide an initial data dump to each new client and set up our message payload with a retry value in case of
-    # connection failure
-    nr_measurements = count_measurements(database)
-    logging.info("Initializing nr_measurements stream with %s measurements", nr_measurements)
-    yield sse_pack(event_id, "init", nr_measurements)
-    skipped = 0
-    # Now give the client updates as they arrive
-    while True:
-        time.sleep(10)
-        if (new_nr_measurements := count_measurements(database)) > nr_measurements or skipped > 5:
-            skipped = 0
-            nr_measurements = new_nr_measurements
-            event_id += 1
-            logging.info("Updating nr_measurements stream with %s measurements", nr_measurements)
-            yield sse_pack(event_id, "delta", nr_measurements)
-        else:
-            skipped += 1
+    with change_feed(database).subscribe() as subscription:
+        # Provide an initial data dump to each new client and set up our message payload with a retry value in case of
+        # connection failure
+        nr_measurements = count_measurements(database)
+        logging.info("Initializing nr_measurements stream with %s measurements", nr_measurements)
+        yield sse_pack(event_id, "init", nr_measurements)
+        skipped = 0
+        # Now give the client updates as they arrive, collecting them for a while so clients don't reload too often
+        while True:
+            time.sleep(10)
+            new_nr_measurements = nr_measurements
+            if changes := subscription.changes():
+                new_nr_measurements += len([change for change in changes if change["operation"] == "insert"])
+                event_id += 1
+                yield sse_pack(event_id, "measurements", json.dumps(changes))
+            if new_nr_measurements != nr_measurements or skipped > 5:
+                skipped = 0
+                nr_measurements = new_nr_measurements
+                event_id += 1
+                logging.info("Updating nr_measurements stream with %s measurements", nr_measurements)
+                yield sse_pack(event_id, "delta", nr_measurements)
+            else:
+                skipped += 1
+
+
+@bottle.get("/api/v3/measurements", authentication_required=False)
+def get_measurements_since(database: Database) -> dict:
+    """Return the measurements added or updated since the cursor and the cursor to use for the next request.
+
+    The cursor is a timestamp: measurements are returned if their end is at or after the cursor. Measurements that end
+    at the exact time of the cursor are returned again by the next request. Without cursor, the recent measurements
+    are returned.
+    """
+    cursor = iso_timestamp()
+    since = str(dict(bottle.request.query).get("since", "")).replace("Z", "+00:00")
+    if since:
+        try:
+            datetime.fromisoformat(since)
+        except ValueError:
+            bottle.abort(400, "The since parameter must be an ISO-formatted timestamp")
+    return dict(measurements=measurements_since(database, since), cursor=cursor)
 
 
 @bottle.get("/api/v3/measurements/<metric_uuid>", authentication_required=False)
 def get_measurements(metric_uuid: MetricId, database: Database) -> dict:
-    """Return the measurements for the metric."""
+    """Return the measurements for the metric.
+
+    If a resolution (day, week, or month) or a maximum number of points is requested, return the measurements
+    aggregated per period instead.
+    """
     metric_uuid = cast(MetricId, metric_uuid.split("&")[0])
-    return dict(measurements=list(measurements_by_metric(database, metric_uuid, max_iso_timestamp=report_date_time())))
+    query = dict(bottle.request.query)
+    resolution, max_points = str(query.get("resolution", "")), str(query.get("max_points", ""))
+    max_iso_timestamp = report_date_time()
+    if not resolution and not max_points:
+        measurements = measurements_by_metric(database, metric_uuid, max_iso_timestamp=max_iso_timestamp)
+        return dict(measurements=measurements)
+    if resolution not in RESOLUTION_DATE_FORMATS:
+        if not max_points.isdigit() or int(max_points) < 1:
+            bottle.abort(400, "The resolution must be day, week, or month, or max_points must be a positive number")
+        resolution = history_resolution(database, metric_uuid, int(max_points))
+    metric = latest_metric(database, metric_uuid)
+    scale = metric.scale() if metric else "count"
+    history = downsampled_measurement_history(database, metric_uuid, scale, resolution, max_iso_timestamp)
+    return dict(measurements=history)
@@ -7,7 +7,7 @@ from pymongo.database import Database
 
 from database.datamodels import default_metric_attributes, latest_datamodel
 from database.measurements import insert_new_measurement, latest_measurement
-from database.reports import insert_new_report, latest_reports
+from database.reports import insert_new_report, latest_reports, latest_reports_containing
 from model.actions import copy_metric, move_item
 from model.data import MetricData, SubjectData
 from model.metric import Metric
@@ -23,8 +23,7 @@ def get_metrics(database: Database):
     for report in latest_reports(database):
         for subject in report["subjects"].values():
             for metric_uuid, metric in subject["metrics"].items():
-                metric["report_uuid"] = report["report_uuid"]
-                metrics[metric_uuid] = metric
+                metrics[metric_uuid] = dict(metric, report_uuid=report["report_uuid"])
     return metrics
 
 
@@ -85,7 +84,7 @@ def post_move_metric(metric_uuid: MetricId, target_subject_uuid: SubjectId, data
 @bottle.delete("/api/v3/metric/<metric_uuid>", permissions_required=[EDIT_REPORT_PERMISSION])
 def delete_metric(metric_uuid: MetricId, database: Database):
     """Delete a metric."""
-    data = MetricData(latest_datamodel(database), latest_reports(database), metric_uuid)
+    data = MetricData(latest_datamodel(database), latest_reports_containing(database, metric_uuid), metric_uuid)
     description = (
         f"{{user}} deleted metric '{data.metric_name}' from subject '{data.subject_name}' in report "
         f"'{data.report_name}'."
@@ -102,7 +101,7 @@ ATTRIBUTES_IMPACTING_STATUS = ("accept_debt", "debt_target", "debt_end_date", "d
 def post_metric_attribute(metric_uuid: MetricId, metric_attribute: str, database: Database):
     """Set the metric attribute."""
     new_value = dict(bottle.request.json)[metric_attribute]
-    data = MetricData(latest_datamodel(database), latest_reports(database), metric_uuid)
+    data = MetricData(latest_datamodel(database), latest_reports_containing(database, metric_uuid), metric_uuid)
     if metric_attribute == "comment" and new_value:
         new_value = sanitize_html(new_value)
     old_value: Any
@@ -2,3 +2,4 @@
 
 from .auth_plugin import AuthPlugin
 from .injection_plugin import InjectionPlugin
+from .json_streaming_plugin import JSONStreamingPlugin
@@ -5,7 +5,7 @@ import logging
 import bottle
 
 from database import sessions
-from database.reports import latest_reports_overview
+from database.reports import latest_permissions
 from model.session import Session
 
 EDIT_REPORT_PERMISSION = "edit_reports"
@@ -43,8 +43,9 @@ class AuthPlugin:  # pylint: disable=too-few-public-methods
             if not session.is_valid():
                 cls.abort(401, "%s-access to %s denied: session %s not authenticated", context, session_id)
 
+            permissions = latest_permissions(database) if required_permissions else {}
             for permission in required_permissions:
-                authorized_users = latest_reports_overview(database).get("permissions", {}).get(permission, [])
+                authorized_users = permissions.get(permission, [])
                 if not session.is_authorized(authorized_users):
                     cls.abort(403, "%s-access to %s denied: session %s not authorized", context, session_id)
 
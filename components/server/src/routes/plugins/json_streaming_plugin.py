@@ -0,0 +1,86 @@
+"""Route JSON streaming plugin."""
+
+import json
+import zlib
+from collections.abc import Iterator
+
+import bottle
+
+
+class JSONStreamingPlugin:  # pylint: disable=too-few-public-methods
+    """This plugin encodes the dicts returned by routes as JSON incrementally.
+
+    Dicts and lists are encoded item by item up to a fixed depth, deeper values are encoded as a whole. Iterators, such
+    as generators, are encoded item by item too, so routes can return values that are read from the database while
+    the response is being sent. The JSON is returned in chunks, compressed with gzip if the client accepts it.
+    """
+
+    api = 2
+    CHUNK_SIZE = 64 * 1024  # Number of characters of JSON to collect before returning a chunk
+    # Nesting depth up to which dicts and lists are encoded item by item. Reports are nested as follows: reports (1),
+    # report (2), subjects (3), subject (4), and metrics (5), so metrics are the largest parts encoded as a whole:
+    STREAMING_DEPTH = 6
+
+    def __init__(self) -> None:
+        self.name = "json-streaming"
+
+    @classmethod
+    def apply(cls, callback, context):  # pylint: disable=unused-argument
+        """Apply the plugin to the route."""
+
+        def wrapper(*args, **kwargs):
+            """Wrap the route."""
+            result = callback(*args, **kwargs)
+            if not isinstance(result, dict):
+                return result  # Leave other results, such as server-sent event streams, to bottle
+            bottle.response.content_type = "application/json"
+            bottle.response.add_header("Vary", "Accept-Encoding")
+            chunks = cls.chunks(cls.encode(result))
+            if "gzip" in bottle.request.get_header("Accept-Encoding", ""):
+                bottle.response.set_header("Content-Encoding", "gzip")
+                chunks = cls.gzip(chunks)
+            return chunks
+
+        # Replace the route callback with the wrapped one.
+        return wrapper
+
+    @classmethod
+    def encode(cls, value, depth: int = 0) -> Iterator[str]:
+        """Encode the value as JSON, part by part."""
+        if isinstance(value, dict) and depth < cls.STREAMING_DEPTH:
+            yield "{"
+            for index, (key, item) in enumerate(value.items()):
+                yield f"{', ' if index else ''}{json.dumps(str(key))}: "
+                yield from cls.encode(item, depth + 1)
+            yield "}"
+        elif isinstance(value, Iterator) or (isinstance(value, (list, tuple)) and depth < cls.STREAMING_DEPTH):
+            yield "["
+            for index, item in enumerate(value):
+                if index:
+                    yield ", "
+                yield from cls.encode(item, depth + 1)
+            yield "]"
+        else:
+            yield json.dumps(value)
+
+    @classmethod
+    def chunks(cls, json_parts: Iterator[str]) -> Iterator[bytes]:
+        """Collect the parts of the JSON into chunks."""
+        chunk: list[str] = []
+        chunk_size = 0
+        for json_part in json_parts:
+            chunk.append(json_part)
+            chunk_size += len(json_part)
+            if chunk_size >= cls.CHUNK_SIZE:
+                yield "".join(chunk).encode()
+                chunk, chunk_size = [], 0
+        yield "".join(chunk).encode()
+
+    @staticmethod
+    def gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """Compress the chunks with gzip."""
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # Add 16 to the window size to get a gzip header
+        for chunk in chunks:
+            if compressed_chunk := compressor.compress(chunk):
+                yield compressed_chunk
+        yield compressor.flush()
@@ -9,7 +9,7 @@ from pymongo.database import Database
 
 from database.datamodels import latest_datamodel
 from database.measurements import recent_measurements_by_metric_uuid
-from database.reports import insert_new_report, latest_report, latest_reports
+from database.reports import insert_new_report, latest_report, latest_reports, summarized_report
 from initialization.secrets import EXPORT_FIELDS_KEYS_NAME
 from model.actions import copy_report
 from model.data import ReportData
@@ -22,6 +22,7 @@ from model.transformations import (
 )
 from routes.plugins.auth_plugin import EDIT_REPORT_PERMISSION
 from server_utilities.functions import DecryptionError, iso_timestamp, report_date_time, uuid
+from server_utilities.read_only import writable
 from server_utilities.type import ReportId
 
 
@@ -32,24 +33,36 @@ def get_report(database: Database, report_uuid: ReportId = None):
     """Return the quality report, including information about other reports needed for move/copy actions."""
     date_time = report_date_time()
     data_model = latest_datamodel(database, date_time)
-    reports = latest_reports(database, date_time)
-
     if report_uuid and report_uuid.startswith("tag-"):
-        tag_report = get_tag_report(data_model, reports, report_uuid[4:])
+        tag_report = get_tag_report(data_model, writable(latest_reports(database, date_time)), report_uuid[4:])
         reports = []
         if tag_report is not None:
             recent_measurements = recent_measurements_by_metric_uuid(database, date_time)
             summarize_report(tag_report, recent_measurements, data_model)
             reports.append(tag_report)
-    else:
+        hide_credentials(data_model, *reports)
+    elif date_time:
+        reports = writable(latest_reports(database, date_time))
         recent_measurements = recent_measurements_by_metric_uuid(database, date_time)
         for report in reports:
             if not report_uuid or report["report_uuid"] == report_uuid:
                 summarize_report(report, recent_measurements, data_model)
-    hide_credentials(data_model, *reports)
+        hide_credentials(data_model, *reports)
+    else:
+        # Use the summarized reports that are kept up to date as measurements come in:
+        reports = [_current_report(database, data_model, report, report_uuid) for report in latest_reports(database)]
     return dict(reports=reports)
 
 
+def _current_report(database: Database, data_model, report, report_uuid: ReportId = None) -> dict:
+    """Return the current report, summarized if it's the requested report or no specific report was requested."""
+    if not report_uuid or report["report_uuid"] == report_uuid:
+        return summarized_report(database, data_model, report)
+    current_report: dict = writable(report)
+    hide_credentials(data_model, current_report)
+    return current_report
+
+
 @bottle.post("/api/v3/report/import", permissions_required=[EDIT_REPORT_PERMISSION])
 def post_report_import(database: Database):
     """Import a preconfigured report into the database."""
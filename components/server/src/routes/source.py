@@ -1,20 +1,25 @@
 """Source routes."""
 
+from concurrent.futures import Future
 from typing import Any, Optional, Union, cast
 
 import bottle
-import requests
 from pymongo.database import Database
 
 from database.datamodels import default_source_parameters, latest_datamodel
-from database.reports import insert_new_report, latest_reports
+from database.reports import insert_new_report, latest_reports, latest_reports_containing
 from model.actions import copy_source, move_item
 from model.data import MetricData, SourceData
 from model.queries import is_password_parameter
 from model.transformations import change_source_parameter
 from routes.plugins.auth_plugin import EDIT_REPORT_PERMISSION
 from server_utilities.functions import uuid
-from server_utilities.type import URL, EditScope, MetricId, ReportId, SourceId, SubjectId
+from server_utilities.type import EditScope, MetricId, ReportId, SourceId, SubjectId
+from server_utilities.url_availability import Availability, URLAvailabilityChecker
+
+
+# The checker of the availability of URLs in source parameters:
+url_availability = URLAvailabilityChecker()
 
 
 @bottle.post("/api/v3/source/new/<metric_uuid>", permissions_required=[EDIT_REPORT_PERMISSION])
@@ -94,7 +99,7 @@ def post_move_source(source_uuid: SourceId, target_metric_uuid: MetricId, databa
 def delete_source(source_uuid: SourceId, database: Database):
     """Delete a source."""
     data_model = latest_datamodel(database)
-    reports = latest_reports(database)
+    reports = latest_reports_containing(database, source_uuid)
     data = SourceData(data_model, reports, source_uuid)
     delta_description = (
         f"{{user}} deleted the source '{data.source_name}' from metric "
@@ -109,7 +114,7 @@ def delete_source(source_uuid: SourceId, database: Database):
 def post_source_attribute(source_uuid: SourceId, source_attribute: str, database: Database):
     """Set a source attribute."""
     data_model = latest_datamodel(database)
-    reports = latest_reports(database)
+    reports = latest_reports_containing(database, source_uuid)
     data = SourceData(data_model, reports, source_uuid)
     value = dict(bottle.request.json)[source_attribute]
     old_value: Any
@@ -132,7 +137,12 @@ def post_source_attribute(source_uuid: SourceId, source_attribute: str, database
 
 @bottle.post("/api/v3/source/<source_uuid>/parameter/<parameter_key>", permissions_required=[EDIT_REPORT_PERMISSION])
 def post_source_parameter(source_uuid: SourceId, parameter_key: str, database: Database):
-    """Set the source parameter."""
+    """Set the source parameter.
+
+    If the parameter is a URL, or other URLs need to be checked when the parameter changes, the availability of the URLs
+    is checked and returned, unless the client asks to defer the availability checks. The client can then get the
+    results of the checks from the source availability endpoint.
+    """
     data = SourceData(latest_datamodel(database), latest_reports(database), source_uuid)
     new_value = new_parameter_value(data, parameter_key)
     old_value = data.source["parameters"].get(parameter_key) or ""
@@ -151,11 +161,19 @@ def post_source_parameter(source_uuid: SourceId, parameter_key: str, database: D
     reports_to_insert = [(report, changed_ids) for report in data.reports if report["report_uuid"] in changed_ids]
     result = insert_new_report(database, delta_description, *reports_to_insert)
 
-    if availability_checks := _availability_checks(data, parameter_key):
-        result["availability"] = availability_checks
+    availability_checks = _start_availability_checks(data, parameter_key)
+    if availability_checks and not dict(bottle.request.json).get("defer_availability_checks"):
+        result["availability"] = _availability(data, availability_checks)
     return result
 
 
+@bottle.get("/api/v3/source/<source_uuid>/availability", permissions_required=[EDIT_REPORT_PERMISSION])
+def get_source_availability(source_uuid: SourceId, database: Database):
+    """Return the availability of the URLs of the source, reusing recent checks of the same URLs."""
+    data = SourceData(latest_datamodel(database), latest_reports(database), source_uuid)
+    return dict(availability=_availability(data, _start_availability_checks(data)))
+
+
 def new_parameter_value(data, parameter_key: str):
     """Return the new parameter value and if necessary, remove any obsolete multiple choice values."""
     new_value = dict(bottle.request.json)[parameter_key]
@@ -181,37 +199,32 @@ def _source_description(data, edit_scope, parameter_key, old_value):
     return source_description
 
 
-def _availability_checks(data, parameter_key: str) -> list[dict[str, Union[str, int]]]:
-    """Check the availability of the URLs."""
+def _start_availability_checks(data, parameter_key: Optional[str] = None) -> dict[str, Future[Availability]]:
+    """Start checking the availability of the URLs of the source, or only of the URLs that depend on the parameter."""
     parameters = data.datamodel["sources"][data.source["type"]]["parameters"]
     source_parameters = data.source["parameters"]
     url_parameter_keys = [
         key
         for key, value in parameters.items()
-        if value["type"] == "url" and parameter_key == key or parameter_key in value.get("validate_on", [])
+        if value["type"] == "url"
+        and parameter_key in (None, key)
+        or parameter_key is not None
+        and parameter_key in value.get("validate_on", [])
+    ]
+    auth, headers = _basic_auth_credentials(source_parameters), _headers(source_parameters)
+    return {
+        key: url_availability.start(url, auth, headers)
+        for key in url_parameter_keys
+        if (url := source_parameters.get(key, ""))
+    }
+
+
+def _availability(data, availability_checks: dict[str, Future[Availability]]) -> list[Availability]:
+    """Return the results of the availability checks."""
+    return [
+        dict(url_availability.result(check), parameter_key=parameter_key, source_uuid=data.source_uuid)
+        for parameter_key, check in availability_checks.items()
     ]
-    availability_checks = []
-    for url_parameter_key in url_parameter_keys:
-        url = source_parameters.get(url_parameter_key, "")
-        if not url:
-            continue
-        availability = _check_url_availability(url, source_parameters)
-        availability["parameter_key"] = url_parameter_key
-        availability["source_uuid"] = data.source_uuid
-        availability_checks.append(availability)
-    return availability_checks
-
-
-def _check_url_availability(url: URL, source_parameters: dict[str, str]) -> dict[str, Union[int, str]]:
-    """Check the availability of the URL."""
-    # Allow for mal-configured sources:
-    try:
-        response = requests.get(  # noqa: DUO123, # nosec
-            url, auth=_basic_auth_credentials(source_parameters), headers=_headers(source_parameters), verify=False
-        )
-        return dict(status_code=response.status_code, reason=response.reason)
-    except Exception:  # pylint: disable=broad-except
-        return dict(status_code=-1, reason="Unknown error")
 
 
 def _basic_auth_credentials(source_parameters) -> Optional[tuple[str, str]]:
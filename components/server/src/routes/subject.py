@@ -5,7 +5,7 @@ import bottle
 from pymongo.database import Database
 
 from database.datamodels import default_subject_attributes, latest_datamodel
-from database.measurements import measurements_by_metric
+from database.measurements import measurement_history
 from database.reports import insert_new_report, latest_reports, metrics_of_subject
 from model.actions import copy_subject, move_item
 from model.data import ReportData, SubjectData
@@ -111,7 +111,7 @@ def get_subject_measurements(subject_uuid: SubjectId, database: Database):
 
     return dict(
         measurements=list(
-            measurements_by_metric(
+            measurement_history(
                 database, *metric_uuids, min_iso_timestamp=min_iso_timestamp, max_iso_timestamp=report_date_time()
             )
         )
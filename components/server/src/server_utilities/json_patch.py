@@ -0,0 +1,50 @@
+"""JSON patches (RFC 6902), to store the differences between versions of documents compactly.
+
+Only the add, remove, and replace operations are used. Dictionaries are compared key by key, other values, including
+lists, are replaced as a whole if they differ.
+"""
+
+import copy
+from typing import Any
+
+
+def diff(source, target, path: str = "") -> list[dict[str, Any]]:
+    """Return the JSON patch that changes the source into the target."""
+    if source == target:
+        return []
+    if not isinstance(source, dict) or not isinstance(target, dict):
+        return [dict(op="replace", path=path, value=target)]
+    patch: list[dict[str, Any]] = [dict(op="remove", path=_path(path, key)) for key in source if key not in target]
+    for key, value in target.items():
+        if key in source:
+            patch.extend(diff(source[key], value, _path(path, key)))
+        else:
+            patch.append(dict(op="add", path=_path(path, key), value=value))
+    return patch
+
+
+def apply(document, patch: list[dict[str, Any]]):
+    """Apply the JSON patch to the document and return the patched document. The document is changed in place."""
+    for operation in patch:
+        if not operation["path"]:
+            document = copy.deepcopy(operation["value"])
+            continue
+        *parent_keys, key = [_unescape(key) for key in operation["path"].split("/")[1:]]
+        parent = document
+        for parent_key in parent_keys:
+            parent = parent[parent_key]
+        if operation["op"] == "remove":
+            del parent[key]
+        else:
+            parent[key] = copy.deepcopy(operation["value"])
+    return document
+
+
+def _path(path: str, key: str) -> str:
+    """Return the path to the key, escaping the characters that have a special meaning in JSON pointers."""
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def _unescape(key: str) -> str:
+    """Undo the escaping of the key."""
+    return key.replace("~1", "/").replace("~0", "~")
@@ -0,0 +1,80 @@
+"""Read-only versions of the builtin containers, for sharing cached documents between requests."""
+
+import copy
+from collections.abc import Iterable
+from typing import Any, NoReturn
+
+
+class ReadOnlyDict(dict):
+    """Dictionary that can't be changed. Copies are regular dictionaries."""
+
+    def copy(self) -> dict:
+        """Return a shallow copy that can be changed."""
+        return dict(self)
+
+    def __copy__(self) -> dict:
+        """Return a shallow copy that can be changed."""
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict) -> dict:
+        """Return a deep copy that can be changed."""
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        """Pickle as a regular dictionary."""
+        return dict, (dict(self),)
+
+
+class ReadOnlyList(list):
+    """List that can't be changed. Copies are regular lists."""
+
+    def copy(self) -> list:
+        """Return a shallow copy that can be changed."""
+        return list(self)
+
+    def __copy__(self) -> list:
+        """Return a shallow copy that can be changed."""
+        return list(self)
+
+    def __deepcopy__(self, memo: dict) -> list:
+        """Return a deep copy that can be changed."""
+        return [copy.deepcopy(item, memo) for item in self]
+
+    def __reduce__(self):
+        """Pickle as a regular list."""
+        return list, (list(self),)
+
+
+def _read_only(self, *args, **kwargs) -> NoReturn:
+    """Raise an exception because the container is read-only."""
+    raise TypeError(f"{self.__class__.__name__} can't be changed")
+
+
+def _disable_changes(container_class: type, method_names: Iterable[str]) -> None:
+    """Replace the methods of the container class that change the container with methods that raise an exception."""
+    for method_name in method_names:
+        setattr(container_class, method_name, _read_only)
+
+
+_disable_changes(ReadOnlyDict, "__setitem__ __delitem__ __ior__ clear pop popitem setdefault update".split())
+_disable_changes(
+    ReadOnlyList, "__setitem__ __delitem__ __iadd__ __imul__ append clear extend insert pop remove reverse sort".split()
+)
+
+
+def read_only(value: Any) -> Any:
+    """Return a read-only version of the value, converting nested dictionaries and lists as well."""
+    if isinstance(value, dict):
+        return ReadOnlyDict((key, read_only(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return ReadOnlyList(read_only(item) for item in value)
+    return value
+
+
+def writable(value: Any) -> Any:
+    """Return a copy of the value that can be changed, converting nested read-only dictionaries and lists as well."""
+    if isinstance(value, dict):
+        return {key: writable(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [writable(item) for item in value]
+    return value
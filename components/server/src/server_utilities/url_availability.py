@@ -0,0 +1,71 @@
+"""URL availability checks."""
+
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional, Union
+
+import requests
+
+from .type import URL
+
+
+Availability = dict[str, Union[int, str]]
+
+
+class URLAvailabilityChecker:
+    """Check the availability of URLs concurrently and with a timeout.
+
+    Checks are cached per URL and credentials for a short period, so checking the same URL again, for example to get the
+    result of a check started earlier, doesn't access the URL again.
+    """
+
+    def __init__(self, timeout: float = 10, cache_duration: float = 60, max_concurrent_checks: int = 8) -> None:
+        self.__timeout = timeout  # Seconds
+        self.__cache_duration = cache_duration  # Seconds
+        # The executor lives as long as the checker, so it can't be used as context manager. It's shut down when the
+        # checker is closed or garbage collected:
+        self.__executor = ThreadPoolExecutor(  # pylint: disable=consider-using-with
+            max_workers=max_concurrent_checks, thread_name_prefix="url-availability"
+        )
+        self.__finalizer = weakref.finalize(self, self.__executor.shutdown, wait=False)
+        self.__checks: dict[tuple, tuple[float, Future[Availability]]] = {}
+        self.__lock = threading.Lock()
+
+    def start(
+        self, url: URL, auth: Optional[tuple[str, str]] = None, headers: Optional[dict[str, str]] = None
+    ) -> Future[Availability]:
+        """Start checking the availability of the URL, unless it was checked recently, and return the future result."""
+        headers = headers or {}
+        key = (url, auth, tuple(sorted(headers.items())))
+        now = time.monotonic()
+        with self.__lock:
+            min_start = now - self.__cache_duration
+            self.__checks = {key: check for key, check in self.__checks.items() if check[0] > min_start}
+            if key not in self.__checks:
+                self.__checks[key] = (now, self.__executor.submit(self.__check, url, auth, headers))
+            return self.__checks[key][1]
+
+    def close(self) -> None:
+        """Shut down the executor, without waiting for running checks to finish."""
+        self.__finalizer()
+
+    def result(self, check: Future[Availability]) -> Availability:
+        """Return the result of the check, waiting at most the timeout for the check to finish."""
+        try:
+            return dict(check.result(timeout=self.__timeout))
+        except FutureTimeoutError:
+            return dict(status_code=-1, reason="Timeout")
+
+    def __check(self, url: URL, auth: Optional[tuple[str, str]], headers: dict[str, str]) -> Availability:
+        """Check the availability of the URL."""
+        # Allow for mal-configured sources:
+        try:
+            response = requests.get(  # noqa: DUO123, # nosec
+                url, auth=auth, headers=headers, verify=False, timeout=self.__timeout
+            )
+            return dict(status_code=response.status_code, reason=response.reason)
+        except Exception:  # pylint: disable=broad-except
+            return dict(status_code=-1, reason="Unknown error")
@@ -90,3 +90,13 @@ class SourcesTest(MetaModelTestCase):
                 ),
             ),
         )
+
+    def test_invalid_max_connections_per_host(self, path_class):
+        """Test that the maximum number of connections per host should be positive."""
+        self.mock_path(path_class)
+        self.check_validation_error(
+            "ensure this value is greater than 0",
+            source=dict(
+                name="Source", description=self.DESCRIPTION, url=self.URL, parameters={}, max_connections_per_host=0
+            ),
+        )
@@ -0,0 +1,92 @@
+"""Test the change feed of the measurements collection."""
+
+import threading
+import unittest
+from unittest.mock import MagicMock, Mock, PropertyMock, patch
+
+from pymongo.errors import OperationFailure
+
+from database.change_feed import ChangeFeed
+
+from ..fixtures import METRIC_ID
+
+
+@patch("threading.Thread", Mock())
+class ChangeFeedTest(unittest.TestCase):
+    """Unit tests for the change feed."""
+
+    def setUp(self):
+        """Override to create a mock database fixture."""
+        self.database = MagicMock()
+        self.change_feed = ChangeFeed(self.database)
+        self.measurement = dict(
+            _id="id", metric_uuid=METRIC_ID, start="2021-01-01", end="2021-01-02", count=dict(status="target_met")
+        )
+        self.change = dict(
+            operation="update",
+            metric_uuid=METRIC_ID,
+            statuses=dict(count="target_met"),
+            start="2021-01-01",
+            end="2021-01-02",
+        )
+
+    def test_subscribe(self):
+        """Test that subscribers get the changes since they subscribed."""
+        self.change_feed.publish("update", self.measurement)
+        with self.change_feed.subscribe() as subscription:
+            self.change_feed.publish("update", self.measurement)
+            self.assertEqual([self.change], subscription.changes())
+            self.assertEqual([], subscription.changes())
+
+    def test_unsubscribe(self):
+        """Test that subscriptions end when leaving the context."""
+        with self.change_feed.subscribe() as subscription:
+            pass
+        self.change_feed.publish("update", self.measurement)
+        self.assertEqual([], subscription.changes())
+
+    def test_watcher_stops_without_subscribers(self):
+        """Test that the watcher is stopped when the last subscriber unsubscribes, and restarted on subscription."""
+        with patch("threading.Thread") as thread:
+            with self.change_feed.subscribe():
+                with self.change_feed.subscribe():
+                    pass
+                first_stop_event = thread.call_args.kwargs["args"][0]
+                self.assertFalse(first_stop_event.is_set())
+            self.assertTrue(first_stop_event.is_set())
+            with self.change_feed.subscribe():
+                self.assertFalse(thread.call_args.kwargs["args"][0].is_set())
+        self.assertEqual(2, thread.call_count)
+
+    def test_watch_change_stream(self):
+        """Test that the changes from the change stream are passed to the subscribers."""
+        change_stream = self.database.measurements.watch.return_value.__enter__.return_value
+        type(change_stream).alive = PropertyMock(side_effect=[True, True, False])
+        change_stream.try_next.side_effect = [dict(operationType="update", fullDocument=self.measurement), None]
+        with self.change_feed.subscribe() as subscription:
+            self.change_feed.watch_change_stream(threading.Event())
+            self.assertEqual([self.change], subscription.changes())
+
+    def test_stop_watching_change_stream(self):
+        """Test that the change stream is no longer watched when the watcher is stopped."""
+        stop = threading.Event()
+        stop.set()
+        self.change_feed.watch_change_stream(stop)
+        self.database.measurements.watch.return_value.__enter__.return_value.try_next.assert_not_called()
+
+    def test_change_stream_not_supported(self):
+        """Test that the change stream raises an error if the database doesn't support change streams."""
+        self.database.measurements.watch.side_effect = OperationFailure("Only supported on replica sets")
+        self.assertRaises(OperationFailure, self.change_feed.watch_change_stream, threading.Event())
+
+    @patch("database.change_feed.POLL_INTERVAL", 0)
+    @patch("database.change_feed.iso_timestamp", Mock(return_value="2021-01-02"))
+    def test_poll(self):
+        """Test that changed measurements are passed to the subscribers once when polling."""
+        new_measurement = dict(self.measurement, _id="id2", start="2021-01-02")
+        self.database.measurements.find.return_value = [self.measurement, new_measurement]
+        with self.change_feed.subscribe() as subscription:
+            self.change_feed.poll(threading.Event(), polls=2)
+            self.assertEqual(
+                [self.change, dict(self.change, operation="insert", start="2021-01-02")], subscription.changes()
+            )
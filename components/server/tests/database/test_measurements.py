@@ -1,11 +1,24 @@
 """Test the measurements collection."""
 
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
-from database.measurements import measurements_by_metric
+from database.measurements import (
+    BUCKET_SCALE_FIELDS,
+    insert_new_measurement,
+    latest_and_latest_successful_measurement,
+    measurement_buckets,
+    measurement_history,
+    measurements_by_metric,
+    recent_measurements,
+    recent_measurements_by_metric_uuid,
+    update_measurement_end,
+)
+from model.measurement import Measurement
+from model.metric import Metric
+from server_utilities.functions import iso_timestamp
 
-from ..fixtures import METRIC_ID, METRIC_ID2, METRIC_ID3
+from ..fixtures import METRIC_ID, METRIC_ID2, METRIC_ID3, SOURCE_ID
 
 
 class MeasurementsByMetricTest(unittest.TestCase):
@@ -15,55 +28,255 @@ class MeasurementsByMetricTest(unittest.TestCase):
         """Override to create a mock database fixture."""
         self.database = Mock()
         measurements = [
-            {"start": "0", "end": "1", "metric_uuid": METRIC_ID},
-            {"start": "3", "end": "4", "metric_uuid": METRIC_ID},
-            {"start": "6", "end": "7", "metric_uuid": METRIC_ID},
-            {"start": "1", "end": "2", "metric_uuid": METRIC_ID2},
-            {"start": "4", "end": "5", "metric_uuid": METRIC_ID2},
-            {"start": "7", "end": "8", "metric_uuid": METRIC_ID2},
-            {"start": "2", "end": "3", "metric_uuid": METRIC_ID3},
-            {"start": "5", "end": "6", "metric_uuid": METRIC_ID3},
-            {"start": "8", "end": "9", "metric_uuid": METRIC_ID3},
+            {"_id": "0", "start": "0", "end": "1", "metric_uuid": METRIC_ID},
+            {"_id": "3", "start": "3", "end": "4", "metric_uuid": METRIC_ID},
+            {"_id": "6", "start": "6", "end": "7", "metric_uuid": METRIC_ID},
+            {"_id": "1", "start": "1", "end": "2", "metric_uuid": METRIC_ID2},
+            {"_id": "4", "start": "4", "end": "5", "metric_uuid": METRIC_ID2},
+            {"_id": "7", "start": "7", "end": "8", "metric_uuid": METRIC_ID2},
+            {"_id": "2", "start": "2", "end": "3", "metric_uuid": METRIC_ID3},
+            {"_id": "5", "start": "5", "end": "6", "metric_uuid": METRIC_ID3},
+            {"_id": "8", "start": "8", "end": "9", "metric_uuid": METRIC_ID3},
         ]
 
-        def find_one_side_effect(query, projection, sort=None):
-            """Side effect for mocking the database measurements."""
-            return find_side_effect(query, projection, sort)[-1]
-
-        def find_side_effect(query, projection, sort=None):  # pylint: disable=unused-argument
+        def find_one_side_effect(query, projection):  # pylint: disable=unused-argument
             """Side effect for mocking the last database measurement."""
+            return [dict(m, entities=[]) for m in measurements if m["_id"] == query["_id"]][0]
+
+        def find_side_effect(query, projection, sort):  # pylint: disable=unused-argument
+            """Side effect for mocking the database measurements."""
             metric_uuids = query["metric_uuid"]["$in"]
             min_iso_timestamp = query["end"]["$gt"] if "end" in query else ""
             max_iso_timestamp = query["start"]["$lt"] if "start" in query else ""
-            return [
-                m
-                for m in measurements
-                if m["metric_uuid"] in metric_uuids
-                and (not min_iso_timestamp or m["end"] > min_iso_timestamp)
-                and (not max_iso_timestamp or m["start"] < max_iso_timestamp)
-            ]
+            return sorted(
+                (
+                    dict(m)
+                    for m in measurements
+                    if m["metric_uuid"] in metric_uuids
+                    and (not min_iso_timestamp or m["end"] > min_iso_timestamp)
+                    and (not max_iso_timestamp or m["start"] < max_iso_timestamp)
+                ),
+                key=lambda m: m["start"],
+            )
 
         self.database.measurements.find_one.side_effect = find_one_side_effect
         self.database.measurements.find.side_effect = find_side_effect
 
     def test_get_from_one_metric(self):
         """Test that we get all three measurement fields."""
-        measurements = measurements_by_metric(self.database, METRIC_ID)
+        measurements = list(measurements_by_metric(self.database, METRIC_ID))
         self.assertEqual(len(measurements), 3)
         for measurement in measurements:
             self.assertEqual(measurement["metric_uuid"], METRIC_ID)
 
     def test_get_from_multiple_metric(self):
         """Test that we get all three measurement fields."""
-        measurements = measurements_by_metric(self.database, *[METRIC_ID, METRIC_ID2])
+        measurements = list(measurements_by_metric(self.database, *[METRIC_ID, METRIC_ID2]))
         self.assertEqual(len(measurements), 6)
         for measurement in measurements:
             self.assertIn(measurement["metric_uuid"], [METRIC_ID, METRIC_ID2])
 
     def test_get_timestamp_restriction(self):
         """Test that we get all three measurement fields."""
-        measurements = measurements_by_metric(self.database, METRIC_ID, min_iso_timestamp="0.5", max_iso_timestamp="4")
+        measurements = list(
+            measurements_by_metric(self.database, METRIC_ID, min_iso_timestamp="0.5", max_iso_timestamp="4")
+        )
         self.assertEqual(len(measurements), 2)
         for measurement in measurements:
             self.assertEqual(measurement["metric_uuid"], METRIC_ID)
             self.assertIn(measurement["start"], ["0", "3"])
+
+    def test_measurements_are_sorted_by_start(self):
+        """Test that the measurements are sorted by start and that only the last one is read with entities."""
+        measurements = list(measurements_by_metric(self.database, METRIC_ID, METRIC_ID2))
+        self.assertEqual(["0", "1", "3", "4", "6", "7"], [measurement["start"] for measurement in measurements])
+        self.assertEqual([False] * 5 + [True], ["entities" in measurement for measurement in measurements])
+        self.assertNotIn("_id", measurements[0])
+        self.database.measurements.find_one.assert_called_once()
+
+    def test_no_measurements(self):
+        """Test that no measurements are returned if there are none."""
+        self.assertEqual([], list(measurements_by_metric(self.database, "missing metric")))
+        self.database.measurements.find_one.assert_not_called()
+
+
+class LatestAndLatestSuccessfulMeasurementTest(unittest.TestCase):
+    """Unit tests for getting the latest and latest successful measurement of a metric."""
+
+    def setUp(self):
+        """Override to create a mock database fixture and a metric."""
+        self.database = Mock()
+        data_model = dict(metrics=dict(metric_type=dict(direction="<", default_scale="count", scales=["count"])))
+        self.metric = Metric(data_model, dict(type="metric_type", sources={}), METRIC_ID)
+
+    def test_no_measurements(self):
+        """Test that there is no latest measurement if the metric has no measurements."""
+        self.database.measurements.aggregate.return_value = []
+        self.assertEqual((None, None), latest_and_latest_successful_measurement(self.database, self.metric))
+
+    def test_no_successful_measurement(self):
+        """Test that there is no latest successful measurement if all measurements failed."""
+        self.database.measurements.aggregate.return_value = [dict(_id="id", sources=[], latest_successful=[])]
+        latest, latest_successful = latest_and_latest_successful_measurement(self.database, self.metric)
+        self.assertEqual("id", latest["_id"])
+        self.assertIsNone(latest_successful)
+
+    def test_latest_successful_measurement(self):
+        """Test that the latest successful measurement is returned too."""
+        entity_user_data = dict(entity=dict(status="confirmed"))
+        self.database.measurements.aggregate.return_value = [
+            dict(
+                _id="id",
+                sources=[],
+                latest_successful=[dict(sources=[dict(source_uuid=SOURCE_ID, entity_user_data=entity_user_data)])],
+            )
+        ]
+        latest, latest_successful = latest_and_latest_successful_measurement(self.database, self.metric)
+        self.assertNotIn("latest_successful", latest)
+        self.assertEqual(entity_user_data, latest_successful.sources()[0]["entity_user_data"])
+
+
+class RecentMeasurementsTest(unittest.TestCase):
+    """Unit tests for the recent measurements."""
+
+    def setUp(self):
+        """Override to create a mock database fixture with one recent measurement."""
+        self.database = Mock()
+        now = iso_timestamp()
+        self.measurement = dict(
+            _id="id", metric_uuid=METRIC_ID, start=now, end=now, sources=[dict(source_uuid=SOURCE_ID, entities=[])]
+        )
+        self.database.measurements.find.return_value = [self.measurement]
+
+    def test_read_once(self):
+        """Test that the recent measurements are read from the database once."""
+        recent_measurements(self.database)
+        expected = dict(self.measurement, sources=[dict(source_uuid=SOURCE_ID)])
+        del expected["_id"]
+        self.assertEqual({METRIC_ID: [expected]}, recent_measurements_by_metric_uuid(self.database))
+        self.database.measurements.find.assert_called_once()
+
+    def test_old_measurements_are_read_from_the_database(self):
+        """Test that measurements before the recent period are read from the database."""
+        self.database.measurements.find.return_value = []
+        recent_measurements_by_metric_uuid(self.database, "2020-01-01T00:00:00+00:00")
+        recent_measurements_by_metric_uuid(self.database, "2020-01-01T00:00:00+00:00")
+        self.assertEqual(2, self.database.measurements.find.call_count)
+
+    def test_insert_measurement(self):
+        """Test that inserted measurements are added to the recent measurements."""
+        recent = recent_measurements(self.database)
+        version = recent.version(METRIC_ID)
+        self.database.measurements.insert_one.side_effect = lambda measurement: measurement.update(_id="id2")
+        data_model = dict(metrics=dict(metric_type=dict(direction="<", default_scale="count", scales=["count"])))
+        metric = Metric(data_model, dict(type="metric_type", sources={}), METRIC_ID)
+        insert_new_measurement(self.database, Measurement(metric, dict(metric_uuid=METRIC_ID, sources=[])))
+        self.assertEqual(2, len(recent.of_metric(METRIC_ID)))
+        self.assertLess(version, recent.version(METRIC_ID))
+
+    def test_update_measurement_end(self):
+        """Test that the end of recent measurements is updated."""
+        recent = recent_measurements(self.database)
+        version = recent.version(METRIC_ID)
+        update_measurement_end(self.database, "id")
+        self.assertEqual(1, len(recent.of_metric(METRIC_ID)))
+        self.assertLess(version, recent.version(METRIC_ID))
+
+    def test_prune_measurements_that_are_no_longer_recent(self):
+        """Test that measurements that are no longer recent are removed and that the version is increased."""
+        recent = recent_measurements(self.database)
+        version = recent.version(METRIC_ID)
+        with patch("database.measurements.RECENT_MEASUREMENT_DAYS", -1):
+            self.assertEqual([], recent.of_metric(METRIC_ID))
+        self.assertLess(version, recent.version(METRIC_ID))
+
+    def test_update_end_of_measurement_that_is_no_longer_recent(self):
+        """Test that a measurement that becomes recent by updating its end is read from the database."""
+        self.database.measurements.find.return_value = []
+        recent = recent_measurements(self.database)
+        self.database.measurements.find_one.return_value = self.measurement
+        update_measurement_end(self.database, "id")
+        self.assertEqual(1, len(recent.of_metric(METRIC_ID)))
+
+
+class MeasurementBucketsTest(unittest.TestCase):
+    """Unit tests for the measurement buckets with the compact history of measurements."""
+
+    def setUp(self):
+        """Override to create measurement fixtures."""
+        self.measurements = [
+            dict(_id="id1", metric_uuid=METRIC_ID, start="1", end="2", count=dict(value="1", status="target_met")),
+            dict(_id="id2", metric_uuid=METRIC_ID, start="2", end="3", count=dict(value="2", status="target_met")),
+            dict(_id="id3", metric_uuid=METRIC_ID2, start="1", end="3", percentage=dict(value="50")),
+        ]
+
+    def test_buckets_per_metric(self):
+        """Test that measurements of different metrics are put in different buckets."""
+        buckets = list(measurement_buckets(self.measurements))
+        self.assertEqual([METRIC_ID, METRIC_ID2], [bucket["metric_uuid"] for bucket in buckets])
+        self.assertEqual(["id1", "id2"], buckets[0]["measurement_ids"])
+        self.assertEqual(["1", "2"], buckets[0]["count"]["value"])
+        self.assertEqual([None, None], buckets[0]["percentage"]["value"])
+        self.assertEqual(("1", "3"), (buckets[0]["first_start"], buckets[0]["last_end"]))
+
+    @patch("database.measurements.MEASUREMENTS_PER_BUCKET", 1)
+    def test_full_bucket(self):
+        """Test that a new bucket is started when a bucket is full."""
+        buckets = list(measurement_buckets(self.measurements))
+        self.assertEqual([METRIC_ID, METRIC_ID, METRIC_ID2], [bucket["metric_uuid"] for bucket in buckets])
+
+    def test_history(self):
+        """Test that the measurement history contains the compact measurements in the requested period."""
+        database = Mock()
+        database.measurement_buckets.find.return_value = measurement_buckets(self.measurements)
+        self.assertEqual(
+            [
+                dict(
+                    metric_uuid=METRIC_ID,
+                    start="2",
+                    end="3",
+                    count=dict(dict.fromkeys(BUCKET_SCALE_FIELDS), value="2", status="target_met"),
+                ),
+                dict(
+                    metric_uuid=METRIC_ID2,
+                    start="1",
+                    end="3",
+                    percentage=dict(dict.fromkeys(BUCKET_SCALE_FIELDS), value="50"),
+                ),
+            ],
+            list(measurement_history(database, METRIC_ID, METRIC_ID2, min_iso_timestamp="2", max_iso_timestamp="3")),
+        )
+
+    def test_update_end_in_bucket_in_batches(self):
+        """Test that the end of measurements is written to the buckets when enough ends are pending."""
+        database = Mock()
+        database.measurements.find.return_value = []
+        with patch("database.measurements.MAX_PENDING_BUCKET_ENDS", 2):
+            update_measurement_end(database, "id1")
+            database.measurement_buckets.bulk_write.assert_not_called()
+            update_measurement_end(database, "id2")
+        updates = database.measurement_buckets.bulk_write.call_args[0][0]
+        self.assertEqual(
+            [{"measurement_ids": "id1"}, {"measurement_ids": "id2"}],
+            [update._filter for update in updates],  # pylint: disable=protected-access
+        )
+
+    def test_update_end_in_bucket_before_reading_history(self):
+        """Test that pending measurement ends are written to the buckets before the history is read."""
+        database = Mock()
+        database.measurements.find.return_value = []
+        database.measurement_buckets.find.return_value = []
+        update_measurement_end(database, "id")
+        self.assertEqual([], list(measurement_history(database, METRIC_ID)))
+        database.measurement_buckets.bulk_write.assert_called_once()
+
+    def test_insert_measurement_in_bucket(self):
+        """Test that inserted measurements are added to the last bucket of the metric."""
+        database = Mock()
+        database.measurements.insert_one.side_effect = lambda measurement: measurement.update(_id="id")
+        data_model = dict(metrics=dict(metric_type=dict(direction="<", default_scale="count", scales=["count"])))
+        metric = Metric(data_model, dict(type="metric_type", sources={}), METRIC_ID)
+        insert_new_measurement(database, Measurement(metric, dict(metric_uuid=METRIC_ID, sources=[])))
+        update = database.measurement_buckets.bulk_write.call_args[0][0][0]._doc  # pylint: disable=protected-access
+        self.assertEqual("id", update["$push"]["measurement_ids"])
+        self.assertEqual(1, update["$inc"]["nr_measurements"])
@@ -3,11 +3,21 @@
 import unittest
 from unittest.mock import Mock
 
-from database.reports import latest_metric, metrics_of_subject
+from pymongo import UpdateMany
+
+from database.reports import (
+    REPORT_SNAPSHOT_INTERVAL,
+    insert_new_report,
+    latest_metric,
+    latest_reports,
+    materialize_reports,
+    metrics_of_subject,
+    uuid_path,
+)
 from model.metric import Metric
 from server_utilities.type import MetricId
 
-from ..fixtures import METRIC_ID, METRIC_ID2, SUBJECT_ID
+from ..fixtures import METRIC_ID, METRIC_ID2, REPORT_ID, REPORT_ID2, SOURCE_ID, SUBJECT_ID
 
 
 class MetricsTest(unittest.TestCase):
@@ -45,6 +55,159 @@ class MetricsTest(unittest.TestCase):
         self.database.measurements.find.return_value = []
         self.assertEqual(None, latest_metric(self.database, MetricId("non-existing")))
 
+    def test_latest_metric_reads_the_reports_once(self):
+        """Test that the snapshot of the latest reports is reused, so looking up a metric doesn't read the reports."""
+        latest_metric(self.database, METRIC_ID)
+        latest_metric(self.database, METRIC_ID)
+        self.database.reports.find.assert_called_once()
+
+
+class LatestReportsTest(unittest.TestCase):
+    """Unit tests for the snapshot of the latest reports."""
+
+    def setUp(self):
+        """Override to create a mock database fixture."""
+        self.database = Mock()
+        self.database.sessions.find_one.return_value = None
+        self.report = dict(_id="1", report_uuid=REPORT_ID, title="Report")
+        self.database.reports.find.return_value = [self.report]
+
+    def test_reports_are_read_only(self):
+        """Test that the reports in the snapshot can't be changed, because they are shared between requests."""
+        report = latest_reports(self.database)[0]
+        self.assertRaises(TypeError, report.__setitem__, "title", "New title")
+
+    def test_snapshot_is_shared(self):
+        """Test that the reports are read from the database once."""
+        self.assertEqual(latest_reports(self.database), latest_reports(self.database))
+        self.database.reports.find.assert_called_once()
+
+    def test_past_reports(self):
+        """Test that reports at a past date and time are read with one aggregation, and not from the snapshot."""
+        self.database.reports.aggregate.return_value = [dict(_id=1, report_uuid=REPORT_ID, title="Old title")]
+        reports = latest_reports(self.database, "2020-01-01T00:00:00+00:00")
+        self.assertEqual([dict(_id="1", report_uuid=REPORT_ID, title="Old title")], reports)
+        self.database.reports.aggregate.assert_called_once()
+        self.database.reports.find.assert_not_called()
+
+    def test_snapshot_is_refreshed_on_insert(self):
+        """Test that the reports are read again after a new report has been inserted."""
+        latest_reports(self.database)
+        insert_new_report(self.database, "delta", (dict(report_uuid=REPORT_ID, title="New title"), [REPORT_ID]))
+        self.database.reports.find.return_value = [dict(_id="2", report_uuid=REPORT_ID, title="New title")]
+        self.assertEqual("New title", latest_reports(self.database)[0]["title"])
+
+
+class ReportVersionsTest(unittest.TestCase):
+    """Unit tests for storing report versions as patches."""
+
+    def setUp(self):
+        """Override to create a mock database fixture."""
+        self.database = Mock()
+        self.database.sessions.find_one.return_value = None
+        self.report = dict(_id="1", report_uuid=REPORT_ID, title="Report", subjects={}, version=1, last=True)
+        self.database.reports.find.return_value = [self.report]
+
+    def test_new_version(self):
+        """Test that a new version of the report is inserted."""
+        insert_new_report(self.database, "delta", (dict(report_uuid=REPORT_ID, title="New title"), [REPORT_ID]))
+        self.database.reports.insert.assert_called_once()
+        self.assertEqual(2, self.database.reports.insert.call_args[0][0]["version"])
+
+    def test_previous_version_is_replaced_by_patch(self):
+        """Test that the previous version of the report is replaced by a patch."""
+        insert_new_report(self.database, "delta", (dict(report_uuid=REPORT_ID, title="New title"), [REPORT_ID]))
+        patch = [dict(op="replace", path="/title", value="Report"), dict(op="add", path="/subjects", value={})]
+        update = {"$unset": dict(last="", title="", subjects=""), "$set": dict(patch=patch)}
+        self.database.reports.bulk_write.assert_called_once_with(
+            [UpdateMany({"report_uuid": REPORT_ID, "last": {"$exists": True}}, update)]
+        )
+
+    def test_snapshot_version_is_kept(self):
+        """Test that a snapshot version of the report is not replaced by a patch."""
+        self.report["version"] = REPORT_SNAPSHOT_INTERVAL
+        insert_new_report(self.database, "delta", (dict(report_uuid=REPORT_ID, title="New title"), [REPORT_ID]))
+        self.database.reports.bulk_write.assert_called_once_with(
+            [UpdateMany({"report_uuid": REPORT_ID, "last": {"$exists": True}}, {"$unset": dict(last="")})]
+        )
+
+    def test_materialize_complete_version(self):
+        """Test that a complete version doesn't need to be materialized."""
+        self.assertEqual([self.report], materialize_reports(self.database, [self.report]))
+        self.database.reports.find.assert_not_called()
+
+    def test_materialize_patched_version(self):
+        """Test that a version stored as patch is materialized by applying the patches of the newer versions."""
+        self.database.reports.find.return_value = [
+            dict(report_uuid=REPORT_ID, timestamp="3", version=3, patch=[dict(op="replace", path="/title", value="3")]),
+            dict(report_uuid=REPORT_ID, timestamp="4", version=4, title="4", subjects={}, last=True),
+        ]
+        report_version = dict(
+            _id="2", report_uuid=REPORT_ID, timestamp="2", version=2, patch=[dict(op="remove", path="/subjects")]
+        )
+        self.assertEqual(
+            [dict(_id="2", report_uuid=REPORT_ID, timestamp="2", version=2, title="3")],
+            materialize_reports(self.database, [report_version]),
+        )
+
+    def test_materialize_patched_versions_with_one_query(self):
+        """Test that the newer versions needed to materialize multiple patched versions are read with one query."""
+        self.database.reports.find.return_value = [
+            dict(report_uuid=REPORT_ID, timestamp="3", version=3, title="3", last=True),
+            dict(report_uuid=REPORT_ID2, timestamp="3", version=5, title="5", last=True),
+        ]
+        patch = [dict(op="remove", path="/title")]
+        report_versions = [
+            dict(report_uuid=REPORT_ID, timestamp="2", version=2, patch=patch),
+            dict(report_uuid=REPORT_ID2, timestamp="2", version=4, patch=patch),
+        ]
+        self.assertEqual(
+            [
+                dict(report_uuid=REPORT_ID, timestamp="2", version=2),
+                dict(report_uuid=REPORT_ID2, timestamp="2", version=4),
+            ],
+            materialize_reports(self.database, report_versions),
+        )
+        self.database.reports.find.assert_called_once()
+
+    def test_materialize_without_complete_version(self):
+        """Test that an exception is raised if there's no complete version to apply the patches to."""
+        self.database.reports.find.return_value = []
+        report_version = dict(report_uuid=REPORT_ID, timestamp="2", version=2, patch=[])
+        self.assertRaises(LookupError, materialize_reports, self.database, [report_version])
+
+
+class UUIDPathTest(unittest.TestCase):
+    """Unit tests for the index of uuids."""
+
+    def setUp(self):
+        """Override to create a mock database fixture."""
+        self.database = Mock()
+        self.database.sessions.find_one.return_value = None
+        self.report = dict(
+            _id="1",
+            report_uuid=REPORT_ID,
+            subjects={SUBJECT_ID: dict(metrics={METRIC_ID: dict(sources={SOURCE_ID: {}})})},
+        )
+        self.database.reports.find.return_value = [self.report]
+
+    def test_paths(self):
+        """Test that the uuids of the report, subject, and metric containing an item are returned."""
+        self.assertEqual((REPORT_ID,), uuid_path(self.database, SUBJECT_ID))
+        self.assertEqual((REPORT_ID, SUBJECT_ID), uuid_path(self.database, METRIC_ID))
+        self.assertEqual((REPORT_ID, SUBJECT_ID, METRIC_ID), uuid_path(self.database, SOURCE_ID))
+        self.assertEqual((), uuid_path(self.database, "non-existing"))
+        self.database.reports.find.assert_called_once()
+
+    def test_invalidate_index_on_insert(self):
+        """Test that the index is rebuilt after a new report has been inserted."""
+        uuid_path(self.database, METRIC_ID)
+        self.report["subjects"][SUBJECT_ID]["metrics"] = {METRIC_ID2: {}}
+        insert_new_report(self.database, "delta", (self.report, [REPORT_ID]))
+        self.report["_id"] = "2"
+        self.assertEqual((), uuid_path(self.database, METRIC_ID))
+        self.assertEqual((REPORT_ID, SUBJECT_ID), uuid_path(self.database, METRIC_ID2))
+
 
 class MetricsForSubjectTest(unittest.TestCase):
     """Unittest for getting all metrics belonging to a single subject."""
@@ -53,3 +53,33 @@ class SessionsTest(unittest.TestCase):
         self.create_session()
         self.assertEqual("John", sessions.user(database=self.database)["user"])
         self.database.sessions.find_one.assert_called_with({"session_id": 4})
+
+    def test_find_cached_session(self):
+        """Test that a session that was found recently is not read from the database again."""
+        self.create_session()
+        sessions.find_session(self.database, SessionId("5"))
+        self.assertEqual("John", sessions.find_session(self.database, SessionId("5"))["user"])
+        self.database.sessions.find_one.assert_called_once()
+
+    def test_find_session_again_after_the_cache_duration(self):
+        """Test that a session is read from the database again after the cache duration."""
+        self.create_session()
+        sessions.find_session(self.database, SessionId("5"))
+        with patch("time.monotonic", Mock(return_value=10**9)):
+            sessions.find_session(self.database, SessionId("5"))
+        self.assertEqual(2, self.database.sessions.find_one.call_count)
+
+    def test_unknown_sessions_are_not_cached(self):
+        """Test that a missing session is read from the database again, so a login is noticed immediately."""
+        self.database.sessions.find_one.return_value = None
+        self.assertIsNone(sessions.find_session(self.database, SessionId("5")))
+        self.create_session()
+        self.assertEqual("John", sessions.find_session(self.database, SessionId("5"))["user"])
+
+    def test_delete_removes_cached_session(self):
+        """Test that a deleted session is no longer found."""
+        self.create_session()
+        sessions.find_session(self.database, SessionId("5"))
+        sessions.delete(self.database, SessionId("5"))
+        self.database.sessions.find_one.return_value = None
+        self.assertIsNone(sessions.find_session(self.database, SessionId("5")))
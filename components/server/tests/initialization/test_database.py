@@ -28,6 +28,7 @@ class DatabaseInitTest(unittest.TestCase):
         self.database.sessions.find_one.return_value = dict(user="jodoe")
         self.database.measurements.count_documents.return_value = 0
         self.database.measurements.index_information.return_value = {}
+        self.database.measurement_buckets.find_one.return_value = dict(_id="id")
         self.mongo_client().quality_time_db = self.database
 
     def init_database(self, data_model_json: str, assert_glob_called: bool = True) -> None:
@@ -312,3 +313,20 @@ class DatabaseInitTest(unittest.TestCase):
                 ),
             ]
         )
+
+    def test_add_measurement_buckets(self):
+        """Test that the measurement buckets are added if they don't exist yet."""
+        self.database.measurement_buckets.find_one.return_value = None
+        self.database.measurements.find.return_value = [
+            dict(_id="id1", metric_uuid="metric_uuid", start="1", end="2"),
+            dict(_id="id2", metric_uuid="metric_uuid", start="2", end="3"),
+        ]
+        self.init_database("{}")
+        migration = self.database.measurement_buckets_migration
+        migration.insert_one.assert_called_once()
+        migration.rename.assert_called_once_with("measurement_buckets", dropTarget=True)
+
+    def test_skip_adding_measurement_buckets(self):
+        """Test that the measurement buckets are not added if they already exist."""
+        self.init_database("{}")
+        self.database.measurement_buckets_migration.insert_one.assert_not_called()
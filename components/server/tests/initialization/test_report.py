@@ -15,6 +15,7 @@ class ReportInitTest(unittest.TestCase):
         """Override to create database and JSON fixtures."""
         self.database = Mock()
         self.database.reports.distinct.return_value = []
+        self.database.reports.find.return_value = []
         self.database.datamodels.find_one.return_value = dict(
             _id="id",
             subjects=dict(subject_type=dict(name="name", description="")),
@@ -3,10 +3,11 @@
 import logging
 import unittest
 from datetime import datetime, timezone
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import bottle
 
+from database.reports import insert_new_reports_overview
 from routes.plugins import AuthPlugin, InjectionPlugin
 from routes.plugins.auth_plugin import EDIT_REPORT_PERMISSION
 
@@ -90,6 +91,25 @@ class AuthPluginTest(unittest.TestCase):
         route = bottle.Route(bottle.app(), "/", "POST", self.route, permissions_required=[EDIT_REPORT_PERMISSION])
         self.assertEqual(self.success, route.call())
 
+    def test_permissions_are_cached(self):
+        """Test that the permissions are read once for a series of requests."""
+        self.database.sessions.find_one.return_value = self.session
+        route = bottle.Route(bottle.app(), "/", "POST", self.route, permissions_required=[EDIT_REPORT_PERMISSION])
+        route.call()
+        route.call()
+        self.database.reports_overviews.find_one.assert_called_once()
+
+    def test_changed_permissions(self):
+        """Test that changed permissions are used after a new reports overview is inserted."""
+        self.database.sessions.find_one.return_value = self.session
+        route = bottle.Route(bottle.app(), "/", "POST", self.route, permissions_required=[EDIT_REPORT_PERMISSION])
+        route.call()
+        permissions = {EDIT_REPORT_PERMISSION: ["jodoe"]}
+        self.database.reports_overviews.find_one.return_value = dict(_id="id", permissions=permissions)
+        with patch("bottle.request"):
+            insert_new_reports_overview(self.database, "{user} changed the permissions", dict(permissions=permissions))
+        self.assertRaises(bottle.HTTPError, route.call)
+
     def test_non_protected_route(self):
         """Test that the session is invalid when it's missing."""
         self.database.sessions.find_one.return_value = None
@@ -0,0 +1,71 @@
+"""Unit tests for the route JSON streaming plugin."""
+
+import gzip
+import json
+import unittest
+from unittest.mock import patch
+
+import bottle
+
+from routes.plugins import JSONStreamingPlugin
+
+
+class JSONStreamingPluginTest(unittest.TestCase):
+    """Unit tests for the route JSON streaming plugin."""
+
+    def setUp(self):
+        """Override to install the plugin."""
+        bottle.install(JSONStreamingPlugin())
+
+    def tearDown(self):
+        """Override to remove the plugins."""
+        bottle.app().uninstall(True)
+        bottle.response.headers.clear()
+
+    @staticmethod
+    def call(callback):
+        """Call the route with the plugin applied."""
+        return list(bottle.Route(bottle.app(), "/", "GET", callback).call())
+
+    def test_encode_dict(self):
+        """Test that a dict is encoded as JSON."""
+        value = dict(reports=[dict(report_uuid="report_uuid", subjects=dict(subject=dict(metrics={})))], ok=True)
+        self.assertEqual(value, json.loads(b"".join(self.call(lambda: value))))
+        self.assertEqual("application/json", bottle.response.content_type)
+
+    def test_encode_generator(self):
+        """Test that generators are encoded as JSON lists."""
+        measurements = (dict(start=str(index)) for index in range(3))
+        self.assertEqual(
+            dict(measurements=[dict(start="0"), dict(start="1"), dict(start="2")]),
+            json.loads(b"".join(self.call(lambda: dict(measurements=measurements)))),
+        )
+
+    def test_encode_in_chunks(self):
+        """Test that large values are returned in multiple chunks."""
+        measurements = [dict(start="x" * JSONStreamingPlugin.CHUNK_SIZE) for _ in range(3)]
+        chunks = self.call(lambda: dict(measurements=iter(measurements)))
+        self.assertEqual(4, len(chunks))
+        self.assertEqual(dict(measurements=measurements), json.loads(b"".join(chunks)))
+
+    def test_encode_reports_per_metric(self):
+        """Test that reports are encoded metric by metric, so large reports are not encoded as a whole."""
+        metric = dict(name="Metric", sources=dict(source=dict(type="sonarqube")))
+        subject = dict(metrics=dict(metric1=metric, metric2=metric))
+        report = dict(report_uuid="report_uuid", subjects=dict(subject=subject))
+        with patch.object(JSONStreamingPlugin, "CHUNK_SIZE", 1):
+            chunks = self.call(lambda: dict(reports=[report]))
+        self.assertEqual(2, chunks.count(json.dumps(metric).encode()))
+        self.assertEqual(dict(reports=[report]), json.loads(b"".join(chunks)))
+
+    @patch("bottle.request")
+    def test_gzip(self, request):
+        """Test that the JSON is compressed if the client accepts gzip."""
+        request.get_header.return_value = "gzip, deflate"
+        chunks = self.call(lambda: dict(ok=True))
+        self.assertEqual(dict(ok=True), json.loads(gzip.decompress(b"".join(chunks))))
+        self.assertEqual("gzip", bottle.response.get_header("Content-Encoding"))
+
+    def test_leave_other_results_alone(self):
+        """Test that results other than dicts are returned unchanged."""
+        self.assertEqual(["event"], self.call(lambda: iter(["event"])))
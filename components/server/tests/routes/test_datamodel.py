@@ -5,7 +5,12 @@ from unittest.mock import Mock, patch
 
 import bottle
 
-from database.datamodels import default_source_parameters, default_subject_attributes, insert_new_datamodel
+from database.datamodels import (
+    default_source_parameters,
+    default_subject_attributes,
+    insert_new_datamodel,
+    latest_datamodel,
+)
 from routes import datamodel
 from server_utilities.functions import md5_hash
 
@@ -34,6 +39,35 @@ class DataModelTest(unittest.TestCase):
         self.database.datamodels.find_one.return_value = dict(_id=123, timestamp="now")
         self.assertRaises(bottle.HTTPError, datamodel.get_data_model, self.database)
 
+    def test_get_cached_data_model(self):
+        """Test that the data model is read from the database once."""
+        self.database.datamodels.find_one.return_value = dict(_id=123, timestamp="now")
+        latest_datamodel(self.database)
+        self.assertEqual(dict(_id="123", timestamp="now"), latest_datamodel(self.database))
+        self.database.datamodels.find_one.assert_called_once()
+
+    def test_data_model_is_read_only(self):
+        """Test that the data model can't be changed, because it is shared between requests."""
+        self.database.datamodels.find_one.return_value = dict(_id=123, metrics=dict(metric_type=dict(tags=[])))
+        data_model = latest_datamodel(self.database)
+        self.assertRaises(TypeError, data_model.update, dict(metrics={}))
+        self.assertRaises(TypeError, data_model["metrics"]["metric_type"]["tags"].append, "tag")
+
+    def test_insert_data_model_clears_cache(self):
+        """Test that the cached data model is replaced when a new data model is inserted."""
+        self.database.datamodels.find_one.return_value = dict(_id=123, timestamp="then")
+        latest_datamodel(self.database)
+        insert_new_datamodel(self.database, {})
+        self.database.datamodels.find_one.return_value = dict(_id=456, timestamp="now")
+        self.assertEqual(dict(_id="456", timestamp="now"), latest_datamodel(self.database))
+
+    def test_get_cached_past_data_model(self):
+        """Test that past data models are cached by timestamp."""
+        self.database.datamodels.find_one.return_value = dict(_id=123, timestamp="2020-01-01")
+        latest_datamodel(self.database, "2021-01-01")
+        self.assertEqual(dict(_id="123", timestamp="2020-01-01"), latest_datamodel(self.database, "2021-02-01"))
+        self.assertEqual(3, self.database.datamodels.find_one.call_count)
+
     def test_insert_data_model_with_id(self):
         """Test that a new data model can be inserted."""
         insert_new_datamodel(self.database, dict(_id="id"))
@@ -1,16 +1,29 @@
 """Unit tests for the measurement routes."""
 
+import io
+import json
 import unittest
 from datetime import date, datetime, timedelta
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, Mock, patch
+
+import bottle
+from pymongo import InsertOne, UpdateMany
+
+from database.change_feed import change_feed
+from database.measurements import update_measurement_end
 
 from routes.measurement import (
+    MeasurementsBatchRequest,
     get_measurements,
+    get_measurements_since,
     post_measurement,
+    post_measurements,
     set_entity_attribute,
     stream_nr_measurements,
 )
 
+from server_utilities.functions import iso_timestamp
+
 from ..fixtures import JOHN, METRIC_ID, REPORT_ID, SOURCE_ID, SOURCE_ID2, SUBJECT_ID, SUBJECT_ID2, create_report
 
 
@@ -20,33 +33,35 @@ class GetMeasurementsTest(unittest.TestCase):
     def setUp(self):
         """Override to create a mock database fixture."""
         self.database = Mock()
-        self.measurements = [dict(start="0"), dict(start="1")]
-        self.database.measurements.find_one.return_value = self.measurements[-1]
+        self.measurements = [dict(_id="0", start="0"), dict(_id="1", start="1")]
+        self.database.measurements.find_one.return_value = dict(start="1")
         self.database.measurements.find.return_value = self.measurements
 
+    @staticmethod
+    def get_measurements(database):
+        """Return the measurements of the metric, read from the generator."""
+        return dict(measurements=list(get_measurements(METRIC_ID, database)["measurements"]))
+
     def test_get_measurements(self):
         """Tests that the measurements for the requested metric are returned."""
-        self.assertEqual(dict(measurements=self.measurements), get_measurements(METRIC_ID, self.database))
+        self.assertEqual(
+            dict(measurements=[dict(start="0"), dict(start="1")]),
+            self.get_measurements(self.database),
+        )
 
     @patch("bottle.request")
     def test_get_old_but_not_new_measurements(self, request):
         """Test that the measurements for the requested metric and report date are returned."""
-        database_entries = [dict(start="0"), dict(start="1"), dict(start="2")]
+        database_entries = [dict(_id="0", start="0"), dict(_id="1", start="1"), dict(_id="2", start="2")]
 
-        def find_side_effect(query, projection, sort=None):  # pylint: disable=unused-argument
+        def find_side_effect(query, projection, sort):  # pylint: disable=unused-argument
             """Side effect for mocking the database measurements."""
-            min_iso_timestamp = query["end"]["$gt"] if "end" in query else ""
             max_iso_timestamp = query["start"]["$lt"] if "start" in query else ""
-            return [
-                m
-                for m in database_entries
-                if (not min_iso_timestamp or m["end"] > min_iso_timestamp)
-                and (not max_iso_timestamp or m["start"] < max_iso_timestamp)
-            ]
-
-        def find_one_side_effect(query, projection, sort=None):
+            return [dict(m) for m in database_entries if not max_iso_timestamp or m["start"] < max_iso_timestamp]
+
+        def find_one_side_effect(query, projection):  # pylint: disable=unused-argument
             """Side effect for mocking the last database measurement."""
-            return find_side_effect(query, projection, sort)[-1]
+            return [dict(start=m["start"]) for m in database_entries if m["_id"] == query["_id"]][0]
 
         self.database.measurements.find_one.side_effect = find_one_side_effect
         self.database.measurements.find.side_effect = find_side_effect
@@ -54,21 +69,141 @@ class GetMeasurementsTest(unittest.TestCase):
         request.query = dict(report_date="2")
 
         self.assertEqual(
-            dict(measurements=[dict(start="0"), dict(start="1")]), get_measurements(METRIC_ID, self.database)
+            dict(measurements=[dict(start="0"), dict(start="1")]),
+            self.get_measurements(self.database),
         )
 
     def test_get_measurements_when_there_are_none(self):
         """Tests that the measurements for the requested metric are returned."""
-        self.database.measurements.find_one.return_value = None
-        self.assertEqual(dict(measurements=[]), get_measurements(METRIC_ID, self.database))
+        self.database.measurements.find.return_value = []
+        self.assertEqual(dict(measurements=[]), self.get_measurements(self.database))
 
 
-@patch("database.measurements.iso_timestamp", new=Mock(return_value="2019-01-01"))
-@patch("model.measurement.iso_timestamp", new=Mock(return_value="2019-01-01"))
-@patch("model.source.iso_timestamp", new=Mock(return_value="2020-01-01"))
 @patch("bottle.request")
-class PostMeasurementTests(unittest.TestCase):
-    """Unit tests for the post measurement route."""
+class GetDownsampledMeasurementsTest(unittest.TestCase):
+    """Unit tests for getting the measurements of a metric aggregated per period."""
+
+    def setUp(self):
+        """Override to create a mock database fixture."""
+        self.database = Mock()
+        self.database.reports.find.return_value = [create_report()]
+        self.database.datamodels.find_one.return_value = dict(
+            _id="id", metrics=dict(metric_type=dict(default_scale="count"))
+        )
+        self.database.measurement_buckets.aggregate.return_value = [
+            dict(start="2021-01-01", end="2021-01-03", min=1.0, max=3.0, value="2", status="target_met")
+        ]
+
+    def aggregation_format(self) -> str:
+        """Return the date format used to group the measurements."""
+        pipeline = self.database.measurement_buckets.aggregate.call_args[0][0]
+        return [stage for stage in pipeline if "$group" in stage][0]["$group"]["_id"]["$dateToString"]["format"]
+
+    def test_get_measurements_per_week(self, request):
+        """Test that the measurements can be aggregated per week."""
+        request.query = dict(resolution="week")
+        self.assertEqual(
+            dict(
+                measurements=[
+                    dict(
+                        metric_uuid=METRIC_ID,
+                        start="2021-01-01",
+                        end="2021-01-03",
+                        count=dict(
+                            min=1.0,
+                            max=3.0,
+                            value="2",
+                            status="target_met",
+                            target=None,
+                            near_target=None,
+                            debt_target=None,
+                            direction=None,
+                        ),
+                    )
+                ]
+            ),
+            get_measurements(METRIC_ID, self.database),
+        )
+        self.assertEqual("%G-W%V", self.aggregation_format())
+
+    def test_get_measurements_with_max_points(self, request):
+        """Test that the resolution is picked so the number of points doesn't exceed the maximum."""
+        request.query = dict(max_points="30")
+        first_start = (datetime.now() - timedelta(days=365)).isoformat()
+        self.database.measurement_buckets.find_one.return_value = dict(first_start=first_start + "+00:00")
+        get_measurements(METRIC_ID, self.database)
+        self.assertEqual("%Y-%m", self.aggregation_format())
+
+    def test_get_measurements_with_invalid_resolution(self, request):
+        """Test that an invalid resolution results in an error."""
+        request.query = dict(resolution="year")
+        self.assertRaises(bottle.HTTPError, get_measurements, METRIC_ID, self.database)
+
+    def test_get_measurements_with_invalid_max_points(self, request):
+        """Test that an invalid maximum number of points results in a bad request error."""
+        for max_points in ("", "0", "-1", "many"):
+            request.query = dict(resolution="year", max_points=max_points)
+            with self.assertRaises(bottle.HTTPError) as context:
+                get_measurements(METRIC_ID, self.database)
+            self.assertEqual(400, context.exception.status_code)
+
+
+@patch("bottle.request")
+class GetMeasurementsSinceTest(unittest.TestCase):
+    """Unit tests for the get measurements since route."""
+
+    def setUp(self):
+        """Override to create a mock database fixture with recent measurements."""
+        self.database = Mock()
+        self.now = iso_timestamp()
+        self.yesterday = (datetime.fromisoformat(self.now) - timedelta(days=1)).isoformat()
+        self.old = dict(_id="id1", metric_uuid=METRIC_ID, start=self.yesterday, end=self.yesterday)
+        self.new = dict(_id="id2", metric_uuid=METRIC_ID, start=self.yesterday, end=self.now)
+        self.database.measurements.find.return_value = [self.old, self.new]
+
+    def test_get_recent_measurements_without_cursor(self, request):
+        """Test that the recent measurements are returned if there's no cursor."""
+        request.query = {}
+        response = get_measurements_since(self.database)
+        self.assertEqual(2, len(response["measurements"]))
+        self.assertLessEqual(self.now, response["cursor"])
+
+    def test_get_measurements_since_cursor(self, request):
+        """Test that only the measurements that end at or after the cursor are returned."""
+        request.query = dict(since=self.now)
+        self.assertEqual(
+            [dict(metric_uuid=METRIC_ID, start=self.yesterday, end=self.now)],
+            get_measurements_since(self.database)["measurements"],
+        )
+
+    def test_get_measurements_since_invalid_cursor(self, request):
+        """Test that the cursor must be a timestamp."""
+        request.query = dict(since="yesterday")
+        with self.assertRaises(bottle.HTTPError) as context:
+            get_measurements_since(self.database)
+        self.assertEqual(400, context.exception.status_code)
+        self.database.measurements.find.assert_not_called()
+
+    def test_get_measurements_that_were_extended(self, request):
+        """Test that measurements whose end was updated after the cursor are returned."""
+        request.query = {}
+        cursor = get_measurements_since(self.database)["cursor"]
+        update_measurement_end(self.database, "id2")
+        request.query = dict(since=cursor)
+        self.assertEqual(1, len(get_measurements_since(self.database)["measurements"]))
+        self.database.measurements.find.assert_called_once()
+
+    def test_get_old_measurements(self, request):
+        """Test that measurements since a cursor before the recent measurements are read from the database."""
+        request.query = dict(since="2019-01-01T00:00:00Z")
+        get_measurements_since(self.database)
+        self.assertEqual(
+            {"end": {"$gte": "2019-01-01T00:00:00+00:00"}}, self.database.measurements.find.call_args[1]["filter"]
+        )
+
+
+class PostMeasurementTestCase(unittest.TestCase):
+    """Base class for the post measurement route unit tests."""
 
     def setUp(self):
         """Override to setup a mock database fixture with some content."""
@@ -116,7 +251,16 @@ class PostMeasurementTests(unittest.TestCase):
             count=dict(status="target_met"),
             sources=[self.source(value="0"), self.source(source_uuid=SOURCE_ID2)],
         )
-        self.database.measurements.find_one.return_value = self.old_measurement
+        self.latest_successful_measurement = self.old_measurement
+
+        def aggregate(pipeline):  # pylint: disable=unused-argument
+            """Fake the aggregation of the latest and latest successful measurement."""
+            if self.old_measurement is None:
+                return []
+            latest_successful = [self.latest_successful_measurement] if self.latest_successful_measurement else []
+            return [dict(self.old_measurement, latest_successful=latest_successful)]
+
+        self.database.measurements.aggregate.side_effect = aggregate
         self.posted_measurement = dict(metric_uuid=METRIC_ID, sources=[])
 
     @staticmethod
@@ -130,6 +274,7 @@ class PostMeasurementTests(unittest.TestCase):
             connection_error=connection_error,
             entities=entities or [],
             entity_user_data=entity_user_data or {},
+            content_hash=json.dumps([source_uuid, value, connection_error, entities or []], sort_keys=True),
         )
 
     @staticmethod
@@ -154,9 +299,17 @@ class PostMeasurementTests(unittest.TestCase):
             measurement["status_start"] = status_start
         return measurement
 
+
+@patch("database.measurements.iso_timestamp", new=Mock(return_value="2019-01-01"))
+@patch("model.measurement.iso_timestamp", new=Mock(return_value="2019-01-01"))
+@patch("model.source.iso_timestamp", new=Mock(return_value="2020-01-01"))
+@patch("bottle.request")
+class PostMeasurementTests(PostMeasurementTestCase):
+    """Unit tests for the post measurement route."""
+
     def test_first_measurement(self, request):
         """Post the first measurement for a metric."""
-        self.database.measurements.find_one.return_value = None
+        self.old_measurement = None
         sources = self.posted_measurement["sources"] = [self.source(), self.source(source_uuid=SOURCE_ID2)]
         request.json = self.posted_measurement
         post_measurement(self.database)
@@ -166,7 +319,7 @@ class PostMeasurementTests(unittest.TestCase):
 
     def test_first_measurement_two_scales(self, request):
         """Post the first measurement for a metric with two scales."""
-        self.database.measurements.find_one.return_value = None
+        self.old_measurement = None
         self.data_model["metrics"]["metric_type"]["scales"].append("percentage")
         sources = self.posted_measurement["sources"] = [self.source(), self.source(source_uuid=SOURCE_ID2)]
         request.json = self.posted_measurement
@@ -181,7 +334,7 @@ class PostMeasurementTests(unittest.TestCase):
 
     def test_first_measurement_version_number_scale(self, request):
         """Post the first measurement on the version number scale."""
-        self.database.measurements.find_one.return_value = None
+        self.old_measurement = None
         self.data_model["metrics"]["metric_type"]["scales"] = ["version_number"]
         self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["scale"] = "version_number"
         self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["addition"] = "min"
@@ -204,6 +357,28 @@ class PostMeasurementTests(unittest.TestCase):
             filter={"_id": "id"}, update={"$set": {"end": "2019-01-01"}}
         )
 
+    def test_unchanged_measurement_without_content_hashes(self, request):
+        """Post an unchanged measurement for a metric whose latest measurement has no content hashes."""
+        for source in self.old_measurement["sources"]:
+            del source["content_hash"]
+        self.posted_measurement["sources"] = [self.source(value="0"), self.source(source_uuid=SOURCE_ID2)]
+        request.json = self.posted_measurement
+        post_measurement(self.database)
+        self.database.measurements.update_one.assert_not_called()
+        self.database.measurements.insert_one.assert_called_once()
+
+    def test_unchanged_measurements_both_without_content_hashes(self, request):
+        """Post an unchanged measurement without content hashes for a metric whose latest measurement has none."""
+        for source in self.old_measurement["sources"]:
+            del source["content_hash"]
+        self.posted_measurement["sources"] = [dict(source) for source in self.old_measurement["sources"]]
+        request.json = self.posted_measurement
+        post_measurement(self.database)
+        self.database.measurements.update_one.assert_called_once_with(
+            filter={"_id": "id"}, update={"$set": {"end": "2019-01-01"}}
+        )
+        self.database.measurements.insert_one.assert_not_called()
+
     def test_changed_measurement_value(self, request):
         """Post a changed measurement for a metric."""
         self.posted_measurement["sources"].append(self.source())
@@ -294,23 +469,19 @@ class PostMeasurementTests(unittest.TestCase):
 
     def test_ignored_measurement_entities_and_failed_measurement(self, request):
         """Post a measurement where the last successful one has ignored entities."""
-        self.database.measurements.find_one.side_effect = [
-            dict(
-                _id="id1",
-                count=dict(status=None, status_start="2018-12-01"),
-                sources=[self.source()],
-            ),
-            dict(
-                _id="id2",
-                status="target_met",
-                sources=[
-                    self.source(
-                        entities=[dict(key="entity1")],
-                        entity_user_data=dict(entity1=dict(status="false_positive", rationale="Rationale")),
-                    )
-                ],
-            ),
-        ]
+        self.old_measurement = dict(
+            _id="id1",
+            count=dict(status=None, status_start="2018-12-01"),
+            sources=[self.source()],
+        )
+        self.latest_successful_measurement = dict(
+            sources=[
+                dict(
+                    source_uuid=SOURCE_ID,
+                    entity_user_data=dict(entity1=dict(status="false_positive", rationale="Rationale")),
+                )
+            ],
+        )
         self.posted_measurement["sources"].append(self.source(entities=[dict(key="entity1")]))
         request.json = self.posted_measurement
         post_measurement(self.database)
@@ -328,10 +499,8 @@ class PostMeasurementTests(unittest.TestCase):
 
     def test_all_previous_measurements_were_failed_measurements(self, request):
         """Post a measurement without a last successful one."""
-        self.database.measurements.find_one.side_effect = [
-            dict(_id="id1", count=dict(status=None), sources=[self.source(connection_error="Error")]),
-            None,
-        ]
+        self.old_measurement = dict(_id="id1", count=dict(status=None), sources=[self.source(connection_error="Error")])
+        self.latest_successful_measurement = None
         self.posted_measurement["sources"].append(self.source(entities=[dict(key="entity1")]))
         request.json = self.posted_measurement
         post_measurement(self.database)
@@ -373,6 +542,14 @@ class PostMeasurementTests(unittest.TestCase):
             )
         )
 
+
+@patch("database.measurements.iso_timestamp", new=Mock(return_value="2019-01-01"))
+@patch("model.measurement.iso_timestamp", new=Mock(return_value="2019-01-01"))
+@patch("model.source.iso_timestamp", new=Mock(return_value="2020-01-01"))
+@patch("bottle.request")
+class PostMeasurementTechnicalDebtTests(PostMeasurementTestCase):
+    """Unit tests for the post measurement route with technical debt."""
+
     def test_accepted_technical_debt(self, request):
         """Test that a new measurement is not added when technical debt has not expired yet."""
         self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["accept_debt"] = True
@@ -424,6 +601,113 @@ class PostMeasurementTests(unittest.TestCase):
         )
 
 
+@patch("database.measurements.iso_timestamp", new=Mock(return_value="2019-01-01"))
+@patch("model.measurement.iso_timestamp", new=Mock(return_value="2019-01-01"))
+@patch("model.source.iso_timestamp", new=Mock(return_value="2020-01-01"))
+@patch("bottle.request")
+class PostMeasurementsTests(unittest.TestCase):
+    """Unit tests for the post measurements (batch) route."""
+
+    def setUp(self):
+        """Override to setup a mock database fixture with some content."""
+        self.database = Mock()
+        self.report = create_report()
+        self.database.reports.find.return_value = [self.report]
+        self.database.datamodels.find_one.return_value = dict(
+            _id="",
+            metrics=dict(metric_type=dict(direction="<", default_scale="count", scales=["count"])),
+            sources=dict(source_type=dict(entities={})),
+        )
+        self.source = PostMeasurementTestCase.source
+        self.old_measurement = dict(
+            _id="id", metric_uuid=METRIC_ID, has_error=False, sources=[self.source(source_uuid=SOURCE_ID, value="0")]
+        )
+        self.database.measurements.aggregate.return_value = [dict(_id=METRIC_ID, measurement=self.old_measurement)]
+
+    @staticmethod
+    def environ(json_body) -> dict:
+        """Return a WSGI environment with the JSON body."""
+        body = json.dumps(json_body).encode()
+        return {"CONTENT_TYPE": "application/json", "CONTENT_LENGTH": str(len(body)), "wsgi.input": io.BytesIO(body)}
+
+    def test_first_measurements(self, request):
+        """Post the first measurement for a metric."""
+        self.database.measurements.aggregate.return_value = []
+        sources = [self.source(source_uuid=SOURCE_ID)]
+        measurements = [dict(metric_uuid=METRIC_ID, has_error=False, sources=sources)]
+        request.environ = self.environ(dict(measurements=measurements))
+        post_measurements(self.database)
+        count = dict(target="0", near_target=None, debt_target=None, direction="<", value="1", status="target_not_met")
+        inserted_measurement = dict(
+            metric_uuid=METRIC_ID,
+            has_error=False,
+            sources=sources,
+            start="2019-01-01",
+            end="2019-01-01",
+            count=count,
+            _id=ANY,
+        )
+        self.database.measurements.bulk_write.assert_called_once_with([InsertOne(inserted_measurement)], ordered=False)
+
+    def test_unchanged_measurement(self, request):
+        """Post an unchanged measurement for a metric."""
+        measurements = [dict(metric_uuid=METRIC_ID, sources=self.old_measurement["sources"])]
+        request.environ = self.environ(dict(measurements=measurements))
+        post_measurements(self.database)
+        self.database.measurements.bulk_write.assert_called_once_with(
+            [UpdateMany({"_id": {"$in": ["id"]}}, {"$set": {"end": "2019-01-01"}})], ordered=False
+        )
+
+    def test_changed_measurement(self, request):
+        """Post a changed measurement for a metric."""
+        measurements = [dict(metric_uuid=METRIC_ID, sources=[self.source(source_uuid=SOURCE_ID)])]
+        request.environ = self.environ(dict(measurements=measurements))
+        post_measurements(self.database)
+        requests = self.database.measurements.bulk_write.call_args.args[0]
+        self.assertEqual([InsertOne], [type(request) for request in requests])
+
+    def test_same_metric_twice(self, request):
+        """Post two unchanged measurements for the same metric, in one batch."""
+        measurement = dict(metric_uuid=METRIC_ID, has_error=False, sources=[self.source(source_uuid=SOURCE_ID)])
+        request.environ = self.environ(dict(measurements=[measurement, measurement]))
+        post_measurements(self.database)
+        requests = self.database.measurements.bulk_write.call_args.args[0]
+        self.assertEqual([InsertOne], [type(request) for request in requests])
+
+    def test_latest_successful_measurement(self, request):
+        """Test that the latest successful measurement is retrieved if the latest measurement has errors."""
+        self.old_measurement["has_error"] = True
+        measurements = [dict(metric_uuid=METRIC_ID, sources=self.old_measurement["sources"])]
+        request.environ = self.environ(dict(measurements=measurements))
+        post_measurements(self.database)
+        self.assertEqual(2, self.database.measurements.aggregate.call_count)
+
+    def test_deleted_metric(self, request):
+        """Post a measurement for a metric that has been deleted while being measured."""
+        request.environ = self.environ(dict(measurements=[dict(metric_uuid="deleted metric uuid", sources=[])]))
+        post_measurements(self.database)
+        self.database.measurements.bulk_write.assert_not_called()
+
+    def test_batch_larger_than_memfile_max(self, request):
+        """Test that a batch can be larger than the maximum size of other requests."""
+        entities = [dict(key=str(index), name="x" * 100) for index in range(20000)]
+        sources = [self.source(source_uuid=SOURCE_ID, entities=entities)]
+        request.environ = self.environ(dict(measurements=[dict(metric_uuid=METRIC_ID, sources=sources)]))
+        with patch.object(bottle.BaseRequest, "MEMFILE_MAX", 1024 * 1024):
+            post_measurements(self.database)
+        requests = self.database.measurements.bulk_write.call_args.args[0]
+        self.assertEqual([InsertOne], [type(request) for request in requests])
+
+    @patch.object(MeasurementsBatchRequest, "MEMFILE_MAX", 10)
+    def test_batch_too_large(self, request):
+        """Test that a batch larger than the maximum batch size is refused."""
+        request.environ = self.environ(dict(measurements=[]))
+        with self.assertRaises(bottle.HTTPError) as context:
+            post_measurements(self.database)
+        self.assertEqual(413, context.exception.status_code)
+        self.database.measurements.bulk_write.assert_not_called()
+
+
 class SetEntityAttributeTest(unittest.TestCase):
     """Unit tests for the set entity attribute route."""
 
@@ -475,24 +759,46 @@ class SetEntityAttributeTest(unittest.TestCase):
         )
 
 
+@patch("threading.Thread", Mock())
 class StreamNrMeasurementsTest(unittest.TestCase):
     """Unit tests for the number of measurements stream."""
 
-    def test_stream(self):
-        """Test that the stream returns the number of measurements whenever it changes."""
-
-        def sleep(seconds):
-            """Fake the time.sleep method."""
-            return seconds
+    def setUp(self):
+        """Override to create a mock database fixture and a measurement."""
+        self.database = Mock()
+        self.database.measurements.estimated_document_count.return_value = 42
+        self.measurement = dict(
+            metric_uuid=METRIC_ID, start="2021-01-01", end="2021-01-01", count=dict(status="target_met")
+        )
 
-        database = Mock()
-        database.measurements.estimated_document_count.side_effect = [42, 42, 42, 43, 43, 43, 43, 43, 43, 43, 43]
-        with patch("time.sleep", sleep):
-            stream = stream_nr_measurements(database)
+    def test_stream(self):
+        """Test that the stream returns the changed measurements and the number of measurements when they change."""
+        with patch("time.sleep", Mock()):
+            stream = stream_nr_measurements(self.database)
             try:
                 self.assertEqual("retry: 2000\nid: 0\nevent: init\ndata: 42\n\n", next(stream))
-                self.assertEqual("retry: 2000\nid: 1\nevent: delta\ndata: 43\n\n", next(stream))
+                change_feed(self.database).publish("insert", self.measurement)
+                self.assertEqual(
+                    "retry: 2000\nid: 1\nevent: measurements\ndata: "
+                    '[{"operation": "insert", "metric_uuid": "metric_uuid", "statuses": {"count": "target_met"}, '
+                    '"start": "2021-01-01", "end": "2021-01-01"}]\n\n',
+                    next(stream),
+                )
                 self.assertEqual("retry: 2000\nid: 2\nevent: delta\ndata: 43\n\n", next(stream))
             except StopIteration:  # pragma: no cover
                 # DeepSource says: calls to next() should be inside try-except block.
                 self.fail("Unexpected StopIteration")
+
+    def test_stream_heartbeat(self):
+        """Test that the stream returns the number of measurements regularly, even if the number doesn't change."""
+        with patch("time.sleep", Mock()) as sleep:
+            stream = stream_nr_measurements(self.database)
+            try:
+                next(stream)
+                change_feed(self.database).publish("update", self.measurement)
+                self.assertIn("event: measurements", next(stream))
+                self.assertEqual("retry: 2000\nid: 2\nevent: delta\ndata: 42\n\n", next(stream))
+                self.assertEqual(7, sleep.call_count)
+            except StopIteration:  # pragma: no cover
+                # DeepSource says: calls to next() should be inside try-except block.
+                self.fail("Unexpected StopIteration")
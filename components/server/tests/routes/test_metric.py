@@ -1,5 +1,6 @@
 """Unit tests for the metric routes."""
 
+import functools
 import unittest
 from unittest.mock import Mock, patch
 
@@ -61,6 +62,8 @@ class PostMetricAttributeTest(unittest.TestCase):
         )
         self.database = Mock()
         self.database.reports.find.return_value = [self.report]
+        # Routes change copies of the reports, so keep the inserted report to check the changes:
+        self.database.reports.insert.side_effect = functools.partial(setattr, self, "report")
         self.database.measurements.find.return_value = []
         self.database.sessions.find_one.return_value = JOHN
         self.data_model = dict(
@@ -325,6 +328,8 @@ class MetricTest(unittest.TestCase):
         self.database = Mock()
         self.report = create_report()
         self.database.reports.find.return_value = [self.report]
+        # Routes change copies of the reports, so keep the inserted report to check the changes:
+        self.database.reports.insert.side_effect = functools.partial(setattr, self, "report")
         self.database.measurements.find.return_value = []
         self.database.sessions.find_one.return_value = JOHN
         self.database.datamodels.find_one.return_value = dict(
@@ -372,10 +377,10 @@ class MetricTest(unittest.TestCase):
     def test_move_metric_within_report(self):
         """Test that a metric can be moved to a different subject in the same report."""
         metric = self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]
-        target_subject = self.report["subjects"][SUBJECT_ID2] = dict(name="Target", metrics={})
+        self.report["subjects"][SUBJECT_ID2] = dict(name="Target", metrics={})
         self.assertEqual(dict(ok=True), post_move_metric(METRIC_ID, SUBJECT_ID2, self.database))
         self.assertEqual({}, self.report["subjects"][SUBJECT_ID]["metrics"])
-        self.assertEqual((METRIC_ID, metric), next(iter(target_subject["metrics"].items())))  # skipcq: PTC-W0063
+        self.assertEqual({METRIC_ID: metric}, self.report["subjects"][SUBJECT_ID2]["metrics"])
         self.assert_delta(
             "John moved the metric 'Metric' from subject 'Subject' in report 'Report' to subject 'Target' in report "
             "'Report'.",
@@ -391,8 +396,9 @@ class MetricTest(unittest.TestCase):
         )
         self.database.reports.find.return_value = [self.report, target_report]
         self.assertEqual(dict(ok=True), post_move_metric(METRIC_ID, SUBJECT_ID2, self.database))
+        target_report, self.report = self.database.reports.insert_many.call_args[0][0]
         self.assertEqual({}, self.report["subjects"][SUBJECT_ID]["metrics"])
-        self.assertEqual((METRIC_ID, metric), next(iter(target_subject["metrics"].items())))  # skipcq: PTC-W0063
+        self.assertEqual({METRIC_ID: metric}, target_report["subjects"][SUBJECT_ID2]["metrics"])
         expected_description = (
             "John moved the metric 'Metric' from subject 'Subject' in report 'Report' to subject 'Target' in report "
             "'Target'."
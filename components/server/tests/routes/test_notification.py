@@ -1,5 +1,6 @@
 """Unit tests for the notification routes."""
 
+import functools
 import unittest
 from unittest.mock import Mock, patch
 
@@ -22,6 +23,8 @@ class PostNotificationAttributesTest(unittest.TestCase):
                 name="notification_destination",
                 url="")})
         self.database.reports.find.return_value = [self.report]
+        # Routes change copies of the reports, so keep the inserted report to check the changes:
+        self.database.reports.insert.side_effect = functools.partial(setattr, self, "report")
         self.database.datamodels.find_one.return_value = dict(_id="id")
         self.email = "john@example.org"
         self.database.sessions.find_one.return_value = dict(user="John", email=self.email)
@@ -64,6 +67,8 @@ class NotificationDestinationTest(unittest.TestCase):
         self.report = create_report()
         self.database = Mock()
         self.database.reports.find.return_value = [self.report]
+        # Routes change copies of the reports, so keep the inserted report to check the changes:
+        self.database.reports.insert.side_effect = functools.partial(setattr, self, "report")
         self.database.datamodels.find_one.return_value = dict(_id="id")
         self.email = "jenny@example.org"
         self.database.sessions.find_one.return_value = dict(user="Jenny", email=self.email)
@@ -84,11 +89,11 @@ class NotificationDestinationTest(unittest.TestCase):
         self.database.reports.find.return_value = [report_without_destinations]
 
         self.assertTrue(post_new_notification_destination(REPORT_ID, self.database)["ok"])
-        notification_destinations_uuid = list(report_without_destinations["notification_destinations"].keys())[0]
+        notification_destinations_uuid = list(self.report["notification_destinations"].keys())[0]
         self.assertEqual(
             dict(uuids=[REPORT_ID, notification_destinations_uuid], email=self.email,
                  description="Jenny created a new destination for notifications in report 'Report'."),
-            report_without_destinations["delta"])
+            self.report["delta"])
 
     def test_delete_notification_destination(self):
         """Test that a notification destination can be deleted."""
@@ -1,11 +1,13 @@
 """Unit tests for the report routes."""
 
+import functools
 import unittest
 from datetime import datetime
 from typing import cast
 from unittest.mock import Mock, patch
 import copy
 
+from database.measurements import recent_measurements, update_measurement_end
 from routes.report import (
     delete_report,
     export_report_as_json,
@@ -16,7 +18,7 @@ from routes.report import (
     post_report_import,
     post_report_new,
 )
-from server_utilities.functions import asymmetric_encrypt
+from server_utilities.functions import asymmetric_encrypt, iso_timestamp
 from server_utilities.type import ReportId
 
 from ..fixtures import JENNY, JOHN, METRIC_ID, REPORT_ID, REPORT_ID2, SOURCE_ID, SUBJECT_ID, create_report
@@ -31,6 +33,8 @@ class PostReportAttributeTest(unittest.TestCase):
         self.database = Mock()
         self.report = dict(_id="id", report_uuid=REPORT_ID, title="Title")
         self.database.reports.find.return_value = [self.report]
+        # Routes change copies of the reports, so keep the inserted report to check the changes:
+        self.database.reports.insert.side_effect = functools.partial(setattr, self, "report")
         self.database.sessions.find_one.return_value = JOHN
         self.database.datamodels.find_one.return_value = {}
         self.database.measurements.find.return_value = []
@@ -101,6 +105,8 @@ PvjuXJ8zuyW+Jo6DrwIDAQAB
         )
         self.report = create_report()
         self.database.reports.find.return_value = [self.report]
+        # Routes change copies of the reports, so keep the inserted report to check the changes:
+        self.database.reports.insert.side_effect = functools.partial(setattr, self, "report")
         self.database.secrets.find_one.return_value = {"public_key": self.public_key, "private_key": self.private_key}
         self.database.measurements.find.return_value = []
         self.options = (
@@ -127,28 +133,72 @@ PvjuXJ8zuyW+Jo6DrwIDAQAB
         """Test that an old report can be retrieved and credentials are hidden."""
         request.query = dict(report_date="2020-08-31T23:59:59.000Z")
         report = create_report()
-        self.database.reports.distinct.return_value = [REPORT_ID]
-        self.database.reports.find_one.return_value = report
-        report["summary"] = dict(red=0, green=0, yellow=0, grey=0, white=1)
-        report["summary_by_subject"] = {SUBJECT_ID: dict(red=0, green=0, yellow=0, grey=0, white=1)}
-        report["summary_by_tag"] = {}
-        self.assertEqual(dict(reports=[report]), get_report(self.database, REPORT_ID))
+        self.database.reports.aggregate.return_value = [report]
+        returned_report = get_report(self.database, REPORT_ID)["reports"][0]
+        self.assertEqual(dict(red=0, green=0, yellow=0, grey=0, white=1), returned_report["summary"])
+        self.assertEqual(
+            {SUBJECT_ID: dict(red=0, green=0, yellow=0, grey=0, white=1)}, returned_report["summary_by_subject"]
+        )
+        self.assertEqual(
+            dict(security=dict(red=0, green=0, yellow=0, grey=0, white=1)), returned_report["summary_by_tag"]
+        )
+        returned_source = returned_report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["sources"][SOURCE_ID]
+        self.assertEqual("this string replaces credentials", returned_source["parameters"]["password"])
 
     def test_status_start(self):
         """Test that the status start is part of the reports summary."""
         measurement = dict(
             _id="id",
             metric_uuid=METRIC_ID,
+            start=iso_timestamp(),
+            end=iso_timestamp(),
             count=dict(status="target_not_met", status_start="2020-12-03:22:28:00+00:00"),
             sources=[dict(source_uuid=SOURCE_ID, parse_error=None, connection_error=None, value="42")],
         )
         self.database.measurements.find.return_value = [measurement]
         report = create_report()
         self.database.reports.find.return_value = [report]
-        report["summary"] = dict(red=0, green=0, yellow=0, grey=0, white=1)
-        report["summary_by_subject"] = {SUBJECT_ID: dict(red=0, green=0, yellow=0, grey=0, white=1)}
-        report["summary_by_tag"] = {}
-        self.assertEqual(dict(reports=[report]), get_report(self.database, REPORT_ID))
+        returned_report = get_report(self.database, REPORT_ID)["reports"][0]
+        returned_metric = returned_report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]
+        self.assertEqual("2020-12-03:22:28:00+00:00", returned_metric["status_start"])
+
+    def test_summary_is_updated_when_measurements_change(self):
+        """Test that the report summary is updated without reading all recent measurements again."""
+        measurement = dict(
+            _id="id",
+            metric_uuid=METRIC_ID,
+            start=iso_timestamp(),
+            end=iso_timestamp(),
+            count=dict(status="target_met", value="0"),
+            sources=[],
+        )
+        self.database.measurements.find.return_value = [measurement]
+        self.database.reports.find.return_value = [create_report()]
+        get_report(self.database, REPORT_ID)
+        update_measurement_end(self.database, "id")
+        recent_measurements(self.database).add(dict(measurement, _id="id2", count=dict(status="target_not_met")))
+        returned_report = get_report(self.database, REPORT_ID)["reports"][0]
+        self.assertEqual(dict(red=1, green=0, yellow=0, grey=0, white=0), returned_report["summary"])
+        self.assertEqual(2, len(returned_report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["recent_measurements"]))
+        self.database.measurements.find.assert_called_once()
+
+    def test_returned_summary_is_not_changed_when_measurements_change(self):
+        """Test that a summarized report that was returned earlier is not changed when the summary is updated."""
+        measurement = dict(
+            _id="id",
+            metric_uuid=METRIC_ID,
+            start=iso_timestamp(),
+            end=iso_timestamp(),
+            count=dict(status="target_met", value="0"),
+            sources=[],
+        )
+        self.database.measurements.find.return_value = [measurement]
+        self.database.reports.find.return_value = [create_report()]
+        earlier_report = get_report(self.database, REPORT_ID)["reports"][0]
+        recent_measurements(self.database).add(dict(measurement, _id="id2", count=dict(status="target_not_met")))
+        get_report(self.database, REPORT_ID)
+        self.assertEqual(dict(red=0, green=1, yellow=0, grey=0, white=0), earlier_report["summary"])
+        self.assertRaises(TypeError, earlier_report.update, title="Changed")
 
     @patch("server_utilities.functions.datetime")
     def test_get_tag_report(self, date_time):
@@ -249,7 +299,7 @@ PvjuXJ8zuyW+Jo6DrwIDAQAB
         self.database.reports.insert.assert_called_once()
         inserted_report = self.database.reports.insert.call_args[0][0]
         inserted_report_uuid = inserted_report["report_uuid"]
-        self.assertNotEqual(self.report["report_uuid"], inserted_report_uuid)
+        self.assertNotEqual(REPORT_ID, inserted_report_uuid)
         self.assertEqual(
             dict(
                 uuids=[REPORT_ID, inserted_report_uuid],
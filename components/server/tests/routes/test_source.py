@@ -1,5 +1,6 @@
 """Unit tests for the source routes."""
 
+import functools
 import unittest
 from unittest.mock import Mock, patch
 
@@ -7,12 +8,14 @@ import requests
 
 from routes.source import (
     delete_source,
+    get_source_availability,
     post_move_source,
     post_source_attribute,
     post_source_copy,
     post_source_new,
     post_source_parameter,
 )
+from server_utilities.url_availability import URLAvailabilityChecker
 
 from ..fixtures import (
     METRIC_ID,
@@ -41,6 +44,10 @@ class SourceTestCase(unittest.TestCase):  # skipcq: PTC-W0046
     def setUp(self):
         """Override to set unit test fixtures."""
         self.url = "https://url"
+        # Use a new URL availability checker per test so URL checks aren't cached across tests:
+        url_availability_patcher = patch("routes.source.url_availability", URLAvailabilityChecker())
+        url_availability_patcher.start()
+        self.addCleanup(url_availability_patcher.stop)
         self.database = Mock()
         self.database.measurements.find.return_value = []
         self.email = "jenny@example.org"
@@ -83,6 +90,8 @@ class SourceTestCase(unittest.TestCase):  # skipcq: PTC-W0046
             },
         )
         self.database.reports.find.return_value = [self.report]
+        # Routes change copies of the reports, so keep the inserted report to check the changes:
+        self.database.reports.insert.side_effect = functools.partial(setattr, self, "report")
 
     def assert_delta(self, description: str, uuids=None, report=None) -> None:
         """Check that the report has the correct delta."""
@@ -155,14 +164,20 @@ class PostSourceParameterTest(SourceTestCase):
         self.database.reports.find.return_value = [self.report]
         self.url_check_get_response = Mock(status_code=self.STATUS_CODE, reason=self.STATUS_CODE_REASON)
 
-    def assert_url_check(self, response, status_code: int = None, status_code_reason: str = None):
-        """Check the url check result."""
+    def url_check(self, status_code: int = None, status_code_reason: str = None, source_uuid=SOURCE_ID):
+        """Return the url check result."""
         status_code = status_code or self.STATUS_CODE
         status_code_reason = status_code_reason or self.STATUS_CODE_REASON
         availability = dict(
-            status_code=status_code, reason=status_code_reason, source_uuid=SOURCE_ID, parameter_key="url"
+            status_code=status_code, reason=status_code_reason, source_uuid=source_uuid, parameter_key="url"
         )
-        self.assertEqual(dict(ok=True, availability=[availability]), response)
+        return dict(availability=[availability])
+
+    def assert_url_check(
+        self, response, status_code: int = None, status_code_reason: str = None, source_uuid=SOURCE_ID
+    ) -> None:
+        """Check the url check result."""
+        self.assertEqual(dict(ok=True, **self.url_check(status_code, status_code_reason, source_uuid)), response)
 
     def assert_delta(self, description: str, uuids=None, report=None) -> None:
         """Extend to set up fixed parameters."""
@@ -178,7 +193,7 @@ class PostSourceParameterTest(SourceTestCase):
         response = post_source_parameter(SOURCE_ID, "url", self.database)
         self.assert_url_check(response)
         self.database.reports.insert.assert_called_once_with(self.report)
-        mock_get.assert_called_once_with(self.url, auth=None, headers={}, verify=False)
+        mock_get.assert_called_once_with(self.url, auth=None, headers={}, verify=False, timeout=10)
         self.assert_delta(
             f"url of source 'Source' of metric 'Metric' of subject 'Subject' in report 'Report' from '' to '{self.url}'"
         )
@@ -205,7 +220,7 @@ class PostSourceParameterTest(SourceTestCase):
         response = post_source_parameter(SOURCE_ID, "url", self.database)
         self.assert_url_check(response)
         self.database.reports.insert.assert_called_once_with(self.report)
-        mock_get.assert_called_once_with(self.url, auth=("un", "pwd"), headers={}, verify=False)
+        mock_get.assert_called_once_with(self.url, auth=("un", "pwd"), headers={}, verify=False, timeout=10)
 
     @patch.object(requests, "get")
     def test_url_no_url_type(self, mock_get, request):
@@ -235,7 +250,9 @@ class PostSourceParameterTest(SourceTestCase):
         response = post_source_parameter(SOURCE_ID, "url", self.database)
         self.assert_url_check(response)
         self.database.reports.insert.assert_called_once_with(self.report)
-        mock_get.assert_called_once_with(self.url, auth=("xxx", ""), headers={"Private-Token": "xxx"}, verify=False)
+        mock_get.assert_called_once_with(
+            self.url, auth=("xxx", ""), headers={"Private-Token": "xxx"}, verify=False, timeout=10
+        )
 
     @patch.object(requests, "get")
     def test_urls_connection_on_update_other_field(self, mock_get, request):
@@ -248,6 +265,26 @@ class PostSourceParameterTest(SourceTestCase):
         self.assert_url_check(response)
         self.database.reports.insert.assert_called_once_with(self.report)
 
+    @patch.object(requests, "get")
+    def test_url_availability_is_cached(self, mock_get, request):
+        """Test that the availability of a url is not checked again if it was checked recently."""
+        mock_get.return_value = self.url_check_get_response
+        request.json = dict(url=self.url)
+        post_source_parameter(SOURCE_ID, "url", self.database)
+        request.json = dict(url=self.url, username="changed")
+        self.assert_url_check(post_source_parameter(SOURCE_ID2, "url", self.database), source_uuid=SOURCE_ID2)
+        mock_get.assert_called_once()
+
+    @patch.object(requests, "get")
+    def test_defer_availability_checks(self, mock_get, request):
+        """Test that the availability is not returned if the client defers the availability checks."""
+        mock_get.return_value = self.url_check_get_response
+        request.json = dict(url=self.url, defer_availability_checks=True)
+        self.assertEqual(dict(ok=True), post_source_parameter(SOURCE_ID, "url", self.database))
+        self.database.reports.find.return_value = [dict(self.report, _id=REPORT_ID)]
+        self.assertEqual(self.url_check(), get_source_availability(SOURCE_ID, self.database))
+        mock_get.assert_called_once()
+
     def test_password(self, request):
         """Test that the password can be changed and is not logged."""
         request.json = dict(url="unimportant", password="secret")
@@ -273,6 +310,7 @@ class PostSourceParameterTest(SourceTestCase):
         request.json = dict(choices=["A", "D"])
         response = post_source_parameter(SOURCE_ID, "choices", self.database)
         self.assertEqual(response, dict(ok=True))
+        parameters = self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["sources"][SOURCE_ID]["parameters"]
         self.assertEqual(["A"], parameters["choices"])
         self.database.reports.insert.assert_called_once_with(self.report)
 
@@ -281,10 +319,10 @@ class PostSourceParameterTest(SourceTestCase):
 
         Curly braces shouldn't be interpreted as string formatting fields.
         """
-        parameters = self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["sources"][SOURCE_ID]["parameters"]
         request.json = dict(choices_with_addition=[r"[\w]{3}-[\w]{3}-[\w]{4}-[\w]{3}\/"])
         response = post_source_parameter(SOURCE_ID, "choices_with_addition", self.database)
         self.assertEqual(response, dict(ok=True))
+        parameters = self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["sources"][SOURCE_ID]["parameters"]
         self.assertEqual([r"[\w]{3}-[\w]{3}-[\w]{4}-[\w]{3}\/"], parameters["choices_with_addition"])
         self.database.reports.insert.assert_called_once_with(self.report)
         self.assert_delta(
@@ -337,12 +375,22 @@ class PostSourceParameterMassEditTest(SourceTestCase):
             },
         )
         self.database.reports.find.return_value = [self.report, self.report2]
+        self.database.reports.insert_many.side_effect = self.insert_many
+
+    def insert_many(self, reports, **kwargs):  # pylint: disable=unused-argument
+        """Keep the inserted reports to check the changes."""
+        self.report, self.report2 = reports
 
     def assert_value(self, value_sources_mapping):
-        """Assert that the parameters have the correct value."""
-        for value, sources in value_sources_mapping.items():
-            for source in sources:
-                self.assertEqual(value, source["parameters"]["username"])
+        """Assert that the parameters of the sources in the latest reports have the correct value."""
+        sources = {}
+        for report in (self.report, self.report2):
+            for subject in report["subjects"].values():
+                for metric in subject["metrics"].values():
+                    sources.update(metric["sources"])
+        for value, source_uuids in value_sources_mapping.items():
+            for source_uuid in source_uuids:
+                self.assertEqual(value, sources[source_uuid]["parameters"]["username"])
 
     def assert_delta(self, description: str, uuids=None, report=None) -> None:
         """Extend to set up fixed parameters."""
@@ -361,14 +409,14 @@ class PostSourceParameterMassEditTest(SourceTestCase):
         self.assert_value(
             {
                 self.NEW_VALUE: [
-                    self.sources[SOURCE_ID],
-                    self.sources[SOURCE_ID2],
-                    self.sources2[SOURCE_ID5],
-                    self.sources3[SOURCE_ID6],
-                    self.sources4[SOURCE_ID7],
+                    SOURCE_ID,
+                    SOURCE_ID2,
+                    SOURCE_ID5,
+                    SOURCE_ID6,
+                    SOURCE_ID7,
                 ],
-                self.OLD_VALUE: [self.sources[SOURCE_ID4]],
-                self.UNCHANGED_VALUE: [self.sources[SOURCE_ID3]],
+                self.OLD_VALUE: [SOURCE_ID4],
+                self.UNCHANGED_VALUE: [SOURCE_ID3],
             }
         )
         extra_uuids = [METRIC_ID2, SOURCE_ID5, SUBJECT_ID2, METRIC_ID3, SOURCE_ID6]
@@ -385,13 +433,13 @@ class PostSourceParameterMassEditTest(SourceTestCase):
         self.assert_value(
             {
                 self.NEW_VALUE: [
-                    self.sources[SOURCE_ID],
-                    self.sources[SOURCE_ID2],
-                    self.sources2[SOURCE_ID5],
-                    self.sources3[SOURCE_ID6],
+                    SOURCE_ID,
+                    SOURCE_ID2,
+                    SOURCE_ID5,
+                    SOURCE_ID6,
                 ],
-                self.OLD_VALUE: [self.sources[SOURCE_ID4]],
-                self.UNCHANGED_VALUE: [self.sources[SOURCE_ID3]],
+                self.OLD_VALUE: [SOURCE_ID4],
+                self.UNCHANGED_VALUE: [SOURCE_ID3],
             }
         )
         extra_uuids = [METRIC_ID2, SOURCE_ID5, SUBJECT_ID2, METRIC_ID3, SOURCE_ID6]
@@ -405,9 +453,9 @@ class PostSourceParameterMassEditTest(SourceTestCase):
         self.database.reports.insert.assert_called_once_with(self.report)
         self.assert_value(
             {
-                self.NEW_VALUE: [self.sources[SOURCE_ID], self.sources[SOURCE_ID2], self.sources2[SOURCE_ID5]],
-                self.OLD_VALUE: [self.sources[SOURCE_ID4], self.sources3[SOURCE_ID6]],
-                self.UNCHANGED_VALUE: [self.sources[SOURCE_ID3]],
+                self.NEW_VALUE: [SOURCE_ID, SOURCE_ID2, SOURCE_ID5],
+                self.OLD_VALUE: [SOURCE_ID4, SOURCE_ID6],
+                self.UNCHANGED_VALUE: [SOURCE_ID3],
             }
         )
         extra_uuids = [METRIC_ID2, SOURCE_ID5]
@@ -421,9 +469,9 @@ class PostSourceParameterMassEditTest(SourceTestCase):
         self.database.reports.insert.assert_called_once_with(self.report)
         self.assert_value(
             {
-                self.NEW_VALUE: [self.sources[SOURCE_ID], self.sources[SOURCE_ID2]],
-                self.OLD_VALUE: [self.sources[SOURCE_ID4], self.sources2[SOURCE_ID5], self.sources3[SOURCE_ID6]],
-                self.UNCHANGED_VALUE: [self.sources[SOURCE_ID3]],
+                self.NEW_VALUE: [SOURCE_ID, SOURCE_ID2],
+                self.OLD_VALUE: [SOURCE_ID4, SOURCE_ID5, SOURCE_ID6],
+                self.UNCHANGED_VALUE: [SOURCE_ID3],
             }
         )
         self.assert_delta(
@@ -468,12 +516,12 @@ class SourceTest(SourceTestCase):
     def test_move_source_within_subject(self):
         """Test that a source can be moved to a different metric in the same subject."""
         source = self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["sources"][SOURCE_ID]
-        target_metric = self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID2] = dict(
+        self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID2] = dict(
             name=self.target_metric_name, type="metric_type", sources={}
         )
         self.assertEqual(dict(ok=True), post_move_source(SOURCE_ID, METRIC_ID2, self.database))
         self.assertEqual({}, self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["sources"])
-        self.assertEqual((SOURCE_ID, source), next(iter(target_metric["sources"].items())))
+        self.assertEqual({SOURCE_ID: source}, self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID2]["sources"])
         uuids = [REPORT_ID, SUBJECT_ID, METRIC_ID, METRIC_ID2, SOURCE_ID]
         description = (
             f"Jenny moved the source 'Source' from metric 'Metric' of subject 'Subject' in report 'Report' to metric "
@@ -489,7 +537,7 @@ class SourceTest(SourceTestCase):
         self.report["subjects"][SUBJECT_ID2] = target_subject
         self.assertEqual(dict(ok=True), post_move_source(SOURCE_ID, METRIC_ID2, self.database))
         self.assertEqual({}, self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["sources"])
-        self.assertEqual((SOURCE_ID, source), next(iter(target_metric["sources"].items())))
+        self.assertEqual({SOURCE_ID: source}, self.report["subjects"][SUBJECT_ID2]["metrics"][METRIC_ID2]["sources"])
         uuids = [REPORT_ID, SUBJECT_ID, SUBJECT_ID2, METRIC_ID, METRIC_ID2, SOURCE_ID]
         description = (
             f"Jenny moved the source 'Source' from metric 'Metric' of subject 'Subject' in report 'Report' to metric "
@@ -507,8 +555,9 @@ class SourceTest(SourceTestCase):
         )
         self.database.reports.find.return_value = [self.report, target_report]
         self.assertEqual(dict(ok=True), post_move_source(SOURCE_ID, METRIC_ID2, self.database))
+        target_report, self.report = self.database.reports.insert_many.call_args[0][0]
         self.assertEqual({}, self.report["subjects"][SUBJECT_ID]["metrics"][METRIC_ID]["sources"])
-        self.assertEqual((SOURCE_ID, source), next(iter(target_metric["sources"].items())))
+        self.assertEqual({SOURCE_ID: source}, target_report["subjects"][SUBJECT_ID2]["metrics"][METRIC_ID2]["sources"])
         expected_description = (
             "Jenny moved the source 'Source' from metric 'Metric' of subject 'Subject' in report "
             f"'Report' to metric '{self.target_metric_name}' of subject 'Target subject' in "
@@ -1,8 +1,10 @@
 """Unit tests for the subject routes."""
 
+import functools
 import unittest
 from unittest.mock import Mock, patch
 
+from database.measurements import BUCKET_SCALE_FIELDS
 from routes.subject import (
     delete_subject,
     get_subject_measurements,
@@ -11,6 +13,7 @@ from routes.subject import (
     post_subject_attribute,
     post_subject_copy,
 )
+from server_utilities.functions import iso_timestamp
 from server_utilities.type import SubjectId
 
 from ..fixtures import METRIC_ID, REPORT_ID, REPORT_ID2, SUBJECT_ID, SUBJECT_ID2, create_report
@@ -27,11 +30,16 @@ class GetSubjectTest(unittest.TestCase):
         """Tests that the measurements for the requested metric are returned."""
         # Mock reports collection
         self.database.reports.find_one.return_value = {"subjects": {SUBJECT_ID: {"metrics": {METRIC_ID: {}}}}}
-        # Mock measurements collection
-        self.database.measurements.find_one.return_value = dict(start="1")
-        self.database.measurements.find.return_value = [dict(start="0"), dict(start="1")]
+        # Mock measurement buckets collection
+        now = iso_timestamp()
+        no_values = {field: [None] for field in BUCKET_SCALE_FIELDS}
+        count = dict(no_values, value=["1"], status=["target_met"])
+        bucket = dict(metric_uuid=METRIC_ID, start=[now], end=[now], percentage=no_values, version_number=no_values)
+        self.database.measurement_buckets.find.return_value = [dict(bucket, count=count)]
+        expected_count = dict(dict.fromkeys(BUCKET_SCALE_FIELDS), value="1", status="target_met")
         self.assertEqual(
-            dict(measurements=[dict(start="0"), dict(start="1")]), get_subject_measurements(SUBJECT_ID, self.database)
+            dict(measurements=[dict(metric_uuid=METRIC_ID, start=now, end=now, count=expected_count)]),
+            get_subject_measurements(SUBJECT_ID, self.database),
         )
 
 
@@ -49,6 +57,8 @@ class PostSubjectAttributeTest(unittest.TestCase):
             subjects={SUBJECT_ID: dict(name="subject1"), SUBJECT_ID2: dict(type="subject_type")},
         )
         self.database.reports.find.return_value = [self.report]
+        # Routes change copies of the reports, so keep the inserted report to check the changes:
+        self.database.reports.insert.side_effect = functools.partial(setattr, self, "report")
         self.database.measurements.find.return_value = []
         self.database.datamodels.find_one.return_value = dict(
             _id="id", subjects=dict(subject_type=dict(name="subject2"))
@@ -127,6 +137,8 @@ class SubjectTest(unittest.TestCase):
         self.database.sessions.find_one.return_value = dict(user="Jenny", email=self.email)
         self.report = create_report()
         self.database.reports.find.return_value = [self.report]
+        # Routes change copies of the reports, so keep the inserted report to check the changes:
+        self.database.reports.insert.side_effect = functools.partial(setattr, self, "report")
         self.database.measurements.find.return_value = []
         self.database.datamodels.find_one.return_value = dict(
             _id="id",
@@ -170,8 +182,9 @@ class SubjectTest(unittest.TestCase):
         target_report = dict(_id="target_report", title="Target", report_uuid=REPORT_ID2, subjects={})
         self.database.reports.find.return_value = [self.report, target_report]
         self.assertEqual(dict(ok=True), post_move_subject(SUBJECT_ID, REPORT_ID2, self.database))
+        self.report, target_report = self.database.reports.insert_many.call_args[0][0]
         self.assertEqual({}, self.report["subjects"])
-        self.assertEqual((SUBJECT_ID, subject), next(iter(target_report["subjects"].items())))
+        self.assertEqual({SUBJECT_ID: subject}, target_report["subjects"])
         expected_description = "moved the subject 'Subject' from report 'Report' to report 'Target'"
         self.assert_delta(expected_description, SUBJECT_ID)
         self.assert_delta(expected_description, SUBJECT_ID, target_report)
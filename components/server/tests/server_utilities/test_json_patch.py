@@ -0,0 +1,46 @@
+"""Unit tests for the JSON patch functions."""
+
+import unittest
+
+from server_utilities import json_patch
+
+
+class JSONPatchTest(unittest.TestCase):
+    """Unit tests for the JSON patch functions."""
+
+    def assert_patch(self, source, target, expected_patch):
+        """Check the patch that changes the source into the target and that applying the patch results in the target."""
+        patch = json_patch.diff(source, target)
+        self.assertEqual(expected_patch, patch)
+        self.assertEqual(target, json_patch.apply(source, patch))
+
+    def test_equal_documents(self):
+        """Test that the patch between equal documents is empty."""
+        self.assert_patch(dict(a=1), dict(a=1), [])
+
+    def test_changed_value(self):
+        """Test that changed values are replaced."""
+        self.assert_patch(
+            dict(a=dict(b=1, c=[1])),
+            dict(a=dict(b=2, c=[1, 2])),
+            [dict(op="replace", path="/a/b", value=2), dict(op="replace", path="/a/c", value=[1, 2])],
+        )
+
+    def test_added_and_removed_keys(self):
+        """Test that keys are added and removed."""
+        self.assert_patch(dict(a=1), dict(b=2), [dict(op="remove", path="/a"), dict(op="add", path="/b", value=2)])
+
+    def test_keys_are_escaped(self):
+        """Test that slashes and tildes in keys are escaped."""
+        self.assert_patch({"a/b": {"~c": 1}}, {"a/b": {"~c": 2}}, [dict(op="replace", path="/a~1b/~0c", value=2)])
+
+    def test_replace_document(self):
+        """Test that a document with a different type is replaced."""
+        self.assert_patch(dict(a=1), [1], [dict(op="replace", path="", value=[1])])
+
+    def test_patched_values_are_copies(self):
+        """Test that values from the patch are copied when the patch is applied."""
+        patch = json_patch.diff({}, dict(a=dict(b=1)))
+        document = json_patch.apply({}, patch)
+        document["a"]["b"] = 2
+        self.assertEqual(dict(b=1), patch[0]["value"])
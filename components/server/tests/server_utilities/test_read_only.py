@@ -0,0 +1,50 @@
+"""Unit tests for the read-only containers."""
+
+import copy
+import json
+import unittest
+
+from server_utilities.read_only import ReadOnlyDict, ReadOnlyList, read_only, writable
+
+
+class ReadOnlyTest(unittest.TestCase):
+    """Unit tests for the read-only containers."""
+
+    def setUp(self):
+        """Override to create a read-only value."""
+        self.value = read_only(dict(key=[dict(nested="value")]))
+
+    def test_nested_containers_are_read_only(self):
+        """Test that nested dictionaries and lists are converted as well."""
+        self.assertIsInstance(self.value, ReadOnlyDict)
+        self.assertIsInstance(self.value["key"], ReadOnlyList)
+        self.assertIsInstance(self.value["key"][0], ReadOnlyDict)
+
+    def test_change_dict(self):
+        """Test that the dictionary can't be changed."""
+        self.assertRaises(TypeError, self.value.__setitem__, "key", "value")
+        self.assertRaises(TypeError, self.value.pop, "key")
+
+    def test_change_list(self):
+        """Test that the list can't be changed."""
+        self.assertRaises(TypeError, self.value["key"].append, "value")
+        self.assertRaises(TypeError, self.value["key"].sort)
+
+    def test_copies_can_be_changed(self):
+        """Test that copies are regular containers."""
+        deep_copy = copy.deepcopy(self.value)
+        deep_copy["key"][0]["nested"] = "changed"
+        self.assertEqual(dict(key=[dict(nested="changed")]), deep_copy)
+        self.assertEqual(dict, type(self.value.copy()))
+        self.assertEqual(list, type(copy.copy(self.value["key"])))
+
+    def test_json(self):
+        """Test that the read-only containers can be serialized as JSON."""
+        self.assertEqual('{"key": [{"nested": "value"}]}', json.dumps(self.value))
+
+    def test_writable(self):
+        """Test that a writable copy consists of regular containers."""
+        writable_copy = writable(self.value)
+        writable_copy["key"][0]["nested"] = "changed"
+        self.assertEqual(dict(key=[dict(nested="changed")]), writable_copy)
+        self.assertEqual(dict(key=[dict(nested="value")]), self.value)
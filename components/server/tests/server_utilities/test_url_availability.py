@@ -0,0 +1,72 @@
+"""Unit tests for the URL availability checks."""
+
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+from server_utilities.url_availability import URLAvailabilityChecker
+
+
+@patch.object(requests, "get")
+class URLAvailabilityCheckerTest(unittest.TestCase):
+    """Unit tests for the URL availability checker."""
+
+    def setUp(self):
+        """Override to create the URL availability checker."""
+        self.checker = URLAvailabilityChecker(timeout=0.1)
+        self.addCleanup(self.checker.close)
+        self.url = "https://url"
+
+    def availability(self, url=None, auth=None, headers=None):
+        """Check the availability of the URL."""
+        return self.checker.result(self.checker.start(url or self.url, auth, headers))
+
+    def test_available(self, mock_get):
+        """Test that the status code and reason are returned."""
+        mock_get.return_value = Mock(status_code=200, reason="OK")
+        self.assertEqual(dict(status_code=200, reason="OK"), self.availability())
+        mock_get.assert_called_once_with(self.url, auth=None, headers={}, verify=False, timeout=0.1)
+
+    def test_exception(self, mock_get):
+        """Test that an unknown error is returned if the check raises an exception."""
+        mock_get.side_effect = requests.exceptions.ConnectionError
+        self.assertEqual(dict(status_code=-1, reason="Unknown error"), self.availability())
+
+    def test_timeout(self, mock_get):
+        """Test that a timeout is returned if the check takes too long."""
+        check_may_finish = threading.Event()
+        mock_get.side_effect = lambda *args, **kwargs: check_may_finish.wait()
+        self.assertEqual(dict(status_code=-1, reason="Timeout"), self.availability())
+        check_may_finish.set()
+
+    def test_cache(self, mock_get):
+        """Test that a URL is checked once if it's checked repeatedly with the same credentials."""
+        mock_get.return_value = Mock(status_code=200, reason="OK")
+        self.availability(auth=("user", "password"), headers={"Private-Token": "token"})
+        self.availability(auth=("user", "password"), headers={"Private-Token": "token"})
+        mock_get.assert_called_once()
+
+    def test_cache_per_url_and_credentials(self, mock_get):
+        """Test that a URL is checked again if the URL or the credentials differ."""
+        mock_get.return_value = Mock(status_code=200, reason="OK")
+        self.availability()
+        self.availability(url="https://other_url")
+        self.availability(auth=("user", "password"))
+        self.availability(headers={"Private-Token": "token"})
+        self.assertEqual(4, mock_get.call_count)
+
+    def test_close(self, mock_get):
+        """Test that no URLs can be checked after the checker is closed."""
+        self.checker.close()
+        self.assertRaises(RuntimeError, self.availability)
+        mock_get.assert_not_called()
+
+    def test_cache_expiry(self, mock_get):
+        """Test that a URL is checked again after the cache duration."""
+        mock_get.return_value = Mock(status_code=200, reason="OK")
+        self.availability()
+        with patch("time.monotonic", Mock(return_value=10**9)):
+            self.availability()
+        self.assertEqual(2, mock_get.call_count)